@@ -0,0 +1,99 @@
+"""
+Precomputed stats tables
+band_stats, venue_stats, event_stats and year_stats hold one row per band
+group, venue, event and year with its show count and first/last show date,
+so the Bands, Venues and Stats pages don't aggregate over every show.
+Migration 9 creates them; triggers refresh only the keys a write touches
+(e.g. one venue and one year for a new show). Run directly to check them
+against a full recomputation, or to rebuild them:
+
+    python aggregates.py [--rebuild]
+"""
+import argparse
+
+# table: (key column, key expression in the source query, source tables)
+AGGREGATES = {
+    "band_stats": (
+        "band_id",
+        "ba.canonical_band_id",
+        "bands ba JOIN show_bands sb ON sb.band_id = ba.id JOIN shows s ON s.id = sb.show_id",
+    ),
+    "venue_stats": ("venue_id", "s.venue_id", "shows s"),
+    "event_stats": ("event_id", "s.event_id", "shows s"),
+    "year_stats": ("year", "s.year", "shows s"),
+}
+
+
+def source_sql(table, keys=None):
+    """SELECT computing ``table``'s rows from scratch, for every key or only
+    those in the ``keys`` SQL list/subquery."""
+    _key_column, key_expr, source = AGGREGATES[table]
+    where = f"{key_expr} IN ({keys})" if keys is not None else f"{key_expr} IS NOT NULL"
+    return f"""
+        SELECT {key_expr}, COUNT(*), MIN(s.date), MAX(s.date)
+        FROM {source}
+        WHERE {where}
+        GROUP BY {key_expr}
+    """
+
+
+def refresh_sql(table, keys):
+    """Statements recomputing the rows of ``table`` for ``keys`` (trigger body)."""
+    key_column = AGGREGATES[table][0]
+    return f"""
+        DELETE FROM {table} WHERE {key_column} IN ({keys});
+        INSERT INTO {table} {source_sql(table, keys)};
+    """
+
+
+def fill(cursor):
+    for table in AGGREGATES:
+        cursor.execute(f"INSERT INTO {table} {source_sql(table)}")
+
+
+def rebuild(conn):
+    """Recompute every stats table from the source tables."""
+    cursor = conn.cursor()
+    for table in AGGREGATES:
+        cursor.execute(f"DELETE FROM {table}")
+    fill(cursor)
+    conn.commit()
+
+
+def verify(conn):
+    """Compare the stats tables with a full recomputation.
+
+    Returns {table: (missing, stale)} for each table that differs: rows the
+    recomputation has that the table lacks, and rows the table has that the
+    recomputation doesn't.
+    """
+    cursor = conn.cursor()
+    problems = {}
+    for table in AGGREGATES:
+        cursor.execute(f"{source_sql(table)} EXCEPT SELECT * FROM {table}")
+        missing = [tuple(row) for row in cursor.fetchall()]
+        cursor.execute(f"SELECT * FROM {table} EXCEPT {source_sql(table)}")
+        stale = [tuple(row) for row in cursor.fetchall()]
+        if missing or stale:
+            problems[table] = (missing, stale)
+    return problems
+
+
+if __name__ == "__main__":
+    from db import get_db
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the tables first")
+    args = parser.parse_args()
+
+    conn = get_db()
+    if args.rebuild:
+        rebuild(conn)
+    problems = verify(conn)
+    for table in AGGREGATES:
+        if table in problems:
+            missing, stale = problems[table]
+            print(f"MISMATCH {table}: {len(missing)} missing, {len(stale)} stale rows")
+        else:
+            print(f"ok       {table}")
+    raise SystemExit(1 if problems else 0)
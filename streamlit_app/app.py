@@ -3,10 +3,18 @@ Shows Attended - Streamlit App
 Main page: Shows list with search and filters
 """
 import streamlit as st
-from datetime import datetime, timedelta
+from datetime import datetime
 from db import get_db
+from geocode import get_geocoder
+from names import NameIndex
+from queries import (
+    ORPHAN_CHECKS, band_index, count_shows, delete_orphans, delete_show as delete_show_rows,
+    event_index, get_or_create_event, get_or_create_venue, get_recent_upcoming_shows,
+    insert_lineup, load_lineup, load_show, load_shows, load_venue_location, load_years, overview,
+    update_lineup, venue_index,
+)
 from auth import check_password, show_logout_button
-from utils import format_date, inject_sidebar_css
+from utils import format_date, inject_sidebar_css, type_ahead
 
 # Page config
 st.set_page_config(
@@ -80,60 +88,6 @@ st.markdown("""
 
 inject_sidebar_css()
 
-def load_shows(search="", year=None):
-    """Load shows with filters"""
-    conn = get_db()
-    cursor = conn.cursor()
-
-    where_conditions = ["1=1"]
-    params = []
-
-    if search:
-        where_conditions.append("""s.id IN (
-            SELECT sb2.show_id FROM show_bands sb2
-            JOIN bands b2 ON sb2.band_id = b2.id
-            WHERE b2.name LIKE ?
-        )""")
-        params.append(f"%{search}%")
-
-    if year and year != "All Years":
-        where_conditions.append("strftime('%Y', s.date) = ?")
-        params.append(str(year))
-
-    where_clause = " AND ".join(where_conditions)
-
-    query = f"""
-        SELECT
-            s.id,
-            s.date,
-            v.name as venue_name,
-            v.location as venue_location,
-            e.name as event,
-            (
-                SELECT GROUP_CONCAT(b2.name, ', ')
-                FROM show_bands sb2
-                JOIN bands b2 ON sb2.band_id = b2.id
-                WHERE sb2.show_id = s.id
-                ORDER BY sb2.band_order
-            ) as all_bands
-        FROM shows s
-        JOIN venues v ON s.venue_id = v.id
-        LEFT JOIN events e ON s.event_id = e.id
-        WHERE {where_clause}
-        ORDER BY s.date DESC
-    """
-
-    cursor.execute(query, params)
-    return cursor.fetchall()
-
-@st.cache_data(ttl=300)
-def load_years():
-    """Load available years"""
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT DISTINCT strftime('%Y', date) as year FROM shows ORDER BY year DESC")
-    return [row['year'] for row in cursor.fetchall()]
-
 def cleanup_edit_state(show_id):
     """Clean up all session state keys for a show edit"""
     keys_to_remove = [
@@ -142,7 +96,11 @@ def cleanup_edit_state(show_id):
         f'edit_last_venue_lookup_{show_id}',
         f'edit_venue_location_input_{show_id}',
         f'edit_venue_name_input_{show_id}',
-        f'new_event_name_{show_id}',
+        f'edit_venue_choice_{show_id}',
+        f'edit_event_choice_{show_id}',
+        f'band_search_{show_id}_query',
+        f'edit_venue_choice_{show_id}_search_query',
+        f'edit_event_choice_{show_id}_search_query',
     ]
     for key in keys_to_remove:
         st.session_state.pop(key, None)
@@ -153,79 +111,48 @@ def cleanup_add_state():
     keys_to_remove = [
         'add_show_bands', 'add_venue_name_input',
         'add_venue_location_input', 'last_venue_lookup',
-        'import_upcoming_id',
+        'import_upcoming_id', 'add_venue_choice', 'add_event_choice',
+        'add_band_search_query', 'add_venue_choice_search_query',
+        'add_event_choice_search_query',
     ]
     for key in keys_to_remove:
         st.session_state.pop(key, None)
     st.session_state.pop('adding_show', None)
 
-def clear_data_caches():
-    """Clear cached data after modifications"""
-    load_years.clear()
-    get_all_bands.clear()
-    get_all_venues.clear()
-    get_all_events.clear()
-    get_sidebar_stats.clear()
+def vacuum_orphans():
+    """Delete every unused band, venue and event (maintenance action)
 
-def delete_show(show_id):
-    """Delete a show and cleanup orphans"""
+    Returns {table: rows deleted}.
+    """
     conn = get_db()
     cursor = conn.cursor()
-
+    deleted = {}
     try:
-        # Delete show
-        cursor.execute("DELETE FROM shows WHERE id = ?", (show_id,))
+        cursor.execute("DELETE FROM show_bands WHERE NOT EXISTS (SELECT 1 FROM shows WHERE id = show_bands.show_id)")
+        deleted["show_bands"] = cursor.rowcount
+        for table, check in ORPHAN_CHECKS.items():
+            cursor.execute(f"DELETE FROM {table} WHERE {check}")
+            deleted[table] = cursor.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return deleted
 
-        # Cleanup orphans
-        cursor.execute("DELETE FROM show_bands WHERE show_id NOT IN (SELECT id FROM shows)")
-        cursor.execute("DELETE FROM bands WHERE id NOT IN (SELECT DISTINCT band_id FROM show_bands)")
-        cursor.execute("DELETE FROM venues WHERE id NOT IN (SELECT DISTINCT venue_id FROM shows)")
-        cursor.execute("DELETE FROM events WHERE id NOT IN (SELECT DISTINCT event_id FROM shows WHERE event_id IS NOT NULL)")
+def delete_show(show_id):
+    """Delete a show, then any band, venue or event only it used"""
+    conn = get_db()
+    cursor = conn.cursor()
 
+    try:
+        delete_show_rows(cursor, show_id)
         conn.commit()
-        clear_data_caches()
         return True
     except Exception as e:
         conn.rollback()
         st.error(f"Error deleting show: {e}")
         return False
 
-@st.cache_data(ttl=300)
-def get_all_bands():
-    """Get all band names for autocomplete"""
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM bands ORDER BY name")
-    return [row['name'] for row in cursor.fetchall()]
-
-@st.cache_data(ttl=300)
-def get_all_venues():
-    """Get all venue names for autocomplete"""
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT name, location FROM venues ORDER BY name")
-    return [(row['name'], row['location']) for row in cursor.fetchall()]
-
-@st.cache_data(ttl=300)
-def get_all_events():
-    """Get all event names for autocomplete"""
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM events ORDER BY name")
-    return [row['name'] for row in cursor.fetchall()]
-
-@st.cache_data(ttl=300)
-def get_sidebar_stats():
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM shows")
-    total_shows = cursor.fetchone()[0]
-    cursor.execute("SELECT COUNT(*) FROM bands WHERE primary_band_id IS NULL")
-    total_bands = cursor.fetchone()[0]
-    cursor.execute("SELECT COUNT(*) FROM venues")
-    total_venues = cursor.fetchone()[0]
-    return total_shows, total_bands, total_venues
-
 def split_band_names(event_name):
     """Split an event name into band names, respecting parentheses.
 
@@ -256,119 +183,114 @@ def split_band_names(event_name):
 
 
 def match_band_name(scraped_name, existing_bands):
-    """Match a scraped band name against existing DB bands (case-insensitive).
+    """Match a scraped band name against existing DB bands (see names.name_key).
 
+    ``existing_bands`` is a NameIndex (e.g. band_index(conn)) or a list of names.
     Returns the canonical DB name if found, otherwise the original scraped name.
     """
-    scraped_lower = scraped_name.lower().strip()
-    for db_name in existing_bands:
-        if db_name.lower() == scraped_lower:
-            return db_name
-    return scraped_name.strip()
+    if not isinstance(existing_bands, NameIndex):
+        existing_bands = NameIndex.from_names(existing_bands)
+    found = existing_bands.get(scraped_name)
+    return found[1] if found else scraped_name.strip()
 
 
 def match_venue_name(scraped_name, venue_names):
-    """Match a scraped venue name against existing DB venues (case-insensitive).
+    """Match a scraped venue name against existing DB venues (see names.name_key).
 
-    Returns (index_in_venue_names, canonical_name) if found, otherwise (None, scraped_name).
+    ``venue_names`` is a NameIndex (e.g. venue_index(conn), valued by venue id)
+    or a list of names, valued by position. Returns (value, canonical_name) if
+    found, otherwise (None, scraped_name).
     """
-    scraped_lower = scraped_name.lower().strip()
-    for i, db_name in enumerate(venue_names):
-        if db_name.lower() == scraped_lower:
-            return i, db_name
-    return None, scraped_name
+    if not isinstance(venue_names, NameIndex):
+        venue_names = NameIndex.from_names(venue_names)
+    return venue_names.get(scraped_name) or (None, scraped_name)
 
 
-def get_recent_upcoming_shows():
-    """Get upcoming_shows from the past week that haven't been added to shows yet.
+def venue_picker(choice_key, name_input_key):
+    """Type-ahead venue choice, kept in ``st.session_state[choice_key]``
 
-    Returns list of dicts with id, event_name, date, venue, matched_artist, price, url.
-    Excludes shows where a show already exists on the same date at a venue with a matching name.
+    Returns the chosen venue's name, "+ New Venue" once a name with no
+    match was picked (it pre-fills ``name_input_key``), or "" until then.
     """
-    conn = get_db()
-    cursor = conn.cursor()
+    def pick(venue_id, name):
+        if venue_id is None:
+            st.session_state[choice_key] = "+ New Venue"
+            st.session_state[name_input_key] = name
+        else:
+            st.session_state[choice_key] = name
 
-    # Check if table exists
-    cursor.execute(
-        "SELECT name FROM sqlite_master WHERE type='table' AND name='upcoming_shows'"
-    )
-    if not cursor.fetchone():
-        return []
-
-    today = datetime.now()
-    week_ago = (today - timedelta(days=7)).strftime("%Y-%m-%d")
-    today_str = today.strftime("%Y-%m-%d")
-
-    cursor.execute(
-        """SELECT u.id, u.event_name, u.date, u.venue, u.matched_artist, u.price, u.url
-           FROM upcoming_shows u
-           WHERE u.date >= ? AND u.date <= ?
-             AND (u.rsvp IS NULL OR u.rsvp NOT IN ('no', 'hidden'))
-             AND NOT EXISTS (
-               SELECT 1 FROM shows s
-               JOIN venues v ON s.venue_id = v.id
-               WHERE s.date = u.date AND LOWER(v.name) = LOWER(u.venue)
-             )
-           ORDER BY u.date DESC""",
-        [week_ago, today_str],
-    )
-    return cursor.fetchall()
-
-
-def get_or_create_venue(cursor, name, location=None):
-    """Get existing venue ID or create a new one."""
-    cursor.execute("SELECT id FROM venues WHERE name = ?", (name,))
-    row = cursor.fetchone()
-    if row:
-        return row['id']
-    cursor.execute("INSERT INTO venues (name, location) VALUES (?, ?)", (name, location))
-    return cursor.lastrowid
-
-def get_or_create_event(cursor, name):
-    """Get existing event ID or create a new one."""
-    cursor.execute("SELECT id FROM events WHERE name = ?", (name,))
-    row = cursor.fetchone()
-    if row:
-        return row['id']
-    cursor.execute("INSERT INTO events (name) VALUES (?)", (name,))
-    return cursor.lastrowid
-
-def get_or_create_band(cursor, name):
-    """Get existing band ID or create a new one."""
-    cursor.execute("SELECT id FROM bands WHERE name = ?", (name,))
-    row = cursor.fetchone()
-    if row:
-        return row['id']
-    cursor.execute("INSERT INTO bands (name) VALUES (?)", (name,))
-    return cursor.lastrowid
-
-def lookup_venue_address(venue_name):
-    """Look up venue address using Nominatim (OpenStreetMap)"""
-    import urllib.parse
-    import urllib.request
-    import json
-    import time
+    def change():
+        st.session_state[choice_key] = ""
 
-    try:
-        # URL encode the venue name
-        query = urllib.parse.quote(venue_name)
-        url = f"https://nominatim.openstreetmap.org/search?q={query}&format=json&limit=1"
+    venue = st.session_state.setdefault(choice_key, "")
+    if not venue:
+        type_ahead("Venue", venue_index(get_db()), f"{choice_key}_search", pick,
+                   placeholder="Type a venue name...", allow_new=True)
+    else:
+        col1, col2 = st.columns([5, 1])
+        with col1:
+            st.write("**New venue**" if venue == "+ New Venue" else f"**{venue}**")
+        with col2:
+            st.button("Change", key=f"{choice_key}_change", on_click=change)
+    return venue
 
-        # Add user agent (required by Nominatim)
-        req = urllib.request.Request(url, headers={'User-Agent': 'ShowsAttendedApp/1.0'})
+def event_picker(choice_key):
+    """Type-ahead event choice, kept in ``st.session_state[choice_key]``
 
-        # Rate limit: wait 1 second between requests
-        time.sleep(1)
+    Returns the event name (new or existing), or "" for no event.
+    """
+    def pick(_event_id, name):
+        st.session_state[choice_key] = name
+
+    def clear():
+        st.session_state[choice_key] = ""
+
+    event = st.session_state.setdefault(choice_key, "")
+    if not event:
+        type_ahead("Event", event_index(get_db()), f"{choice_key}_search", pick,
+                   placeholder="Type an event name...", allow_new=True)
+    else:
+        col1, col2 = st.columns([5, 1])
+        with col1:
+            st.write(f"**{event}**")
+        with col2:
+            st.button("✕", key=f"{choice_key}_clear", on_click=clear, help="No event")
+    return event
 
-        with urllib.request.urlopen(req, timeout=5) as response:
-            data = json.loads(response.read())
+def stored_venue_location(name):
+    """Stored location of an existing venue, or None"""
+    conn = get_db()
+    found = venue_index(conn).get(name)
+    return load_venue_location(conn, found[0]) if found else None
 
-            if data and len(data) > 0:
-                return data[0].get('display_name', '')
-    except Exception as e:
-        st.warning(f"Could not auto-lookup address: {e}")
+@st.fragment(run_every=0.5)
+def venue_address_lookup(venue_name, location_key, lookup_key):
+    """Poll the background geocoder until the address for ``venue_name`` arrives
 
-    return None
+    Fills the ``location_key`` input when found. Once the result is final,
+    ``lookup_key`` records the name and the dialog reruns without this
+    fragment, so polling stops; venue_address_warning() shows a miss.
+    """
+    result = get_geocoder().result(venue_name)
+    if result is None:
+        st.caption("🔍 Looking up address...")
+        return
+    st.session_state[lookup_key] = venue_name
+    if result.address:
+        st.session_state[location_key] = result.address
+    st.rerun()
+
+def venue_address_warning(venue_name):
+    """Warn if the finished lookup for ``venue_name`` found nothing or failed"""
+    result = get_geocoder().result(venue_name)
+    if result is None or result.address:
+        return
+    if result.error:
+        st.warning(f"Could not auto-lookup address: {result.error}")
+    else:
+        st.warning("Address not found. Please enter manually.")
+
+PAGE_SIZES = [25, 50, 100]
 
 # Main app
 col1, col2 = st.columns([4, 1])
@@ -383,26 +305,62 @@ with col2:
 with st.sidebar:
     st.header("Filters")
 
-    search = st.text_input("🔍 Search bands", placeholder="Type band name...")
+    search = st.text_input("🔍 Search shows", placeholder="Band, venue or event...")
 
-    years = ["All Years"] + load_years()
+    years = ["All Years"] + list(load_years(get_db()))
     year = st.selectbox("📅 Year", years)
 
+    page_size = st.selectbox("Shows per page", PAGE_SIZES, index=1)
+
     st.divider()
 
     # Quick stats (cached)
-    total_shows, total_bands, total_venues = get_sidebar_stats()
-    st.metric("Total Shows", total_shows)
-    st.metric("Bands Seen", total_bands)
-    st.metric("Venues", total_venues)
+    totals = overview(get_db())
+    st.metric("Total Shows", totals.shows)
+    st.metric("Bands Seen", totals.bands)
+    st.metric("Venues", totals.venues)
+
+    # Replica freshness (synced in the background by get_db())
+    db = get_db()
+    if db.sync_age is not None:
+        st.caption(f"Data synced {int(db.sync_age)}s ago")
+    if db.pending_commits:
+        st.caption(f"{db.pending_commits} change(s) waiting to sync")
+    if db.sync_failures:
+        st.caption(f"⚠️ Sync failing: {db.last_sync_error}")
+
+    with st.expander("Maintenance"):
+        st.caption("Deleting and editing shows already removes what they orphan.")
+        if st.button("Vacuum orphans", use_container_width=True):
+            try:
+                deleted = vacuum_orphans()
+                st.success(", ".join(f"{count} {table}" for table, count in deleted.items()) + " removed")
+            except Exception as e:
+                st.error(f"Error removing orphans: {e}")
 
 # Main content
-shows = load_shows(search, year)
+# Start again from the first page when filters change
+filter_key = f"{search}_{year}_{page_size}"
+if st.session_state.get("_shows_filter_key") != filter_key:
+    st.session_state["_shows_filter_key"] = filter_key
+    st.session_state["shows_pages_loaded"] = 1
+
+total_matching = count_shows(get_db(), search, year)
 
-if not shows:
+if not total_matching:
     st.info("No shows found. Try adjusting your filters.")
 else:
-    st.subheader(f"Showing {len(shows)} shows")
+    st.subheader(f"Showing {total_matching} shows")
+
+    # Keyset pagination: each page starts after the last (date, id) shown
+    shows = []
+    before = None
+    for _ in range(st.session_state["shows_pages_loaded"]):
+        page = load_shows(get_db(), search, year, limit=page_size, before=before)
+        shows.extend(page)
+        if len(page) < page_size:
+            break
+        before = (page[-1]['date'], page[-1]['id'])
 
     # Display shows
     for show in shows:
@@ -429,6 +387,12 @@ else:
                 if st.button("Edit", key=f"edit_{show['id']}", use_container_width=True):
                     st.session_state.editing_show_id = show['id']
 
+    if len(shows) < total_matching:
+        remaining = total_matching - len(shows)
+        if st.button(f"Load {min(page_size, remaining)} more ({remaining} remaining)", use_container_width=True):
+            st.session_state["shows_pages_loaded"] += 1
+            st.rerun()
+
 # Edit dialog
 if 'editing_show_id' in st.session_state:
     show_id = st.session_state.editing_show_id
@@ -438,25 +402,8 @@ if 'editing_show_id' in st.session_state:
         conn = get_db()
         cursor = conn.cursor()
 
-        # Load show data
-        cursor.execute("""
-            SELECT s.*, v.name as venue_name, v.id as venue_id, e.name as event_name, e.id as event_id
-            FROM shows s
-            JOIN venues v ON s.venue_id = v.id
-            LEFT JOIN events e ON s.event_id = e.id
-            WHERE s.id = ?
-        """, (show_id,))
-        show_data = cursor.fetchone()
-
-        # Load bands
-        cursor.execute("""
-            SELECT b.id, b.name, sb.band_order
-            FROM show_bands sb
-            JOIN bands b ON sb.band_id = b.id
-            WHERE sb.show_id = ?
-            ORDER BY sb.band_order
-        """, (show_id,))
-        show_bands = [row['name'] for row in cursor.fetchall()]
+        show_data = load_show(conn, show_id)
+        show_bands = list(load_lineup(conn, show_id))
 
         # Initialize edit bands in session state
         if f'edit_bands_{show_id}' not in st.session_state:
@@ -472,25 +419,12 @@ if 'editing_show_id' in st.session_state:
         # Bands
         st.subheader("Bands (in order)")
 
-        all_bands = get_all_bands()
+        def add_band(_band_id, name):
+            if name not in edit_bands:
+                edit_bands.append(name)
 
-        band_choice = st.selectbox("Add band", ["", "+ New Band"] + all_bands, key=f"band_select_{show_id}")
-
-        if band_choice == "+ New Band":
-            col1, col2 = st.columns([5, 1])
-            with col1:
-                new_band_name = st.text_input("Band name", key=f"new_band_input_{show_id}", placeholder="Type a new band name...")
-            with col2:
-                st.write("")
-                st.write("")
-                if st.button("Add", key=f"add_new_band_{show_id}"):
-                    if new_band_name and new_band_name not in edit_bands:
-                        edit_bands.append(new_band_name)
-                        st.rerun(scope="fragment")
-        elif band_choice:
-            if band_choice not in edit_bands:
-                edit_bands.append(band_choice)
-                st.rerun(scope="fragment")
+        type_ahead("Add band", band_index(conn), f"band_search_{show_id}", add_band,
+                   placeholder="Type a band name...", allow_new=True)
 
         # Display current bands
         if edit_bands:
@@ -522,13 +456,8 @@ if 'editing_show_id' in st.session_state:
         # Venue
         st.subheader("📍 Venue")
 
-        all_venues = get_all_venues()
-        venue_names = [v[0] for v in all_venues]
-        venue_options = ["+ New Venue"] + venue_names
-
-        # Adjust index since we added "+ New Venue" at the top
-        current_venue_idx = venue_names.index(show_data['venue_name']) + 1 if show_data['venue_name'] in venue_names else 0
-        venue = st.selectbox("Venue", venue_options, index=current_venue_idx)
+        st.session_state.setdefault(f'edit_venue_choice_{show_id}', show_data['venue_name'])
+        venue = venue_picker(f'edit_venue_choice_{show_id}', f'edit_venue_name_input_{show_id}')
 
         venue_name = venue
         venue_location = None
@@ -544,15 +473,16 @@ if 'editing_show_id' in st.session_state:
                 placeholder="e.g., The Sinclair Cambridge MA"
             )
 
-            # Auto-lookup when venue name changes and is long enough
+            # Auto-lookup (in the background) when venue name changes and is long enough
             if venue_name and len(venue_name) > 3 and venue_name != st.session_state[f'edit_last_venue_lookup_{show_id}']:
-                with st.spinner("Looking up address..."):
-                    looked_up = lookup_venue_address(venue_name)
-                    if looked_up:
-                        st.session_state[f'edit_venue_location_input_{show_id}'] = looked_up
-                        st.session_state[f'edit_last_venue_lookup_{show_id}'] = venue_name
-                        st.success(f"✓ Found address")
-                        st.rerun()
+                get_geocoder().request(venue_name, key=f"edit_venue_{show_id}")
+                venue_address_lookup(
+                    venue_name,
+                    f'edit_venue_location_input_{show_id}',
+                    f'edit_last_venue_lookup_{show_id}',
+                )
+            elif venue_name and len(venue_name) > 3:
+                venue_address_warning(venue_name)
 
             col1, col2 = st.columns([4, 1])
             with col1:
@@ -566,23 +496,17 @@ if 'editing_show_id' in st.session_state:
                 st.write("")
                 if st.button("🔍 Retry", key=f"lookup_btn_{show_id}", help="Re-lookup address"):
                     if venue_name:
-                        with st.spinner("Looking up address..."):
-                            looked_up = lookup_venue_address(venue_name)
-                            if looked_up:
-                                st.session_state[f'edit_venue_location_input_{show_id}'] = looked_up
-                                st.session_state[f'edit_last_venue_lookup_{show_id}'] = venue_name
-                                st.success("Address found!")
-                                st.rerun()
-                            else:
-                                st.warning("Address not found. Please enter manually.")
+                        get_geocoder().request(venue_name, key=f"edit_venue_{show_id}", refresh=True)
+                        st.session_state[f'edit_last_venue_lookup_{show_id}'] = ""
+                        st.rerun()
                     else:
                         st.warning("Enter venue name first")
 
-        elif venue and venue != "":
+        elif venue:
             # Show existing location
-            venue_data = [v for v in all_venues if v[0] == venue]
-            if venue_data and venue_data[0][1]:
-                st.caption(f"📍 {venue_data[0][1]}")
+            location = stored_venue_location(venue)
+            if location:
+                st.caption(f"📍 {location}")
             else:
                 st.caption("⚠️ No address on file")
 
@@ -591,20 +515,8 @@ if 'editing_show_id' in st.session_state:
         # Event
         st.subheader("🎉 Event (optional)")
 
-        all_events = get_all_events()
-        event_options = ["", "+ New Event"] + all_events
-
-        # Adjust index since we added "+ New Event" at position 1
-        current_event_idx = 0
-        if show_data['event_name'] and show_data['event_name'] in all_events:
-            current_event_idx = all_events.index(show_data['event_name']) + 2  # +2 because of "" and "+ New Event"
-
-        event = st.selectbox("Event (optional)", event_options, index=current_event_idx)
-
-        event_name = event if event and event != "+ New Event" and event != "" else None
-
-        if event == "+ New Event":
-            event_name = st.text_input("Event name", key=f"new_event_name_{show_id}")
+        st.session_state.setdefault(f'edit_event_choice_{show_id}', show_data['event_name'] or "")
+        event_name = event_picker(f'edit_event_choice_{show_id}') or None
 
         st.divider()
 
@@ -618,31 +530,44 @@ if 'editing_show_id' in st.session_state:
 
         with col2:
             if st.button("Save Changes", type="primary", use_container_width=True):
+                show_changed = (
+                    show_date.isoformat() != show_data['date']
+                    or venue_name != show_data['venue_name']
+                    or (event_name or None) != show_data['event_name']
+                )
+                lineup_changed = edit_bands != show_bands
+
                 # Validation
                 if not venue_name or not edit_bands:
                     st.error("Please fill in venue and at least one band")
                 elif venue == "+ New Venue" and not venue_location:
                     st.error("❌ Please fill in venue address (use 🔍 Lookup button or enter manually)")
+                elif not show_changed and not lineup_changed:
+                    # Nothing to write, so no commit or sync either
+                    st.info("No changes made")
+                    cleanup_edit_state(show_id)
+                    st.rerun()
                 else:
                     try:
-                        venue_id = get_or_create_venue(cursor, venue_name, venue_location)
-                        event_id = get_or_create_event(cursor, event_name) if event_name else None
-
-                        cursor.execute(
-                            "UPDATE shows SET date = ?, venue_id = ?, event_id = ? WHERE id = ?",
-                            (show_date.isoformat(), venue_id, event_id, show_id)
-                        )
-
-                        cursor.execute("DELETE FROM show_bands WHERE show_id = ?", (show_id,))
-                        for order, band_name in enumerate(edit_bands, 1):
-                            band_id = get_or_create_band(cursor, band_name)
+                        removed_band_ids = []
+                        if show_changed:
+                            venue_id = get_or_create_venue(cursor, venue_name, venue_location)
+                            event_id = get_or_create_event(cursor, event_name) if event_name else None
                             cursor.execute(
-                                "INSERT INTO show_bands (show_id, band_id, band_order) VALUES (?, ?, ?)",
-                                (show_id, band_id, order)
+                                "UPDATE shows SET date = ?, venue_id = ?, event_id = ? WHERE id = ?",
+                                (show_date.isoformat(), venue_id, event_id, show_id)
                             )
+                        if lineup_changed:
+                            removed_band_ids = update_lineup(cursor, show_id, edit_bands)
+
+                        delete_orphans(
+                            cursor,
+                            band_ids=removed_band_ids,
+                            venue_ids=[show_data['venue_id']] if show_changed else [],
+                            event_ids=[show_data['event_id']] if show_changed else [],
+                        )
 
                         conn.commit()
-                        clear_data_caches()
                         st.success("Show updated successfully!")
                         cleanup_edit_state(show_id)
                         st.rerun()
@@ -690,7 +615,7 @@ if 'adding_show' in st.session_state and st.session_state.adding_show:
             st.session_state.add_show_bands = []
 
         # Import from recent upcoming shows
-        recent = get_recent_upcoming_shows()
+        recent = get_recent_upcoming_shows(get_db())
         if recent:
             options = [""] + [
                 f"{r['date']} - {r['event_name']} @ {r['venue']}"
@@ -703,10 +628,14 @@ if 'adding_show' in st.session_state and st.session_state.adding_show:
                 if st.session_state.get('import_upcoming_id') != r['id']:
                     st.session_state['import_upcoming_id'] = r['id']
                     # Parse bands from event name and match against existing DB bands
-                    all_existing = get_all_bands()
+                    existing = band_index(get_db())
                     raw_bands = split_band_names(r['event_name'])
-                    bands = [match_band_name(b, all_existing) for b in raw_bands]
+                    bands = [match_band_name(b, existing) for b in raw_bands]
                     st.session_state.add_show_bands = bands
+                    # Pre-select the venue (normalized match), else start a new one
+                    venue_id, matched_venue = match_venue_name(r['venue'], venue_index(get_db()))
+                    st.session_state['add_venue_choice'] = matched_venue if venue_id is not None else "+ New Venue"
+                    st.session_state.pop('add_venue_name_input', None)
                     st.rerun()
 
             st.divider()
@@ -733,31 +662,18 @@ if 'adding_show' in st.session_state and st.session_state.adding_show:
         # Bands
         st.subheader("🎸 Bands (in order)")
 
-        all_bands = get_all_bands()
+        def add_band(_band_id, name):
+            if name not in st.session_state.add_show_bands:
+                st.session_state.add_show_bands.append(name)
 
-        band_choice = st.selectbox("Add band", ["", "+ New Band"] + all_bands, key="add_band_select")
-
-        if band_choice == "+ New Band":
-            col1, col2 = st.columns([5, 1])
-            with col1:
-                new_band_name = st.text_input("Band name", key="add_new_band_input", placeholder="Type a new band name...")
-            with col2:
-                st.write("")
-                st.write("")
-                if st.button("Add", key="add_new_band_btn"):
-                    if new_band_name and new_band_name not in st.session_state.add_show_bands:
-                        st.session_state.add_show_bands.append(new_band_name)
-                        st.rerun(scope="fragment")
-        elif band_choice:
-            if band_choice not in st.session_state.add_show_bands:
-                st.session_state.add_show_bands.append(band_choice)
-                st.rerun(scope="fragment")
+        type_ahead("Add band", band_index(get_db()), "add_band_search", add_band,
+                   placeholder="Type a band name...", allow_new=True)
 
         # Display current bands with new/existing indicators
         if st.session_state.add_show_bands:
-            existing_lower = {b.lower() for b in all_bands}
+            existing = band_index(get_db())
             for i, band in enumerate(st.session_state.add_show_bands):
-                is_existing = band.lower() in existing_lower
+                is_existing = band in existing
                 col1, col2, col3, col4, col5, col6 = st.columns([1, 5, 1, 1, 1, 1])
                 with col1:
                     st.write(f"**{i+1}.**")
@@ -782,6 +698,20 @@ if 'adding_show' in st.session_state and st.session_state.adding_show:
                     if st.button("✕", key=f"remove_add_band_{i}"):
                         st.session_state.add_show_bands.pop(i)
                         st.rerun(scope="fragment")
+                if not is_existing:
+                    # Offer close existing names before a duplicate gets created
+                    suggestions = existing.suggest(band, limit=3)
+                    if suggestions:
+                        cols = st.columns([1, 3, 3, 3])
+                        cols[0].caption("Did you mean")
+                        for j, suggestion in enumerate(suggestions):
+                            with cols[j + 1]:
+                                if st.button(f"{suggestion.name} ({suggestion.score:.0%})", key=f"suggest_add_band_{i}_{j}", use_container_width=True):
+                                    if suggestion.name in st.session_state.add_show_bands:
+                                        st.session_state.add_show_bands.pop(i)
+                                    else:
+                                        st.session_state.add_show_bands[i] = suggestion.name
+                                    st.rerun(scope="fragment")
         else:
             st.info("Add at least one band")
 
@@ -790,19 +720,12 @@ if 'adding_show' in st.session_state and st.session_state.adding_show:
         # Venue
         st.subheader("📍 Venue")
 
-        all_venues = get_all_venues()
-        venue_names = [v[0] for v in all_venues]
+        venue = venue_picker('add_venue_choice', 'add_venue_name_input')
 
-        # Pre-select venue if imported (case-insensitive match)
-        default_venue_idx = 0
-        if imported:
-            venue_idx, _matched_name = match_venue_name(imported['venue'], venue_names)
-            if venue_idx is not None:
-                default_venue_idx = venue_idx + 2  # +2 for "" and "+ New Venue"
-            else:
-                default_venue_idx = 1  # "+ New Venue"
-
-        venue = st.selectbox("Venue", ["", "+ New Venue"] + venue_names, index=default_venue_idx)
+        # Offer close matches for an imported venue that matched none
+        venue_suggestions = []
+        if imported and venue == "+ New Venue":
+            venue_suggestions = venue_index(get_db()).suggest(imported['venue'], limit=3)
 
         venue_name = venue
         venue_location = None
@@ -816,21 +739,27 @@ if 'adding_show' in st.session_state and st.session_state.adding_show:
             if imported and 'add_venue_name_input' not in st.session_state:
                 st.session_state['add_venue_name_input'] = imported['venue']
 
+            if venue_suggestions:
+                cols = st.columns([1, 3, 3, 3])
+                cols[0].caption("Did you mean")
+                for j, suggestion in enumerate(venue_suggestions):
+                    with cols[j + 1]:
+                        if st.button(f"{suggestion.name} ({suggestion.score:.0%})", key=f"suggest_add_venue_{j}", use_container_width=True):
+                            st.session_state['add_venue_choice'] = suggestion.name
+                            st.rerun(scope="fragment")
+
             venue_name = st.text_input(
                 "Venue name*",
                 key="add_venue_name_input",
                 placeholder="e.g., The Sinclair Cambridge MA"
             )
 
-            # Auto-lookup when venue name changes and is long enough
+            # Auto-lookup (in the background) when venue name changes and is long enough
             if venue_name and len(venue_name) > 3 and venue_name != st.session_state.last_venue_lookup:
-                with st.spinner("Looking up address..."):
-                    looked_up = lookup_venue_address(venue_name)
-                    if looked_up:
-                        st.session_state.add_venue_location_input = looked_up
-                        st.session_state.last_venue_lookup = venue_name
-                        st.success(f"✓ Found address")
-                        st.rerun()
+                get_geocoder().request(venue_name, key="add_venue")
+                venue_address_lookup(venue_name, "add_venue_location_input", "last_venue_lookup")
+            elif venue_name and len(venue_name) > 3:
+                venue_address_warning(venue_name)
 
             col1, col2 = st.columns([4, 1])
             with col1:
@@ -844,23 +773,17 @@ if 'adding_show' in st.session_state and st.session_state.adding_show:
                 st.write("")
                 if st.button("🔍 Retry", help="Re-lookup address"):
                     if venue_name:
-                        with st.spinner("Looking up address..."):
-                            looked_up = lookup_venue_address(venue_name)
-                            if looked_up:
-                                st.session_state.add_venue_location_input = looked_up
-                                st.session_state.last_venue_lookup = venue_name
-                                st.success("Address found!")
-                                st.rerun()
-                            else:
-                                st.warning("Address not found. Please enter manually.")
+                        get_geocoder().request(venue_name, key="add_venue", refresh=True)
+                        st.session_state.last_venue_lookup = ""
+                        st.rerun()
                     else:
                         st.warning("Enter venue name first")
 
-        elif venue and venue != "":
+        elif venue:
             # Show existing location
-            venue_data = [v for v in all_venues if v[0] == venue]
-            if venue_data and venue_data[0][1]:
-                st.caption(f"📍 {venue_data[0][1]}")
+            location = stored_venue_location(venue)
+            if location:
+                st.caption(f"📍 {location}")
             else:
                 st.caption("⚠️ No address on file")
 
@@ -869,13 +792,7 @@ if 'adding_show' in st.session_state and st.session_state.adding_show:
         # Event
         st.subheader("🎉 Event (optional)")
 
-        all_events = get_all_events()
-        event = st.selectbox("Event", ["", "+ New Event"] + all_events)
-
-        event_name = event if event and event != "+ New Event" and event != "" else None
-
-        if event == "+ New Event":
-            event_name = st.text_input("Event name")
+        event_name = event_picker('add_event_choice') or None
 
         st.divider()
 
@@ -906,13 +823,9 @@ if 'adding_show' in st.session_state and st.session_state.adding_show:
                                      (show_date.isoformat(), venue_id, event_id))
                         show_id = cursor.lastrowid
 
-                        for order, band_name in enumerate(st.session_state.add_show_bands, 1):
-                            band_id = get_or_create_band(cursor, band_name)
-                            cursor.execute("INSERT INTO show_bands (show_id, band_id, band_order) VALUES (?, ?, ?)",
-                                         (show_id, band_id, order))
+                        insert_lineup(cursor, show_id, st.session_state.add_show_bands)
 
                         conn.commit()
-                        clear_data_caches()
                         st.success("✅ Show added successfully!")
                         cleanup_add_state()
                         st.rerun()
@@ -0,0 +1,183 @@
+"""
+Geocoding backfill for venues missing a location or coordinates
+Lookups run on a small thread pool sharing one token bucket, so the pool
+overlaps network latency without exceeding the geocoder's rate limit; failed
+requests are retried with backoff. Results are written back in batched
+transactions, each of which is a checkpoint: a venue that has been filled in
+no longer needs a lookup and every answer is kept in geocode_cache, so an
+interrupted run picks up where it stopped. Run directly, or from the
+Venues page:
+
+    python backfill.py [--limit N] [--workers N] [--batch-size N] [--retry-misses]
+"""
+import argparse
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from geocode import GeocodeResult, TokenBucket, cached, fetch, normalize_query, store
+from queries import count_missing_locations
+
+
+def missing_venues(cursor):
+    """(id, name, location) of venues with no location or no coordinates."""
+    cursor.execute("SELECT id, name, location FROM venues WHERE location IS NULL OR lat IS NULL ORDER BY id")
+    return [(row['id'], row['name'], row['location']) for row in cursor.fetchall()]
+
+
+def venue_query(name, location):
+    """Search text for a venue: its name, qualified by the location if known."""
+    return f"{name}, {location}" if location else name
+
+
+def known_result(cursor, name, location):
+    """Cached result for a venue, or None if it still needs a lookup.
+
+    A venue added through the dialogs was looked up by name alone, so that
+    entry is reused when it produced the location on file.
+    """
+    result = cached(cursor, normalize_query(venue_query(name, location)))
+    if result is None and location:
+        by_name = cached(cursor, normalize_query(name))
+        if by_name is not None and by_name.address == location:
+            result = by_name
+    return result
+
+
+def resolve(query, fetch, bucket, retries=2, backoff=1.0):
+    """Look up ``query``, retrying failures with exponential backoff.
+
+    Never raises: a lookup that keeps failing returns a result with ``error``.
+    """
+    key = normalize_query(query)
+    for attempt in range(retries + 1):
+        bucket.acquire()
+        try:
+            found = fetch(query)
+        except Exception as e:
+            if attempt == retries:
+                return GeocodeResult(key, None, None, None, str(e))
+            time.sleep(backoff * 2 ** attempt)
+        else:
+            address, lat, lon = found or (None, None, None)
+            return GeocodeResult(key, address, lat, lon, None)
+
+
+def write_batch(conn, batch):
+    """Store a batch of (venue_id, result, is_new) in one transaction."""
+    new = [result for _venue_id, result, is_new in batch if is_new]
+    found = [(venue_id, result) for venue_id, result, _is_new in batch if result.address]
+    cursor = conn.cursor()
+    try:
+        for result in new:
+            store(cursor, result)
+        # Only set location where it's missing, so the venues triggers
+        # don't rewrite show_summary for a location that didn't change
+        cursor.executemany(
+            "UPDATE venues SET location = ? WHERE id = ? AND location IS NULL",
+            [(result.address, venue_id) for venue_id, result in found],
+        )
+        cursor.executemany(
+            "UPDATE venues SET lat = ?, lon = ? WHERE id = ?",
+            [(result.lat, result.lon, venue_id) for venue_id, result in found],
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def backfill(conn, fetch=fetch, bucket=None, workers=4, batch_size=20,
+             retries=2, backoff=1.0, retry_misses=False, limit=None, progress=None):
+    """Fill in location and coordinates for venues missing them.
+
+    Venues already answered in geocode_cache are written without a lookup;
+    ones the cache knows have no match are skipped unless ``retry_misses``.
+    ``limit`` caps the venues looked up or written; skipped ones don't count
+    towards it, so repeated limited runs work through the whole list rather
+    than stopping at the same cached misses.
+    ``progress(done, total)`` is called as venues are resolved. Returns a
+    Counter of venues ``found``, ``not_found``, ``skipped`` and ``failed``.
+    """
+    bucket = bucket or TokenBucket()
+    counts = Counter()
+    cursor = conn.cursor()
+    batch = []
+    todo = []
+    total = 0
+    for venue_id, name, location in missing_venues(cursor):
+        if limit is not None and len(todo) + len(batch) >= limit:
+            break
+        total += 1
+        known = known_result(cursor, name, location)
+        if known is None or (known.address is None and retry_misses):
+            todo.append((venue_id, venue_query(name, location)))
+        elif known.address is None:
+            counts["skipped"] += 1
+        else:
+            counts["found"] += 1
+            batch.append((venue_id, known, False))
+    if batch:
+        write_batch(conn, batch)
+        batch = []
+    if progress:
+        progress(total - len(todo), total)
+
+    done = total - len(todo)
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="backfill")
+    try:
+        futures = {
+            pool.submit(resolve, query, fetch, bucket, retries, backoff): venue_id
+            for venue_id, query in todo
+        }
+        for future in as_completed(futures):
+            result = future.result()
+            done += 1
+            if result.error:
+                # Not stored, so the next run tries again
+                counts["failed"] += 1
+            else:
+                counts["found" if result.address else "not_found"] += 1
+                batch.append((futures[future], result, True))
+                if len(batch) >= batch_size:
+                    full, batch = batch, []
+                    write_batch(conn, full)
+            if progress:
+                progress(done, total)
+    finally:
+        # On interruption, keep what has been resolved so far
+        pool.shutdown(wait=False, cancel_futures=True)
+        if batch:
+            write_batch(conn, batch)
+    return counts
+
+
+if __name__ == "__main__":
+    from db import get_db
+    from geocode import geocoder_settings, settings_fetch
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--limit", type=int, help="at most this many venues looked up or filled")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=20, help="venues per write transaction")
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--retry-misses", action="store_true", help="look up cached misses again")
+    args = parser.parse_args()
+
+    settings = geocoder_settings()
+    conn = get_db()
+    counts = backfill(
+        conn,
+        fetch=settings_fetch(settings),
+        bucket=TokenBucket(rate=settings.get("rate", 1.0)),
+        workers=args.workers,
+        batch_size=args.batch_size,
+        retries=args.retries,
+        retry_misses=args.retry_misses,
+        limit=args.limit,
+        progress=lambda done, total: print(f"\r{done}/{total}", end="", flush=True),
+    )
+    print()
+    print(", ".join(f"{counts[key]} {key.replace('_', ' ')}" for key in ("found", "not_found", "skipped", "failed")))
+    print(f"{count_missing_locations(conn)} venues still missing a location or coordinates")
+    raise SystemExit(1 if counts["failed"] else 0)
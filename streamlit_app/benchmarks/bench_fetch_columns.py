@@ -0,0 +1,106 @@
+"""
+Benchmark: Cursor.fetch_columns() vs Cursor.fetchall()
+Builds a synthetic shows-like table in memory and times fetching it, then
+fetching plus a per-year aggregation, both ways. Run from streamlit_app/:
+
+    python benchmarks/bench_fetch_columns.py --rows 100000
+"""
+import argparse
+import sqlite3
+import sys
+import timeit
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+from db import Cursor
+
+
+def make_db(n):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""
+        CREATE TABLE shows (
+            id INTEGER PRIMARY KEY, year INTEGER, venue_id INTEGER,
+            band_count INTEGER, price REAL
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO shows (year, venue_id, band_count, price) VALUES (?, ?, ?, ?)",
+        ((2000 + i % 25, i % 500, 1 + i % 6, 10.0 + i % 40) for i in range(n)),
+    )
+    return conn
+
+
+QUERY = "SELECT id, year, venue_id, band_count, price FROM shows"
+
+
+def rows_fetch(conn):
+    return Cursor(conn.cursor()).execute(QUERY).fetchall()
+
+
+def columns_fetch(conn, numpy=False):
+    return Cursor(conn.cursor()).execute(QUERY).fetch_columns(numpy=numpy)
+
+
+def rows_aggregate(conn):
+    rows = rows_fetch(conn)
+    bands_per_year = Counter()
+    for row in rows:
+        bands_per_year[row['year']] += row['band_count']
+    return dict(bands_per_year), sum(row['price'] for row in rows)
+
+
+def columns_aggregate(conn):
+    """Same totals with vector operations on the NumPy columns."""
+    import numpy as np
+
+    cols = columns_fetch(conn, numpy=True)
+    first = int(cols['year'].min())
+    totals = np.bincount(cols['year'] - first, weights=cols['band_count'])
+    bands_per_year = {first + i: int(total) for i, total in enumerate(totals) if total}
+    return bands_per_year, float(cols['price'].sum())
+
+
+def memory_of(fn, conn):
+    tracemalloc.start()
+    result = fn(conn)
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    conn = make_db(args.rows)
+    try:
+        expected, price = rows_aggregate(conn)
+        got, got_price = columns_aggregate(conn)
+        assert expected == got and abs(price - got_price) < 1e-6 * price
+    except ImportError:
+        pass
+
+    cases = [
+        ("fetchall", rows_fetch),
+        ("fetch_columns", columns_fetch),
+        ("fetch_columns(numpy)", lambda c: columns_fetch(c, numpy=True)),
+        ("fetchall + aggregate", rows_aggregate),
+        ("fetch_columns(numpy) + aggregate", columns_aggregate),
+    ]
+    print(f"{args.rows} rows, best of {args.repeat}")
+    print(f"{'case':<34} {'ms':>8} {'memory MB':>10}")
+    for label, fn in cases:
+        try:
+            seconds = min(timeit.repeat(lambda: fn(conn), number=1, repeat=args.repeat))
+        except ImportError:
+            print(f"{label:<34} {'skipped (no numpy)':>19}")
+            continue
+        print(f"{label:<34} {seconds * 1000:>8.1f} {memory_of(fn, conn) / 2**20:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Benchmark: every query in queries.py, and the show write paths
+Times each case against a database from synthetic.py, with the query cache
+cleared before every run so each one reaches the database, and reports the
+p50/p95 of --repeat runs. Without a path, a synthetic database of --scale
+shows is generated in memory first. Run from streamlit_app/:
+
+    python synthetic.py /tmp/shows-50k.db --scale 50k
+    python benchmarks/bench_queries.py /tmp/shows-50k.db --json after.json --compare before.json
+
+The write cases add, edit and delete one show per run, so the database
+ends up as it started (apart from AUTOINCREMENT counters).
+"""
+import argparse
+import functools
+import json
+import math
+import platform
+import sqlite3
+import sys
+import time
+from datetime import date
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+import queries
+from db import connect
+from migrations import migrate
+from queries import (
+    delete_show, get_or_create_event, get_or_create_venue, insert_lineup, update_lineup,
+)
+from synthetic import SCALES, generate
+
+
+def percentile(times, p):
+    """Nearest-rank percentile of sorted ``times``."""
+    return times[max(0, math.ceil(p / 100 * len(times)) - 1)]
+
+
+def sample(conn):
+    """Arguments for the cases, taken from the data: the most seen band and
+    venue, the busiest year, the longest word of each one's name to search
+    for, and where the second page of shows starts."""
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT b.id, b.name FROM band_stats t JOIN bands b ON b.id = t.band_id"
+        " ORDER BY t.show_count DESC LIMIT 1"
+    )
+    band = cursor.fetchone()
+    cursor.execute(
+        "SELECT v.id, v.name FROM venue_stats t JOIN venues v ON v.id = t.venue_id"
+        " ORDER BY t.show_count DESC LIMIT 1"
+    )
+    venue = cursor.fetchone()
+    cursor.execute("SELECT year FROM year_stats ORDER BY show_count DESC LIMIT 1")
+    year = cursor.fetchone()[0]
+    cursor.execute("SELECT name FROM events ORDER BY id LIMIT 1")
+    event = cursor.fetchone()
+    page = queries.load_shows.uncached(conn, limit=50)
+    return {
+        "band_id": band['id'],
+        "band_name": band['name'],
+        "venue_id": venue['id'],
+        "venue_name": venue['name'],
+        "event_name": event['name'] if event else None,
+        "year": year,
+        # A flyer's spelling the index has no exact match for
+        "suggest": f"{band['name']} (RU)",
+        "search": max(band['name'].split(), key=len).lower(),
+        "venue_search": max(venue['name'].split(), key=len).lower(),
+        "before": (page[-1]['date'], page[-1]['id']),
+    }
+
+
+def query_cases(args):
+    search, year = args["search"], args["year"]
+    # Built once, outside the timed runs, as the add dialog reuses it
+    built_band_index = functools.lru_cache(maxsize=1)(queries.band_index.uncached)
+    return [
+        ("load_shows page", lambda c: queries.load_shows(c, limit=50)),
+        ("load_shows page 2", lambda c: queries.load_shows(c, limit=50, before=args["before"])),
+        ("load_shows search", lambda c: queries.load_shows(c, search, limit=50)),
+        ("load_shows year", lambda c: queries.load_shows(c, year=year, limit=50)),
+        ("load_shows search+year", lambda c: queries.load_shows(c, search, year, limit=50)),
+        ("load_shows all", lambda c: queries.load_shows(c)),
+        ("count_shows", lambda c: queries.count_shows(c)),
+        ("count_shows search", lambda c: queries.count_shows(c, search)),
+        ("load_years", queries.load_years),
+        ("overview", queries.overview),
+        ("load_bands", lambda c: queries.load_bands(c)),
+        ("load_bands search", lambda c: queries.load_bands(c, search, sort_by="relevance")),
+        ("load_bands by name", lambda c: queries.load_bands(c, min_shows=2, sort_by="name")),
+        ("load_band_shows", lambda c: queries.load_band_shows(c, args["band_id"])),
+        ("load_band_groups", queries.load_band_groups),
+        ("load_venues", lambda c: queries.load_venues(c)),
+        ("load_venues search", lambda c: queries.load_venues(c, args["venue_search"], sort_by="relevance")),
+        ("load_venue_shows", lambda c: queries.load_venue_shows(c, args["venue_id"])),
+        ("get_shows_by_year", queries.get_shows_by_year),
+        ("get_top_bands", queries.get_top_bands),
+        ("get_top_venues", queries.get_top_venues),
+        ("get_events_stats", queries.get_events_stats),
+        ("get_recent_upcoming_shows", queries.get_recent_upcoming_shows),
+        ("load_upcoming_shows", lambda c: queries.load_upcoming_shows(c)),
+        ("band_index", queries.band_index),
+        ("venue_index", queries.venue_index),
+        ("band_index suggest", lambda c: built_band_index(c).suggest(args["suggest"], limit=3)),
+    ]
+
+
+def time_query(conn, fn, repeat):
+    """Run ``fn(conn)`` once to warm up, then ``repeat`` times cold."""
+    result = fn(conn)
+    times = []
+    for _ in range(repeat):
+        queries.clear_cache()
+        start = time.perf_counter()
+        fn(conn)
+        times.append(time.perf_counter() - start)
+    try:
+        rows = len(result)
+    except TypeError:
+        rows = 1
+    return times, rows
+
+
+def time_writes(conn, args, repeat):
+    """Add, edit and delete a show ``repeat`` times the way the dialogs do.
+
+    Each lineup has the top band, a new band and an opener; the edit swaps
+    the order and the delete removes the new bands again as orphans.
+    """
+    times = {"add_show": [], "edit_lineup": [], "delete_show": []}
+    today = date.today().isoformat()
+    cursor = conn.cursor()
+    for i in range(repeat + 1):
+        lineup = [args["band_name"], f"Benchmark Band {i}", "Benchmark Opener"]
+
+        start = time.perf_counter()
+        venue_id = get_or_create_venue(cursor, args["venue_name"])
+        event_id = get_or_create_event(cursor, args["event_name"]) if args["event_name"] else None
+        cursor.execute(
+            "INSERT INTO shows (date, venue_id, event_id) VALUES (?, ?, ?)",
+            (today, venue_id, event_id),
+        )
+        show_id = cursor.lastrowid
+        insert_lineup(cursor, show_id, lineup)
+        conn.commit()
+        added = time.perf_counter()
+
+        update_lineup(cursor, show_id, lineup[::-1])
+        conn.commit()
+        edited = time.perf_counter()
+
+        delete_show(cursor, show_id)
+        conn.commit()
+        deleted = time.perf_counter()
+
+        if i:  # the first round warms up
+            times["add_show"].append(added - start)
+            times["edit_lineup"].append(edited - added)
+            times["delete_show"].append(deleted - edited)
+    return times
+
+
+def summarize(times, rows):
+    times = sorted(times)
+    return {
+        "p50_ms": percentile(times, 50) * 1000,
+        "p95_ms": percentile(times, 95) * 1000,
+        "min_ms": times[0] * 1000,
+        "max_ms": times[-1] * 1000,
+        "rows": rows,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("path", nargs="?", help="database from synthetic.py (default: generate one in memory)")
+    parser.add_argument("--scale", choices=SCALES, default="1k", help="size of the in-memory database")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--only", help="run only cases whose name contains this text")
+    parser.add_argument("--no-writes", action="store_true", help="skip the write cases")
+    parser.add_argument("--json", help="write the results to this file ('-' for stdout)")
+    parser.add_argument("--compare", help="results file from an earlier run to compare against")
+    args = parser.parse_args()
+
+    if args.path:
+        conn = connect("sqlite", path=args.path)
+        migrate(conn)
+    else:
+        conn = connect("memory")
+        generate(conn, SCALES[args.scale])
+    data = sample(conn)
+    shows = queries.count_shows(conn)
+
+    results = {}
+    for name, fn in query_cases(data):
+        if args.only and args.only not in name:
+            continue
+        times, rows = time_query(conn, fn, args.repeat)
+        results[name] = summarize(times, rows)
+    if not args.no_writes:
+        for name, times in time_writes(conn, data, args.repeat).items():
+            if not args.only or args.only in name:
+                results[name] = summarize(times, 1)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["cases"]
+
+    out = sys.stderr if args.json == "-" else sys.stdout
+    print(f"{args.path or 'memory'}: {shows} shows, {args.repeat} runs per case", file=out)
+    header = f"{'case':<28} {'p50 ms':>9} {'p95 ms':>9} {'rows':>8}"
+    print(header + (f" {'p50 before':>11} {'change':>8}" if baseline else ""), file=out)
+    for name, result in results.items():
+        line = f"{name:<28} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['rows']:>8}"
+        if name in baseline:
+            before = baseline[name]["p50_ms"]
+            line += f" {before:>11.2f} {result['p50_ms'] / before:>7.2f}x"
+        print(line, file=out)
+
+    if args.json:
+        report = {
+            "database": args.path or f"memory ({args.scale})",
+            "shows": shows,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "cases": results,
+        }
+        if args.json == "-":
+            json.dump(report, sys.stdout, indent=2)
+            print()
+        else:
+            with open(args.json, "w") as f:
+                json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
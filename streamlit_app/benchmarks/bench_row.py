@@ -0,0 +1,91 @@
+"""
+Benchmark: db.Row vs the previous dict-backed Row
+Measures construction time and retained memory for a result set shaped like
+load_shows() (6 columns). Run from streamlit_app/:
+
+    python benchmarks/bench_row.py --rows 100000
+"""
+import argparse
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+from db import Row, RowSchema
+
+
+class LegacyRow:
+    """The Row class db.py used before rows shared a RowSchema."""
+    def __init__(self, columns, values):
+        self._columns = columns
+        self._values = values
+        self._dict = dict(zip(columns, values))
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self._values[key]
+        return self._dict[key]
+
+    def keys(self):
+        return self._columns
+
+
+DESCRIPTION = [(name,) for name in
+               ("id", "date", "venue_name", "venue_location", "event", "all_bands")]
+
+
+def make_values(n):
+    return [
+        (i, f"20{i % 25:02d}-06-01", f"Venue {i % 500}", f"City {i % 50}",
+         None if i % 7 else f"Fest {i % 30}", f"Band {i}, Band {i + 1}, Band {i + 2}")
+        for i in range(n)
+    ]
+
+
+def build_legacy(values):
+    # Old Cursor.fetchall(): one columns list per call, one dict per row
+    columns = [desc[0] for desc in DESCRIPTION]
+    return [LegacyRow(columns, v) for v in values]
+
+
+def build_compact(values):
+    schema = RowSchema.from_description(DESCRIPTION)
+    return [Row(schema, v) for v in values]
+
+
+def measure_memory(build, values):
+    tracemalloc.start()
+    rows = build(values)
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    values = make_values(args.rows)
+    print(f"{args.rows} rows, best of {args.repeat}")
+    print(f"{'class':<10} {'build ms':>10} {'lookup ms':>10} {'memory MB':>10}")
+    results = {}
+    for label, build in (("legacy", build_legacy), ("compact", build_compact)):
+        build_s = min(timeit.repeat(lambda: build(values), number=1, repeat=args.repeat))
+        rows = build(values)
+        lookup_s = min(timeit.repeat(
+            lambda: [(r["id"], r["venue_name"], r[5]) for r in rows],
+            number=1, repeat=args.repeat,
+        ))
+        memory = measure_memory(build, values)
+        results[label] = (build_s, memory)
+        print(f"{label:<10} {build_s * 1000:>10.1f} {lookup_s * 1000:>10.1f} {memory / 2**20:>10.1f}")
+
+    (legacy_s, legacy_mem), (compact_s, compact_mem) = results["legacy"], results["compact"]
+    print(f"compact builds {legacy_s / compact_s:.1f}x faster using {legacy_mem / compact_mem:.1f}x less memory")
+
+
+if __name__ == "__main__":
+    main()
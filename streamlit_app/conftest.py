@@ -0,0 +1,25 @@
+"""
+pytest configuration
+Tests that import app.py run the page script, which calls get_db(). Default
+to the in-memory backend so they never touch the Turso database.
+
+``conn`` is a migrated in-memory database of a test's own. Test modules that
+need data override it, taking this one and seeding it.
+"""
+import os
+
+import pytest
+
+os.environ.setdefault("SHOWS_DB_BACKEND", "memory")
+
+
+@pytest.fixture
+def conn():
+    from db import connect
+    from migrations import migrate
+    from queries import clear_cache
+
+    clear_cache()
+    conn = connect("memory")
+    migrate(conn)
+    return conn
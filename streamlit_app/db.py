@@ -2,35 +2,138 @@
 Database connection module for Turso
 Uses libsql_experimental SDK (libsql-client is deprecated and hangs
 on regional Turso URLs).
+
+For offline work and benchmarks the same interface can run on a plain
+SQLite file or an in-memory database (see get_db()).
 """
+import itertools
+import os
+import random
+import re
+import sqlite3
+import threading
 import time
+from array import array
 
 import streamlit as st
 import libsql_experimental as libsql
 
+from migrations import migrate
+
+REPLICA_PATH = "shows-attended"
+SQLITE_PATH = "shows-attended-local.db"
+BACKENDS = ("libsql", "sqlite", "memory")
+
+
+class RowSchema:
+    """Column names and name -> index map shared by every Row of a result set."""
+    __slots__ = ("columns", "index")
+
+    def __init__(self, columns):
+        self.columns = tuple(columns)
+        self.index = {name: i for i, name in enumerate(self.columns)}
+
+    @classmethod
+    def from_description(cls, description):
+        return cls(desc[0] for desc in description)
+
 
 class Row:
-    """Wrapper to provide dict-like access to row data"""
-    def __init__(self, columns, values):
-        self._columns = columns
+    """Tuple-backed row with dict-like access by column name or position"""
+    __slots__ = ("_schema", "_values")
+
+    def __init__(self, schema, values):
+        self._schema = schema
         self._values = values
-        self._dict = dict(zip(columns, values))
 
     def __getitem__(self, key):
-        if isinstance(key, int):
-            return self._values[key]
-        return self._dict[key]
+        if isinstance(key, str):
+            return self._values[self._schema.index[key]]
+        return self._values[key]
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __eq__(self, other):
+        if isinstance(other, Row):
+            return self._schema.columns == other._schema.columns and self._values == other._values
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self._schema.columns, self._values))
+
+    def __repr__(self):
+        return f"Row({dict(zip(self._schema.columns, self._values))!r})"
+
+    def keys(self):
+        return list(self._schema.columns)
+
+
+class Columns:
+    """Column-oriented result set from Cursor.fetch_columns().
+
+    ``names`` lists the columns in select order; ``columns[name]`` holds that
+    column's values as an ``array('q')`` (all integers), ``array('d')`` (all
+    numbers), a NumPy array (numeric, when requested) or a plain list.
+    """
+    __slots__ = ("names", "columns", "length")
+
+    def __init__(self, names, columns, length):
+        self.names = names
+        self.columns = columns
+        self.length = length
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        return iter(self.names)
 
     def keys(self):
-        return self._columns
+        return list(self.names)
+
+
+def _to_column(values, use_numpy):
+    """Pack one column into the most compact container that fits its values.
+
+    array() checks each value's type in C as it copies, so the column is
+    packed as integers and falls back to floats, then to a list, on the
+    first value that doesn't fit, instead of scanning the column first.
+    """
+    for typecode in ("q", "d"):
+        try:
+            column = array(typecode, values)
+        except (TypeError, OverflowError):
+            continue
+        if use_numpy:
+            import numpy as np
+            # Shares the array's buffer rather than copying it
+            return np.frombuffer(column, dtype=np.int64 if typecode == "q" else np.float64)
+        return column
+    return list(values)
 
 
 class Cursor:
-    """Wrapper that adds dict-like Row access to libsql cursors."""
+    """Wrapper that adds dict-like Row access to libsql cursors.
+
+    Iterating a cursor (or calling stream()) pulls rows from the driver
+    ``arraysize`` at a time, so large results never have to be held in
+    memory at once.
+    """
+    arraysize = 500
+
     def __init__(self, raw_cursor):
         self._cursor = raw_cursor
+        self._schema = None
 
     def execute(self, query, params=None):
+        self._schema = None
         if params:
             # libsql_experimental requires tuples, not lists
             self._cursor.execute(query, tuple(params))
@@ -38,58 +141,669 @@ class Cursor:
             self._cursor.execute(query)
         return self
 
+    def executemany(self, query, seq_of_params):
+        self._schema = None
+        self._cursor.executemany(query, [tuple(params) for params in seq_of_params])
+        return self
+
+    @property
+    def schema(self):
+        """RowSchema for the current result set (built once per execute)."""
+        if self._schema is None:
+            self._schema = RowSchema.from_description(self._cursor.description)
+        return self._schema
+
     def fetchone(self):
         row = self._cursor.fetchone()
         if row is None:
             return None
-        columns = [desc[0] for desc in self._cursor.description]
-        return Row(columns, row)
+        return Row(self.schema, row)
 
     def fetchall(self):
         rows = self._cursor.fetchall()
         if not rows:
             return []
-        columns = [desc[0] for desc in self._cursor.description]
-        return [Row(columns, row) for row in rows]
+        schema = self.schema
+        return [Row(schema, row) for row in rows]
+
+    def fetchmany(self, size=None):
+        """Fetch the next ``size`` rows (default ``arraysize``); [] when exhausted."""
+        rows = self._cursor.fetchmany(size or self.arraysize)
+        if not rows:
+            return []
+        schema = self.schema
+        return [Row(schema, row) for row in rows]
+
+    def stream(self, batch_size=None):
+        """Yield the remaining rows as lists of up to ``batch_size`` Rows."""
+        while True:
+            batch = self.fetchmany(batch_size)
+            if not batch:
+                return
+            yield batch
+
+    def __iter__(self):
+        for batch in self.stream():
+            yield from batch
+
+    def fetch_columns(self, numpy=False):
+        """Fetch the remaining rows column-wise, without building a Row per record.
+
+        Numeric columns come back as ``array`` objects (NumPy arrays with
+        ``numpy=True``); text or mixed columns as lists. See Columns.
+        """
+        names = self.schema.columns
+        rows = self._cursor.fetchall()
+        if not rows:
+            return Columns(names, {name: [] for name in names}, 0)
+        transposed = zip(*rows)
+        columns = {name: _to_column(values, numpy) for name, values in zip(names, transposed)}
+        return Columns(names, columns, len(rows))
 
     @property
     def lastrowid(self):
         return self._cursor.lastrowid
 
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+
+class ReplicaSyncer:
+    """Background thread that keeps the embedded replica in sync with Turso.
+
+    Syncs every ``interval`` seconds plus up to ``jitter`` seconds of random
+    spread. After a failed sync the wait doubles (capped at ``max_backoff``)
+    until a sync succeeds again. Reads never wait on this thread; they always
+    hit the local replica, which is at most ``sync_age`` seconds old.
+
+    In write-behind mode commits call ``note_commit()`` instead of syncing.
+    The worker waits ``commit_delay`` seconds so a burst of commits is pushed
+    by a single sync; ``flush()`` is the barrier for callers that need it now.
+    """
+    def __init__(self, conn, interval=60, jitter=10, max_backoff=600, commit_delay=0.5):
+        self._conn = conn
+        self.interval = interval
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.commit_delay = commit_delay
+
+        self.last_sync = None
+        self.last_sync_duration = None
+        self.last_error = None
+        self.consecutive_failures = 0
+        self.total_failures = 0
+
+        # Commit sequence numbers: everything <= _synced_seq has been synced
+        self._commit_seq = 0
+        self._synced_seq = 0
+        self._seq_lock = threading.Lock()
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="replica-syncer", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        self.flush()
+
+    def sync(self):
+        """Sync now on the calling thread. Returns True on success."""
+        with self._lock:
+            target_seq = self._commit_seq
+            started = time.monotonic()
+            try:
+                self._conn.sync()
+            except Exception as e:
+                self.last_error = e
+                self.consecutive_failures += 1
+                self.total_failures += 1
+                return False
+            finally:
+                self.last_sync_duration = time.monotonic() - started
+            self.last_sync = time.time()
+            self.last_error = None
+            self.consecutive_failures = 0
+            with self._seq_lock:
+                self._synced_seq = max(self._synced_seq, target_seq)
+            return True
+
+    def request_sync(self):
+        """Ask the worker to sync as soon as possible without waiting for it."""
+        self._wake.set()
+
+    def note_commit(self):
+        """Record a local commit that the worker still has to sync."""
+        with self._seq_lock:
+            self._commit_seq += 1
+        self._wake.set()
+
+    def flush(self):
+        """Block until every commit noted so far is synced. Returns True on success."""
+        if not self.pending_commits:
+            return True
+        return self.sync()
+
+    @property
+    def pending_commits(self):
+        """Commits made locally that have not been synced yet."""
+        with self._seq_lock:
+            return self._commit_seq - self._synced_seq
+
+    @property
+    def sync_age(self):
+        """Seconds since the last successful sync (None if never synced)."""
+        if self.last_sync is None:
+            return None
+        return time.time() - self.last_sync
+
+    def next_delay(self):
+        """Seconds to wait before the next background sync."""
+        if self.consecutive_failures:
+            delay = min(self.interval * 2 ** self.consecutive_failures, self.max_backoff)
+        elif self.pending_commits:
+            return self.commit_delay
+        else:
+            delay = self.interval
+        return delay + random.uniform(0, self.jitter)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            woken = self._wake.wait(self.next_delay())
+            self._wake.clear()
+            if self._stopped.is_set():
+                break
+            if woken and self.pending_commits and not self.consecutive_failures:
+                # Let the rest of a burst of commits land before syncing
+                self._stopped.wait(self.commit_delay)
+            self.sync()
+
 
 class Connection:
     """Wrapper that returns dict-like Row cursors."""
-    def __init__(self, conn):
+    def __init__(self, conn, syncer=None, write_behind=False):
         self._conn = conn
-        self._last_sync = time.time()
-
-    def sync_if_stale(self, max_age_seconds=60):
-        """Sync from remote if the local replica is older than max_age_seconds."""
-        now = time.time()
-        if now - self._last_sync > max_age_seconds:
-            self._conn.sync()
-            self._last_sync = now
+        self.syncer = syncer
+        self.write_behind = write_behind and syncer is not None
+        self._version = 0
+        self._version_lock = threading.Lock()
 
     def cursor(self):
-        self.sync_if_stale()
         return Cursor(self._conn.cursor())
 
-    def commit(self):
-        self._conn.commit()
+    def sync(self):
+        """Pull the latest frames from the remote into the local replica."""
+        if self.syncer:
+            return self.syncer.sync()
         self._conn.sync()
-        self._last_sync = time.time()
+        return True
+
+    def commit(self, invalidate=True):
+        """Commit, move data_version and sync (or queue a write-behind sync).
+
+        ``invalidate=False`` is for writes no cached query reads, such as
+        geocode_cache: the version stays put and no blocking sync is run.
+        """
+        self._conn.commit()
+        if not invalidate:
+            if self.write_behind:
+                self.syncer.note_commit()
+            return
+        self.bump_data_version()
+        if self.write_behind:
+            self.syncer.note_commit()
+        else:
+            self.sync()
+
+    def bump_data_version(self):
+        with self._version_lock:
+            self._version += 1
+
+    @property
+    def data_version(self):
+        """Token that changes whenever committed data may have changed."""
+        return self._version
+
+    def flush(self):
+        """Wait until all write-behind commits are synced. Returns True on success."""
+        if self.syncer:
+            return self.syncer.flush()
+        return True
 
     def rollback(self):
         self._conn.rollback()
 
+    @property
+    def sync_age(self):
+        return self.syncer.sync_age if self.syncer else None
+
+    @property
+    def last_sync_duration(self):
+        return self.syncer.last_sync_duration if self.syncer else None
+
+    @property
+    def sync_failures(self):
+        return self.syncer.consecutive_failures if self.syncer else 0
+
+    @property
+    def last_sync_error(self):
+        return self.syncer.last_error if self.syncer else None
+
+    @property
+    def pending_commits(self):
+        return self.syncer.pending_commits if self.syncer else 0
+
+
+class PoolTimeout(TimeoutError):
+    """Raised when no pooled connection frees up within the checkout timeout."""
+
+
+READ_STATEMENTS = ("SELECT", "WITH", "EXPLAIN", "VALUES")
+
+# A WITH clause can front an INSERT, UPDATE or DELETE as well as a SELECT
+WRITE_KEYWORDS = re.compile(r"\b(INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE)
+
+
+def is_read_only(query):
+    """True if the statement only reads (safe to run on a reader connection)."""
+    words = query.lstrip().split(None, 1)
+    if not words or words[0].upper() not in READ_STATEMENTS:
+        return False
+    # Err towards the writer: a keyword inside a string literal only costs
+    # a writer checkout
+    return words[0].upper() != "WITH" or not WRITE_KEYWORDS.search(query)
+
+
+class PooledCursor(Cursor):
+    """Cursor that runs reads on a pooled reader and writes on the writer.
+
+    The reader is checked out on the first read and returned when the cursor
+    is closed or garbage collected. Once the calling thread holds the writer,
+    every statement (reads included) goes to it so the transaction sees its
+    own uncommitted changes.
+    """
+    def __init__(self, pool):
+        super().__init__(None)
+        self._pool = pool
+        self._reader_thread = None
+
+    def execute(self, query, params=None):
+        pool = self._pool
+        if pool.holds_writer() or not is_read_only(query):
+            return self._write(super().execute, query, params)
+        if self._reader_thread is None:
+            self._reader_thread = threading.current_thread()
+            self._cursor = pool.acquire_reader().cursor()
+        return super().execute(query, params)
+
+    def executemany(self, query, seq_of_params):
+        """Always runs on the writer."""
+        return self._write(super().executemany, query, seq_of_params)
+
+    def _write(self, run, query, params):
+        pool = self._pool
+        self._release_reader()
+        self._cursor = pool.acquire_writer().cursor()
+        try:
+            run(query, params)
+        except Exception:
+            pool.abort_failed_write()
+            raise
+        pool.mark_writer_dirty()
+        return self
+
+    def close(self):
+        self._release_reader()
+
+    def _release_reader(self):
+        if self._reader_thread is not None:
+            self._pool.release_reader(self._reader_thread)
+            self._reader_thread = None
+
+    def __del__(self):
+        if getattr(self, "_reader_thread", None) is not None:
+            self._release_reader()
+
+
+class ConnectionPool(Connection):
+    """Bounded, thread-aware pool over the local replica file.
+
+    Up to ``size`` reader connections are opened lazily with
+    ``reader_factory``; a thread that already holds a reader reuses it rather
+    than taking a second one. All writes share the single writer connection
+    (the embedded replica itself), held by one thread from its first write
+    until commit() or rollback(). Checkouts wait at most ``timeout`` seconds
+    and then raise PoolTimeout. Leases held by threads that have exited are
+    reclaimed while waiting.
+    """
+    def __init__(self, writer, reader_factory, size=4, timeout=10, syncer=None, write_behind=False):
+        super().__init__(writer, syncer=syncer, write_behind=write_behind)
+        self.size = size
+        self.timeout = timeout
+        self._reader_factory = reader_factory
+
+        self._cond = threading.Condition()
+        self._idle = []
+        self._opened = 0
+        self._reader_leases = {}  # thread ident -> [thread, raw conn, refcount]
+        self._writer_owner = None
+        self._writer_dirty = False
+        self._probe = None
+        self._probe_value = None
+
+        self.reader_checkouts = 0
+        self.reader_waits = 0
+        self.reader_timeouts = 0
+        self.writer_checkouts = 0
+        self.writer_waits = 0
+        self.writer_timeouts = 0
+        self.max_wait = 0.0
+
+    def cursor(self):
+        return PooledCursor(self)
+
+    # -- readers -------------------------------------------------------
+
+    def acquire_reader(self):
+        thread = threading.current_thread()
+        with self._cond:
+            lease = self._reader_leases.get(thread.ident)
+            if lease and lease[0] is thread:
+                lease[2] += 1
+                return lease[1]
+            if lease:
+                # Ident reused by a new thread; the old owner is dead
+                self._reclaim_dead_leases()
+            self._wait_for(
+                lambda: self._idle or self._opened < self.size,
+                "reader",
+            )
+            if self._idle:
+                raw = self._idle.pop()
+            else:
+                raw = self._reader_factory()
+                self._opened += 1
+            self._reader_leases[thread.ident] = [thread, raw, 1]
+            self.reader_checkouts += 1
+            return raw
+
+    def release_reader(self, thread):
+        with self._cond:
+            lease = self._reader_leases.get(thread.ident)
+            if lease is None or lease[0] is not thread:
+                return
+            lease[2] -= 1
+            if lease[2] == 0:
+                del self._reader_leases[thread.ident]
+                self._idle.append(lease[1])
+                self._cond.notify_all()
+
+    # -- writer --------------------------------------------------------
+
+    def holds_writer(self):
+        return self._writer_owner is threading.current_thread()
+
+    def acquire_writer(self):
+        if self.holds_writer():
+            return self._conn
+        with self._cond:
+            self._wait_for(lambda: self._writer_owner is None, "writer")
+            self._writer_owner = threading.current_thread()
+            self._writer_dirty = False
+            self.writer_checkouts += 1
+        return self._conn
+
+    def mark_writer_dirty(self):
+        self._writer_dirty = True
+
+    def abort_failed_write(self):
+        """Give the writer back if the failed statement was the first write."""
+        if not self._writer_dirty:
+            self._conn.rollback()
+            self._release_writer()
+
+    def _release_writer(self):
+        with self._cond:
+            self._writer_owner = None
+            self._cond.notify_all()
+
+    def commit(self, invalidate=True):
+        """Commit this thread's write; see Connection.commit()."""
+        if not self.holds_writer():
+            return  # Nothing was written on this thread
+        try:
+            if not invalidate:
+                self.data_version  # count outside changes made before this commit
+            self._conn.commit()
+            if not invalidate:
+                self._absorb_probe()
+        finally:
+            self._release_writer()
+        if not invalidate:
+            if self.write_behind:
+                self.syncer.note_commit()
+            return
+        self.bump_data_version()
+        if self.write_behind:
+            self.syncer.note_commit()
+        else:
+            self.sync()
+
+    def rollback(self):
+        if not self.holds_writer():
+            return
+        wrote = self._writer_dirty
+        try:
+            self._conn.rollback()
+        finally:
+            self._release_writer()
+        if wrote:
+            # The memory backend's readers see uncommitted rows, so results
+            # cached during the transaction may hold rows that are now gone
+            self.bump_data_version()
+
+    @property
+    def data_version(self):
+        """Token that changes whenever committed data may have changed.
+
+        Bumped by every commit() through this pool, and whenever
+        ``PRAGMA data_version`` moves on a dedicated probe connection, which
+        catches frames pulled in by sync() and writes by other processes.
+        """
+        with self._version_lock:
+            if self._probe is None:
+                self._probe = self._reader_factory()
+            value = self._probe.execute("PRAGMA data_version").fetchone()[0]
+            if value != self._probe_value:
+                if self._probe_value is not None:
+                    self._version += 1
+                self._probe_value = value
+            return self._version
+
+    def _absorb_probe(self):
+        """Take the probe's current PRAGMA data_version as seen, so our own
+        commit isn't mistaken for an outside change. Runs while the writer
+        is still held, so no other commit through the pool can slip in."""
+        with self._version_lock:
+            if self._probe is not None:
+                self._probe_value = self._probe.execute("PRAGMA data_version").fetchone()[0]
+
+    # -- bookkeeping ---------------------------------------------------
+
+    def _wait_for(self, available, kind):
+        """Wait on the pool condition until available() is true (lock held)."""
+        if available():
+            return
+        started = time.monotonic()
+        deadline = started + self.timeout
+        while not available():
+            self._reclaim_dead_leases()
+            if available():
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                setattr(self, f"{kind}_timeouts", getattr(self, f"{kind}_timeouts") + 1)
+                raise PoolTimeout(f"No {kind} connection free after {self.timeout}s")
+            self._cond.wait(min(remaining, 1.0))
+        setattr(self, f"{kind}_waits", getattr(self, f"{kind}_waits") + 1)
+        self.max_wait = max(self.max_wait, time.monotonic() - started)
+
+    def _reclaim_dead_leases(self):
+        for ident, (thread, raw, _count) in list(self._reader_leases.items()):
+            if not thread.is_alive():
+                del self._reader_leases[ident]
+                self._idle.append(raw)
+        owner = self._writer_owner
+        if owner is not None and not owner.is_alive():
+            # Thread died mid-transaction: discard its uncommitted writes
+            self._conn.rollback()
+            self._writer_owner = None
+
+    def stats(self):
+        """Snapshot of pool usage for display or logging."""
+        with self._cond:
+            return {
+                "size": self.size,
+                "readers_open": self._opened,
+                "readers_in_use": len(self._reader_leases),
+                "reader_checkouts": self.reader_checkouts,
+                "reader_waits": self.reader_waits,
+                "reader_timeouts": self.reader_timeouts,
+                "writer_busy": self._writer_owner is not None,
+                "writer_checkouts": self.writer_checkouts,
+                "writer_waits": self.writer_waits,
+                "writer_timeouts": self.writer_timeouts,
+                "max_wait": self.max_wait,
+            }
+
+
+class LocalConnection(sqlite3.Connection):
+    """sqlite3 connection with the extra libsql method the app calls."""
+    def sync(self):
+        """Local databases have no remote to sync with."""
+
+
+def connect_libsql(turso, pool_size=4, pool_timeout=10):
+    """Embedded replica of the Turso database, kept fresh by a ReplicaSyncer.
+
+    The syncer refreshes the replica every ``sync_interval`` seconds (default
+    60, plus up to ``sync_jitter`` seconds of jitter) so no rerun blocks on
+    sync(). With ``write_behind = true`` commits return as soon as they land
+    locally and are synced in batches by the same thread.
+    """
+    conn = libsql.connect(
+        REPLICA_PATH,
+        sync_url=turso["database_url"],
+        auth_token=turso["auth_token"],
+    )
+    syncer = ReplicaSyncer(
+        conn,
+        interval=turso.get("sync_interval", 60),
+        jitter=turso.get("sync_jitter", 10),
+        commit_delay=turso.get("commit_delay", 0.5),
+    )
+    if not syncer.sync():
+        raise syncer.last_error
+    return ConnectionPool(
+        conn,
+        lambda: libsql.connect(REPLICA_PATH),
+        size=pool_size,
+        timeout=pool_timeout,
+        syncer=syncer.start(),
+        write_behind=turso.get("write_behind", False),
+    )
+
+
+def connect_sqlite(path=SQLITE_PATH, pool_size=4, pool_timeout=10):
+    """Plain SQLite file in WAL mode, so readers never wait on the writer."""
+    def connect():
+        return sqlite3.connect(
+            path, timeout=pool_timeout, check_same_thread=False, factory=LocalConnection
+        )
+
+    writer = connect()
+    writer.execute("PRAGMA journal_mode=WAL")
+    return ConnectionPool(writer, connect, size=pool_size, timeout=pool_timeout)
+
+
+_memory_db_ids = itertools.count()
+
+
+def connect_memory(pool_size=4, pool_timeout=10):
+    """Private in-memory database, shared by the pool's connections.
+
+    Each call gets a fresh database that lives as long as the pool. Readers
+    use read_uncommitted because shared-cache table locks would otherwise
+    fail reads while the writer holds a transaction; rolling back a write
+    moves data_version so nothing cached from those reads survives it.
+    """
+    uri = f"file:shows-attended-{next(_memory_db_ids)}?mode=memory&cache=shared"
+
+    def connect():
+        conn = sqlite3.connect(
+            uri, uri=True, timeout=pool_timeout, check_same_thread=False, factory=LocalConnection
+        )
+        conn.execute("PRAGMA read_uncommitted = 1")
+        return conn
+
+    return ConnectionPool(connect(), connect, size=pool_size, timeout=pool_timeout)
+
+
+def connect(backend="libsql", path=None, pool_size=4, pool_timeout=10, turso=None):
+    """Open a ConnectionPool on one of BACKENDS, outside of Streamlit's cache."""
+    if backend == "libsql":
+        return connect_libsql(turso, pool_size=pool_size, pool_timeout=pool_timeout)
+    if backend == "sqlite":
+        return connect_sqlite(path or SQLITE_PATH, pool_size=pool_size, pool_timeout=pool_timeout)
+    if backend == "memory":
+        return connect_memory(pool_size=pool_size, pool_timeout=pool_timeout)
+    raise ValueError(f"Unknown database backend {backend!r} (expected one of {', '.join(BACKENDS)})")
+
+
+def db_settings():
+    """The ``[db]`` secrets section, with SHOWS_DB_BACKEND / SHOWS_DB_PATH overrides."""
+    try:
+        settings = dict(st.secrets.get("db", {}))
+    except (KeyError, FileNotFoundError):
+        settings = {}
+    for key in ("backend", "path"):
+        value = os.getenv(f"SHOWS_DB_{key.upper()}")
+        if value:
+            settings[key] = value
+    return settings
+
 
 @st.cache_resource
 def get_db():
-    """Get database connection to Turso (embedded replica for fast reads)"""
-    conn = libsql.connect(
-        "shows-attended",
-        sync_url=st.secrets["turso"]["database_url"],
-        auth_token=st.secrets["turso"]["auth_token"],
+    """Get the shared database connection pool
+
+    ``db.backend`` picks where data lives: ``libsql`` (default) is an
+    embedded replica of Turso for fast reads, ``sqlite`` a local file at
+    ``db.path`` and ``memory`` a throwaway in-memory database. All three
+    return the same ConnectionPool interface: reads run on up to
+    ``db.pool_size`` reader connections, writes on a single writer.
+
+    Pending schema migrations are applied here, once per process.
+    """
+    settings = db_settings()
+    backend = settings.get("backend", "libsql")
+    conn = connect(
+        backend,
+        path=settings.get("path"),
+        pool_size=settings.get("pool_size", 4),
+        pool_timeout=settings.get("pool_timeout", 10),
+        turso=st.secrets["turso"] if backend == "libsql" else None,
     )
-    conn.sync()
-    return Connection(conn)
+    migrate(conn)
+    return conn
+
@@ -0,0 +1,271 @@
+"""
+Venue address lookup (Nominatim / OpenStreetMap)
+Lookups run on a background thread, at most ``rate`` requests per second
+(Nominatim's usage policy allows one), and are remembered in the
+geocode_cache table so a venue is only ever looked up once. The dialogs
+queue a lookup with request() and poll result() on later reruns.
+
+Settings come from the ``[geocoder]`` secrets section; SHOWS_GEOCODER_URL
+overrides the endpoint (e.g. to point tests at a local stub server).
+"""
+import json
+import os
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import streamlit as st
+
+DEFAULT_ENDPOINT = "https://nominatim.openstreetmap.org/search"
+USER_AGENT = "ShowsAttendedApp/1.0"
+
+# address, lat and lon are None when nothing was found; error is set when
+# the lookup failed and can be retried
+GeocodeResult = namedtuple("GeocodeResult", "query address lat lon error")
+
+
+def normalize_query(name):
+    """Cache key for a venue name: casefolded, whitespace collapsed."""
+    return " ".join(name.split()).casefold()
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens per second, up to ``capacity``."""
+
+    def __init__(self, rate=1.0, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token, blocking until one is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def fetch(query, endpoint=DEFAULT_ENDPOINT, timeout=5):
+    """One Nominatim search. Returns (address, lat, lon), or None if not found."""
+    params = urllib.parse.urlencode({"q": query, "format": "json", "limit": 1})
+    # Nominatim requires a User-Agent
+    req = urllib.request.Request(f"{endpoint}?{params}", headers={"User-Agent": USER_AGENT})
+    with urllib.request.urlopen(req, timeout=timeout) as response:
+        data = json.loads(response.read())
+    if not data:
+        return None
+    place = data[0]
+    lat, lon = place.get("lat"), place.get("lon")
+    return (
+        place.get("display_name", ""),
+        float(lat) if lat is not None else None,
+        float(lon) if lon is not None else None,
+    )
+
+
+def cached(cursor, query):
+    """GeocodeResult stored for a normalized query, or None."""
+    cursor.execute(
+        "SELECT address, lat, lon FROM geocode_cache WHERE query = ?", (query,)
+    )
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return GeocodeResult(query, row['address'], row['lat'], row['lon'], None)
+
+
+def store(cursor, result):
+    """Remember a result (found or not) in geocode_cache."""
+    cursor.execute(
+        "INSERT OR REPLACE INTO geocode_cache (query, address, lat, lon, looked_up_at)"
+        " VALUES (?, ?, ?, ?, ?)",
+        (result.query, result.address, result.lat, result.lon,
+         datetime.now(timezone.utc).isoformat()),
+    )
+
+
+class Geocoder:
+    """Background geocoding worker with debouncing and a persistent cache.
+
+    ``request(name, key)`` queues a lookup; a newer request with the same
+    ``key`` (e.g. one dialog's venue field) replaces an older one, and a
+    request is only sent once it has been left alone for ``debounce``
+    seconds, so typing a name doesn't fire a lookup per rerun.
+    """
+
+    def __init__(self, conn, fetch=fetch, bucket=None, debounce=0.75):
+        self._conn = conn
+        self._fetch = fetch
+        self._bucket = bucket or TokenBucket()
+        self.debounce = debounce
+
+        self._results = {}
+        self._pending = {}  # key -> (query, name, requested_at)
+        self._waiting = set()  # queries queued or in flight
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="geocoder", daemon=True)
+        self._thread.start()
+
+    def request(self, name, key=None, refresh=False):
+        """Queue a lookup of ``name`` unless its result is already known.
+
+        ``refresh`` forgets a stored miss or error first (the Retry button).
+        """
+        query = normalize_query(name)
+        if not query:
+            return
+        with self._cond:
+            if query in self._waiting:
+                return
+            known = self._results.get(query)
+        if known is None:
+            # Outside the lock, so the worker isn't held up by the query
+            known = self._load(query)
+        with self._cond:
+            if query in self._waiting:
+                return
+            known = self._results.get(query) or known
+            if known and not (refresh and known.address is None):
+                self._results[query] = known
+                return
+            self._results.pop(query, None)
+            key = key if key is not None else query
+            replaced = self._pending.get(key)
+            if replaced:
+                self._waiting.discard(replaced[0])
+            self._pending[key] = (query, name, time.monotonic())
+            self._waiting.add(query)
+            self._cond.notify_all()
+
+    def result(self, name):
+        """GeocodeResult for ``name``, or None while it is still pending."""
+        query = normalize_query(name)
+        with self._cond:
+            if query in self._waiting:
+                return None
+            found = self._results.get(query)
+        if found is None:
+            found = self._load(query)
+            if found is not None:
+                with self._cond:
+                    self._results[query] = found
+        return found
+
+    def lookup(self, name, timeout=None):
+        """Request ``name`` and wait for the result (for scripts, not the UI)."""
+        self.request(name)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        query = normalize_query(name)
+        with self._cond:
+            while query not in self._results:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            return self._results[query]
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._thread.join(timeout=5)
+
+    def _load(self, query):
+        try:
+            return cached(self._conn.cursor(), query)
+        except Exception:
+            return None
+
+    def _next(self):
+        """Block until a pending request has settled for ``debounce`` seconds."""
+        with self._cond:
+            while not self._stopped:
+                now = time.monotonic()
+                ready = [
+                    (key, entry) for key, entry in self._pending.items()
+                    if now - entry[2] >= self.debounce
+                ]
+                if ready:
+                    key, entry = min(ready, key=lambda item: item[1][2])
+                    del self._pending[key]
+                    return entry
+                waits = [self.debounce - (now - entry[2]) for entry in self._pending.values()]
+                self._cond.wait(min(waits) if waits else None)
+            return None
+
+    def _run(self):
+        while True:
+            entry = self._next()
+            if entry is None:
+                return
+            query, name, _requested_at = entry
+            self._bucket.acquire()
+            try:
+                found = self._fetch(name)
+            except Exception as e:
+                result = GeocodeResult(query, None, None, None, str(e))
+            else:
+                address, lat, lon = found or (None, None, None)
+                result = GeocodeResult(query, address, lat, lon, None)
+                try:
+                    store(self._conn.cursor(), result)
+                    # No cached page query reads geocode_cache, so don't
+                    # invalidate them (or sync) for every lookup
+                    self._conn.commit(invalidate=False)
+                except Exception:
+                    # Still served from memory; stored on a later lookup
+                    self._conn.rollback()
+            with self._cond:
+                self._results[query] = result
+                self._waiting.discard(query)
+                self._cond.notify_all()
+
+
+def geocoder_settings():
+    """The ``[geocoder]`` secrets section, with a SHOWS_GEOCODER_URL override."""
+    try:
+        settings = dict(st.secrets.get("geocoder", {}))
+    except (KeyError, FileNotFoundError):
+        settings = {}
+    endpoint = os.getenv("SHOWS_GEOCODER_URL")
+    if endpoint:
+        settings["endpoint"] = endpoint
+    return settings
+
+
+def settings_fetch(settings):
+    """fetch() bound to the configured endpoint and timeout."""
+    endpoint = settings.get("endpoint", DEFAULT_ENDPOINT)
+    timeout = settings.get("timeout", 5)
+    return lambda query: fetch(query, endpoint=endpoint, timeout=timeout)
+
+
+@st.cache_resource
+def get_geocoder():
+    """Get the shared background Geocoder
+
+    ``geocoder.endpoint`` (Nominatim-compatible search URL), ``rate``
+    (requests per second), ``timeout`` and ``debounce`` (seconds) are
+    configurable.
+    """
+    from db import get_db
+
+    settings = geocoder_settings()
+    return Geocoder(
+        get_db(),
+        fetch=settings_fetch(settings),
+        bucket=TokenBucket(rate=settings.get("rate", 1.0)),
+        debounce=settings.get("debounce", 0.75),
+    )
@@ -0,0 +1,539 @@
+"""
+Versioned schema migrations
+Applied once per process by db.get_db(); each applied version is recorded
+in the schema_version table. Run directly to migrate and print the query
+plans of the hot queries:
+
+    python migrations.py
+"""
+from datetime import datetime, timezone
+
+
+def table_exists(cursor, table):
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name = ?", (table,)
+    )
+    return cursor.fetchone() is not None
+
+
+def column_exists(cursor, table, column):
+    cursor.execute(
+        "SELECT 1 FROM pragma_table_info(?) WHERE name = ?", (table, column)
+    )
+    return cursor.fetchone() is not None
+
+
+def base_schema(cursor):
+    """Core tables, for fresh local databases (no-op on the existing Turso DB).
+
+    upcoming_shows is owned by event_watch and is not created here.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS venues (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            location TEXT,
+            closed INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS bands (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            primary_band_id INTEGER REFERENCES bands(id)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS shows (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            venue_id INTEGER NOT NULL REFERENCES venues(id),
+            event_id INTEGER REFERENCES events(id)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS show_bands (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            show_id INTEGER NOT NULL REFERENCES shows(id),
+            band_id INTEGER NOT NULL REFERENCES bands(id),
+            band_order INTEGER NOT NULL
+        )
+    """)
+
+
+def performance_indexes(cursor):
+    """Indexes for the predicates the pages filter and join on."""
+    # Lineup subqueries: WHERE show_id = ? ORDER BY band_order, reading band_id
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_show_bands_show_order"
+        " ON show_bands (show_id, band_order, band_id)"
+    )
+    # Band pages and stats: WHERE band_id IN (...), joined back to shows
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_show_bands_band_show"
+        " ON show_bands (band_id, show_id)"
+    )
+    # Show list: ORDER BY date, joined to venues/events without a table lookup
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_shows_date"
+        " ON shows (date, venue_id, event_id)"
+    )
+    # Venue pages and stats, and the already-added check for imports
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_shows_venue_date ON shows (venue_id, date)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_shows_event ON shows (event_id)"
+    )
+    # Alias lookups: WHERE primary_band_id = ?
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_bands_primary ON bands (primary_band_id)"
+    )
+    # Case-insensitive venue matching: LOWER(v.name) = LOWER(?)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_venues_lower_name ON venues (LOWER(name))"
+    )
+
+
+def upcoming_shows_rsvp(cursor):
+    """RSVP column and index on event_watch's table, once that table exists."""
+    if not table_exists(cursor, "upcoming_shows"):
+        return False
+    if not column_exists(cursor, "upcoming_shows", "rsvp"):
+        cursor.execute("ALTER TABLE upcoming_shows ADD COLUMN rsvp TEXT")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_upcoming_date_rsvp"
+        " ON upcoming_shows (date, rsvp)"
+    )
+
+
+def keyset_pagination_index(cursor):
+    """Show list pages on (date, id); replaces idx_shows_date."""
+    cursor.execute("DROP INDEX IF EXISTS idx_shows_date")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_shows_date_id"
+        " ON shows (date, id, venue_id, event_id)"
+    )
+
+
+def search_index(cursor):
+    """FTS5 trigram index over band, venue and event names (see search.py)."""
+    import search
+
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS search_index
+        USING fts5(band, venue, location, event, tokenize = 'trigram')
+    """)
+    # (source table, kind, index columns, source columns)
+    sources = [
+        ("bands", search.BAND, ["band"], ["name"]),
+        ("venues", search.VENUE, ["venue", "location"], ["name", "location"]),
+        ("events", search.EVENT, ["event"], ["name"]),
+    ]
+    for table, kind, index_columns, source_columns in sources:
+        columns = ", ".join(index_columns)
+        new_values = ", ".join(f"new.{column}" for column in source_columns)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS search_{table}_insert AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO search_index (rowid, {columns})
+                VALUES (new.id << 2 | {kind}, {new_values});
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS search_{table}_update AFTER UPDATE ON {table}
+            BEGIN
+                DELETE FROM search_index WHERE rowid = old.id << 2 | {kind};
+                INSERT INTO search_index (rowid, {columns})
+                VALUES (new.id << 2 | {kind}, {new_values});
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS search_{table}_delete AFTER DELETE ON {table}
+            BEGIN
+                DELETE FROM search_index WHERE rowid = old.id << 2 | {kind};
+            END
+        """)
+    cursor.execute("DELETE FROM search_index")
+    search.fill(cursor)
+
+
+def show_summary(cursor):
+    """Denormalized show list rows, kept current by triggers (see summary.py)."""
+    import summary
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS show_summary (
+            show_id INTEGER PRIMARY KEY,
+            date TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            venue_id INTEGER NOT NULL,
+            venue_name TEXT,
+            venue_location TEXT,
+            event_id INTEGER,
+            event_name TEXT,
+            lineup TEXT
+        )
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_show_summary_date ON show_summary (date, show_id)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_show_summary_venue ON show_summary (venue_id, date)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_show_summary_event ON show_summary (event_id)"
+    )
+
+    triggers = {
+        "shows_insert": f"""AFTER INSERT ON shows BEGIN
+            INSERT INTO show_summary ({summary.COLUMNS}) {summary.select_sql("new")};
+        END""",
+        "shows_update": f"""AFTER UPDATE ON shows BEGIN
+            DELETE FROM show_summary WHERE show_id = old.id;
+            INSERT INTO show_summary ({summary.COLUMNS}) {summary.select_sql("new")};
+        END""",
+        "shows_delete": """AFTER DELETE ON shows BEGIN
+            DELETE FROM show_summary WHERE show_id = old.id;
+        END""",
+        "show_bands_insert": f"""AFTER INSERT ON show_bands BEGIN
+            UPDATE show_summary SET lineup = {summary.lineup_sql("new.show_id")}
+            WHERE show_id = new.show_id;
+        END""",
+        "show_bands_update": f"""AFTER UPDATE ON show_bands BEGIN
+            UPDATE show_summary SET lineup = {summary.lineup_sql("show_summary.show_id")}
+            WHERE show_id IN (old.show_id, new.show_id);
+        END""",
+        "show_bands_delete": f"""AFTER DELETE ON show_bands BEGIN
+            UPDATE show_summary SET lineup = {summary.lineup_sql("old.show_id")}
+            WHERE show_id = old.show_id;
+        END""",
+        "bands_rename": f"""AFTER UPDATE OF name ON bands BEGIN
+            UPDATE show_summary SET lineup = {summary.lineup_sql("show_summary.show_id")}
+            WHERE show_id IN (SELECT show_id FROM show_bands WHERE band_id = new.id);
+        END""",
+        "venues_rename": """AFTER UPDATE OF name, location ON venues BEGIN
+            UPDATE show_summary SET venue_name = new.name, venue_location = new.location
+            WHERE venue_id = new.id;
+        END""",
+        "events_rename": """AFTER UPDATE OF name ON events BEGIN
+            UPDATE show_summary SET event_name = new.name WHERE event_id = new.id;
+        END""",
+    }
+    for name, body in triggers.items():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS summary_{name} {body}")
+
+    cursor.execute("DELETE FROM show_summary")
+    summary.fill(cursor)
+
+
+def show_year_month(cursor):
+    """Generated year and month columns on shows, indexed for year lists and charts."""
+    if not column_exists(cursor, "shows", "year"):
+        cursor.execute(
+            "ALTER TABLE shows ADD COLUMN year INTEGER"
+            " GENERATED ALWAYS AS (CAST(substr(date, 1, 4) AS INTEGER)) VIRTUAL"
+        )
+    if not column_exists(cursor, "shows", "month"):
+        cursor.execute(
+            "ALTER TABLE shows ADD COLUMN month INTEGER"
+            " GENERATED ALWAYS AS (CAST(substr(date, 6, 2) AS INTEGER)) VIRTUAL"
+        )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_shows_year_month ON shows (year, month)"
+    )
+
+
+def canonical_band_id(cursor):
+    """Generated canonical_band_id (the group's primary band, or the band itself)."""
+    if not column_exists(cursor, "bands", "canonical_band_id"):
+        cursor.execute(
+            "ALTER TABLE bands ADD COLUMN canonical_band_id INTEGER"
+            " GENERATED ALWAYS AS (COALESCE(primary_band_id, id)) VIRTUAL"
+        )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_bands_canonical ON bands (canonical_band_id, id)"
+    )
+
+
+def stats_tables(cursor):
+    """Per-band, venue, event and year stats, kept current by triggers (see aggregates.py)."""
+    from aggregates import AGGREGATES, refresh_sql, fill
+
+    for table, (key_column, _key_expr, _source) in AGGREGATES.items():
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                {key_column} INTEGER PRIMARY KEY,
+                show_count INTEGER NOT NULL,
+                first_show TEXT NOT NULL,
+                last_show TEXT NOT NULL
+            )
+        """)
+
+    # Band groups touched by a show's lineup
+    lineup_bands = """SELECT ba.canonical_band_id FROM show_bands sb
+        JOIN bands ba ON ba.id = sb.band_id WHERE sb.show_id = {}"""
+
+    triggers = {
+        "shows_insert": f"""AFTER INSERT ON shows BEGIN
+            {refresh_sql("venue_stats", "new.venue_id")}
+            {refresh_sql("event_stats", "new.event_id")}
+            {refresh_sql("year_stats", "new.year")}
+        END""",
+        "shows_update": f"""AFTER UPDATE OF date, venue_id, event_id ON shows BEGIN
+            {refresh_sql("venue_stats", "old.venue_id, new.venue_id")}
+            {refresh_sql("event_stats", "old.event_id, new.event_id")}
+            {refresh_sql("year_stats", "old.year, new.year")}
+        END""",
+        "shows_date": f"""AFTER UPDATE OF date ON shows BEGIN
+            {refresh_sql("band_stats", lineup_bands.format("new.id"))}
+        END""",
+        "shows_delete": f"""AFTER DELETE ON shows BEGIN
+            {refresh_sql("venue_stats", "old.venue_id")}
+            {refresh_sql("event_stats", "old.event_id")}
+            {refresh_sql("year_stats", "old.year")}
+            {refresh_sql("band_stats", lineup_bands.format("old.id"))}
+        END""",
+        "show_bands_insert": f"""AFTER INSERT ON show_bands BEGIN
+            {refresh_sql("band_stats", "SELECT canonical_band_id FROM bands WHERE id = new.band_id")}
+        END""",
+        "show_bands_update": f"""AFTER UPDATE OF show_id, band_id ON show_bands BEGIN
+            {refresh_sql("band_stats", "SELECT canonical_band_id FROM bands WHERE id IN (old.band_id, new.band_id)")}
+        END""",
+        "show_bands_delete": f"""AFTER DELETE ON show_bands BEGIN
+            {refresh_sql("band_stats", "SELECT canonical_band_id FROM bands WHERE id = old.band_id")}
+        END""",
+        "bands_regroup": f"""AFTER UPDATE OF primary_band_id ON bands BEGIN
+            {refresh_sql("band_stats", "old.canonical_band_id, new.canonical_band_id")}
+        END""",
+        "bands_delete": f"""AFTER DELETE ON bands BEGIN
+            {refresh_sql("band_stats", "old.canonical_band_id")}
+        END""",
+    }
+    for name, body in triggers.items():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS stats_{name} {body}")
+
+    for table in AGGREGATES:
+        cursor.execute(f"DELETE FROM {table}")
+    fill(cursor)
+
+
+def geocode_cache(cursor):
+    """Venue address lookups by normalized query (see geocode.py).
+
+    address/lat/lon are NULL for a query that found nothing, so misses are
+    remembered too.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS geocode_cache (
+            query TEXT PRIMARY KEY,
+            address TEXT,
+            lat REAL,
+            lon REAL,
+            looked_up_at TEXT NOT NULL
+        )
+    """)
+
+
+def venue_coordinates(cursor):
+    """lat/lon columns on venues, filled in by the geocoding backfill."""
+    for column in ("lat", "lon"):
+        if not column_exists(cursor, "venues", column):
+            cursor.execute(f"ALTER TABLE venues ADD COLUMN {column} REAL")
+
+
+# Tables whose versions are kept in catalog_versions
+CATALOG_TABLES = ("bands", "venues", "events")
+
+
+def catalog_versions(cursor):
+    """A version per name table, moved by triggers on any change to it, so
+    the name indexes built from them (see queries.cached) outlive commits
+    that don't touch them.
+
+    Versions are random rather than counted: a rolled-back change can't
+    leave behind a version a later change would reuse.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS catalog_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+    """)
+    cursor.executemany(
+        "INSERT OR IGNORE INTO catalog_versions (name, version) VALUES (?, random())",
+        [(table,) for table in CATALOG_TABLES],
+    )
+    for table in CATALOG_TABLES:
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS catalog_{table}_{event.lower()} AFTER {event} ON {table}
+                BEGIN
+                    UPDATE catalog_versions SET version = random() WHERE name = '{table}';
+                END
+            """)
+
+
+def touch_catalog_versions(cursor):
+    """Move every catalog version, after writes made with triggers dropped."""
+    cursor.execute("UPDATE catalog_versions SET version = random()")
+
+
+# (version, description, function). A function that returns False could not
+# apply yet (e.g. its table doesn't exist) and is retried on the next start.
+MIGRATIONS = [
+    (1, "base schema", base_schema),
+    (2, "performance indexes", performance_indexes),
+    (3, "upcoming_shows rsvp column and index", upcoming_shows_rsvp),
+    (4, "keyset pagination index on shows", keyset_pagination_index),
+    (5, "full-text search index", search_index),
+    (6, "show_summary table", show_summary),
+    (7, "generated year/month columns on shows", show_year_month),
+    (8, "canonical_band_id on bands", canonical_band_id),
+    (9, "band, venue, event and year stats tables", stats_tables),
+    (10, "geocode_cache table", geocode_cache),
+    (11, "venue coordinates", venue_coordinates),
+    (12, "catalog_versions table", catalog_versions),
+]
+
+
+def applied_versions(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    """)
+    cursor.execute("SELECT version FROM schema_version")
+    return {row['version'] for row in cursor.fetchall()}
+
+
+def migrate(conn):
+    """Apply every pending migration in version order.
+
+    Returns the list of versions applied by this call. Each migration commits
+    on its own, so a failure leaves earlier ones in place.
+    """
+    cursor = conn.cursor()
+    done = applied_versions(cursor)
+    conn.commit()
+
+    applied = []
+    for version, description, apply in MIGRATIONS:
+        if version in done:
+            continue
+        try:
+            if apply(cursor) is False:
+                conn.rollback()
+                continue
+            cursor.execute(
+                "INSERT OR IGNORE INTO schema_version (version, description, applied_at)"
+                " VALUES (?, ?, ?)",
+                (version, description, datetime.now(timezone.utc).isoformat()),
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+    return applied
+
+
+# Hot queries and the index each one should use.
+PLAN_CHECKS = [
+    (
+        "lineup subquery",
+        "SELECT b.name FROM show_bands sb JOIN bands b ON sb.band_id = b.id"
+        " WHERE sb.show_id = 1 ORDER BY sb.band_order",
+        "idx_show_bands_show_order",
+    ),
+    (
+        "band shows",
+        "SELECT show_id FROM show_bands WHERE band_id IN (1, 2)",
+        "idx_show_bands_band_show",
+    ),
+    (
+        "shows page",
+        "SELECT id, venue_id, event_id FROM shows WHERE (date, id) < ('2024-01-01', 100)"
+        " ORDER BY date DESC, id DESC LIMIT 50",
+        "idx_shows_date_id",
+    ),
+    (
+        "summary page",
+        "SELECT show_id FROM show_summary WHERE (date, show_id) < ('2024-01-01', 100)"
+        " ORDER BY date DESC, show_id DESC LIMIT 50",
+        "idx_show_summary_date",
+    ),
+    (
+        "summary year",
+        "SELECT show_id FROM show_summary WHERE date >= '2019-01-01' AND date < '2020-01-01'",
+        "idx_show_summary_date",
+    ),
+    (
+        "shows by year",
+        "SELECT year, COUNT(*) FROM shows GROUP BY year ORDER BY year DESC",
+        "idx_shows_year_month",
+    ),
+    (
+        "band group members",
+        "SELECT id FROM bands WHERE canonical_band_id = 1",
+        "idx_bands_canonical",
+    ),
+    (
+        "venue shows",
+        "SELECT id FROM shows WHERE venue_id = 1 ORDER BY date DESC",
+        "idx_shows_venue_date",
+    ),
+    (
+        "band aliases",
+        "SELECT id FROM bands WHERE primary_band_id = 1",
+        "idx_bands_primary",
+    ),
+    (
+        "venue by name",
+        "SELECT id FROM venues WHERE LOWER(name) = LOWER('Casbah')",
+        "idx_venues_lower_name",
+    ),
+    (
+        "upcoming by date",
+        "SELECT id FROM upcoming_shows WHERE date >= '2024-01-01' AND (rsvp IS NULL OR rsvp != 'hidden')",
+        "idx_upcoming_date_rsvp",
+    ),
+]
+
+
+def check_query_plans(conn):
+    """EXPLAIN QUERY PLAN each hot query.
+
+    Returns a list of (name, expected_index, used, plan_text). A check whose
+    query can't be planned (upcoming_shows before event_watch runs) has
+    ``used`` None and the error as its plan text.
+    """
+    cursor = conn.cursor()
+    results = []
+    for name, query, index in PLAN_CHECKS:
+        try:
+            cursor.execute(f"EXPLAIN QUERY PLAN {query}")
+        except Exception as e:
+            results.append((name, index, None, str(e)))
+            continue
+        plan = "\n".join(row['detail'] for row in cursor.fetchall())
+        results.append((name, index, index in plan, plan))
+    return results
+
+
+if __name__ == "__main__":
+    from db import get_db
+
+    conn = get_db()
+    for name, index, used, plan in check_query_plans(conn):
+        print(f"{'SKIP' if used is None else 'ok  ' if used else 'MISS'} {name} ({index})")
+        for line in plan.splitlines():
+            print(f"       {line}")
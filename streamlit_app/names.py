@@ -0,0 +1,172 @@
+"""
+Name matching for imported band and venue names
+Scraped names rarely match the stored spelling exactly ("the sinclair",
+"Sigur Ros", "Beatles, The"), so names are compared on a normalized key and
+looked up in a dict built once per data version rather than scanned.
+Names that don't match ("Pussy Riot (RU)", "Sinclair Cambridge") get ranked
+suggestions from a trigram index, similar to PostgreSQL's pg_trgm, and
+the type-ahead pickers complete names from sorted prefix lists.
+"""
+import bisect
+import math
+import re
+import unicodedata
+from collections import Counter, namedtuple
+
+ARTICLE = "the"
+
+# Suggestions scoring below this are dropped (pg_trgm's default threshold)
+SIMILARITY_THRESHOLD = 0.3
+
+Suggestion = namedtuple("Suggestion", "value name score")
+
+
+def fold(text):
+    """Unicode-normalized with accents dropped, casefolded, whitespace collapsed."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(text.casefold().split())
+
+
+def name_key(name):
+    """Matching key for a name: folded, with a leading "The" (or trailing
+    ", The") removed."""
+    words = fold(name).replace(",", " , ").split()
+    if words[-2:] == [",", ARTICLE]:
+        words = words[:-2]
+    elif len(words) > 1 and words[0] == ARTICLE:
+        words = words[1:]
+    return " ".join(words).replace(" , ", ", ").replace(" ,", ",")
+
+
+def trigrams(name):
+    """Set of trigrams of the words in ``name``'s key, each word padded with
+    two spaces in front and one behind so word starts weigh more."""
+    grams = set()
+    for word in re.findall(r"\w+", name_key(name)):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a, b):
+    """Trigram similarity of two names: shared trigrams over all trigrams (0-1)."""
+    a, b = trigrams(a), trigrams(b)
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+class NameIndex:
+    """O(1) lookup of stored names by their normalized key.
+
+    Built from ``(value, name)`` pairs, where value is whatever the caller
+    needs back (a row id, a list position). An exact case-insensitive match
+    wins over a normalized one, so "The Band" and "Band" can both exist;
+    among names sharing a key the first one given wins.
+    """
+
+    def __init__(self, entries):
+        self._exact = {}
+        self._keys = {}
+        self._entries = []  # (value, name, trigram count)
+        self._postings = {}  # trigram -> positions in _entries
+        self._starts = []  # (folded name, position), sorted
+        self._words = []  # (folded name from its second word on, position), sorted
+        for value, name in entries:
+            exact = name.strip().casefold()
+            if exact in self._exact:
+                continue
+            self._exact[exact] = (value, name)
+            self._keys.setdefault(name_key(name), (value, name))
+            grams = trigrams(name)
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(len(self._entries))
+            position = len(self._entries)
+            folded = fold(name)
+            self._starts.append((folded, position))
+            for word in list(re.finditer(r"\w+", folded))[1:]:
+                self._words.append((folded[word.start():], position))
+            self._entries.append((value, name, len(grams)))
+        self._starts.sort()
+        self._words.sort()
+
+    @classmethod
+    def from_names(cls, names):
+        """Index a list of names, with each name's position as its value."""
+        return cls(enumerate(names))
+
+    def get(self, name):
+        """(value, stored name) matching ``name``, or None."""
+        name = name.strip()
+        if not name:
+            return None
+        found = self._exact.get(name.casefold())
+        if found is None:
+            found = self._keys.get(name_key(name))
+        return found
+
+    def suggest(self, name, limit=5, threshold=SIMILARITY_THRESHOLD):
+        """Stored names similar to ``name``, best first, as Suggestions.
+
+        Shared trigrams over all trigrams can't exceed shared over the
+        query's own, so a name reaching ``threshold`` shares at least
+        ``needed = ceil(threshold * len(grams))`` of them, and so has one
+        among the rarest ``len(grams) - needed + 1`` (prefix filtering).
+        Only those posting lists produce candidates; the common trigrams just
+        add to candidates already found, and only candidates sharing
+        ``needed`` are scored. Names built from a small vocabulary still
+        share many trigrams, so the cost grows with the catalog: a few ms
+        per query at 20k names (see benchmarks/bench_queries.py).
+        """
+        grams = sorted(trigrams(name), key=lambda gram: len(self._postings.get(gram, ())))
+        if not grams:
+            return []
+        needed = max(1, math.ceil(threshold * len(grams)))
+        probe = len(grams) - needed + 1
+        shared = Counter()
+        for gram in grams[:probe]:
+            shared.update(self._postings.get(gram, ()))
+        for gram in grams[probe:]:
+            shared.update(shared.keys() & self._postings.get(gram, set()))
+        suggestions = []
+        for position, count in shared.items():
+            if count < needed:
+                continue
+            value, stored, size = self._entries[position]
+            score = count / (len(grams) + size - count)
+            if score >= threshold:
+                suggestions.append(Suggestion(value, stored, score))
+        suggestions.sort(key=lambda s: (-s.score, s.name))
+        return suggestions[:limit]
+
+    def complete(self, text, limit=10):
+        """Up to ``limit`` (value, name) pairs whose name, or one of its later
+        words, starts with ``text``.
+
+        Names starting with the text come first, then names with a word
+        starting with it, each alphabetically. Both lists are sorted, so a
+        lookup bisects to the first match and reads at most ``limit`` more.
+        """
+        prefix = fold(text)
+        if not prefix:
+            return []
+        found = []
+        seen = set()
+        for keys in (self._starts, self._words):
+            i = bisect.bisect_left(keys, (prefix,))
+            while i < len(keys) and len(found) < limit and keys[i][0].startswith(prefix):
+                position = keys[i][1]
+                if position not in seen:
+                    seen.add(position)
+                    value, name, _size = self._entries[position]
+                    found.append((value, name))
+                i += 1
+        return found
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def __len__(self):
+        return len(self._exact)
@@ -6,8 +6,12 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 from db import get_db
+from queries import (
+    get_band_show_count, get_primary_band_show_count, load_band_groups, load_band_shows,
+    load_bands, standalone_band_index,
+)
 from auth import check_password, show_logout_button
-from utils import format_date, inject_sidebar_css
+from utils import format_date, inject_sidebar_css, type_ahead
 
 st.set_page_config(page_title="Bands", page_icon="🎸", layout="wide")
 
@@ -20,99 +24,27 @@ show_logout_button()
 
 inject_sidebar_css()
 
-def load_bands(search="", min_shows=1, sort_by="count"):
-    """Load band statistics with grouping support"""
-    conn = get_db()
-    cursor = conn.cursor()
-
-    query = """
-        SELECT
-            COALESCE(b_primary.id, b.id) as id,
-            COALESCE(b_primary.name, b.name) as name,
-            COUNT(sb.id) as times_seen,
-            MIN(s.date) as first_show,
-            MAX(s.date) as last_show
-        FROM bands b
-        LEFT JOIN bands b_primary ON b.primary_band_id = b_primary.id
-        LEFT JOIN show_bands sb ON (sb.band_id = b.id OR sb.band_id IN (
-            SELECT id FROM bands WHERE primary_band_id = COALESCE(b_primary.id, b.id)
-        ))
-        LEFT JOIN shows s ON sb.show_id = s.id
-        WHERE b.primary_band_id IS NULL
-    """
-
-    params = []
-
-    if search:
-        query += " AND COALESCE(b_primary.name, b.name) LIKE ?"
-        params.append(f"%{search}%")
+def create_band_group(primary_band_id, alias_band_ids):
+    """Create a new band group by setting aliases
 
-    query += """
-        GROUP BY COALESCE(b_primary.id, b.id)
-        HAVING times_seen >= ?
+    An alias that was itself a group's primary brings its aliases along, so
+    every band stays one hop from its canonical band.
     """
-    params.append(min_shows)
-
-    # Add ORDER BY based on sort preference
-    if sort_by == "name":
-        query += " ORDER BY COALESCE(b_primary.name, b.name)"
-    else:  # count
-        query += " ORDER BY times_seen DESC, COALESCE(b_primary.name, b.name)"
-
-    cursor.execute(query, params)
-    return cursor.fetchall()
-
-@st.cache_data(ttl=300)
-def load_band_shows(band_id):
-    """Load all shows for a band and its aliases"""
-    conn = get_db()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT
-            s.id,
-            s.date,
-            v.name as venue_name,
-            v.location as venue_location,
-            e.name as event,
-            b_actual.name as actual_band_name,
-            (
-                SELECT GROUP_CONCAT(b2.name, ', ')
-                FROM show_bands sb2
-                JOIN bands b2 ON sb2.band_id = b2.id
-                WHERE sb2.show_id = s.id
-                ORDER BY sb2.band_order
-            ) as all_bands
-        FROM shows s
-        JOIN venues v ON s.venue_id = v.id
-        LEFT JOIN events e ON s.event_id = e.id
-        JOIN show_bands sb ON sb.show_id = s.id
-        JOIN bands b_actual ON sb.band_id = b_actual.id
-        WHERE sb.band_id IN (
-            SELECT id FROM bands WHERE id = ? OR primary_band_id = ?
-        )
-        ORDER BY s.date DESC
-    """, (band_id, band_id))
-
-    return cursor.fetchall()
-
-def create_band_group(primary_band_id, alias_band_ids):
-    """Create a new band group by setting aliases"""
     conn = get_db()
     cursor = conn.cursor()
     for alias_id in alias_band_ids:
         cursor.execute(
-            "UPDATE bands SET primary_band_id = ? WHERE id = ?",
+            "UPDATE bands SET primary_band_id = ? WHERE canonical_band_id = ?",
             (primary_band_id, alias_id)
         )
     conn.commit()
 
 def add_alias_to_group(primary_band_id, alias_band_id):
-    """Add a single alias to an existing group"""
+    """Add a single alias (and any aliases of its own) to an existing group"""
     conn = get_db()
     cursor = conn.cursor()
     cursor.execute(
-        "UPDATE bands SET primary_band_id = ? WHERE id = ?",
+        "UPDATE bands SET primary_band_id = ? WHERE canonical_band_id = ?",
         (primary_band_id, alias_band_id)
     )
     conn.commit()
@@ -137,67 +69,6 @@ def disband_group(primary_band_id):
     )
     conn.commit()
 
-def load_band_groups():
-    """Load all band groupings for display"""
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT
-            b_primary.id as primary_id,
-            b_primary.name as primary_name,
-            b_alias.id as alias_id,
-            b_alias.name as alias_name,
-            COUNT(DISTINCT sb.show_id) as alias_show_count
-        FROM bands b_primary
-        LEFT JOIN bands b_alias ON b_alias.primary_band_id = b_primary.id
-        LEFT JOIN show_bands sb ON sb.band_id = b_alias.id
-        WHERE b_alias.id IS NOT NULL
-        GROUP BY b_primary.id, b_alias.id
-        ORDER BY b_primary.name, b_alias.name
-    """)
-    return cursor.fetchall()
-
-@st.cache_data(ttl=300)
-def get_primary_band_show_count(primary_band_id):
-    """Get total show count for a primary band including all aliases"""
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT COUNT(DISTINCT sb.show_id) as total_shows
-        FROM show_bands sb
-        WHERE sb.band_id IN (
-            SELECT id FROM bands WHERE id = ? OR primary_band_id = ?
-        )
-    """, (primary_band_id, primary_band_id))
-    result = cursor.fetchone()
-    return result['total_shows'] if result else 0
-
-@st.cache_data(ttl=300)
-def get_band_show_count(band_id):
-    """Get show count for a specific band (not including aliases)"""
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT COUNT(DISTINCT sb.show_id) as show_count
-        FROM show_bands sb
-        WHERE sb.band_id = ?
-    """, (band_id,))
-    result = cursor.fetchone()
-    return result['show_count'] if result else 0
-
-@st.cache_data(ttl=300)
-def get_standalone_bands():
-    """Get all bands that are not part of any group (for dropdowns)"""
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT id, name
-        FROM bands
-        WHERE primary_band_id IS NULL
-        ORDER BY name
-    """)
-    return cursor.fetchall()
-
 def update_band_name(band_id, new_name):
     """Update a band's name"""
     conn = get_db()
@@ -242,7 +113,7 @@ def manage_band_groups_dialog():
     """Dialog for managing band groupings"""
     st.subheader("Current Groupings")
 
-    groups = load_band_groups()
+    groups = load_band_groups(get_db())
     if not groups:
         st.info("No band groups created yet")
     else:
@@ -264,10 +135,10 @@ def manage_band_groups_dialog():
         # Display each group
         for primary_id, group_info in groups_dict.items():
             # Get total show count for primary band
-            total_shows = get_primary_band_show_count(primary_id)
+            total_shows = get_primary_band_show_count(get_db(), primary_id)
             with st.expander(f"📍 {group_info['name']} ({total_shows} shows total)", expanded=True):
                 # Display primary band first (without remove button)
-                primary_show_count = get_band_show_count(primary_id)
+                primary_show_count = get_band_show_count(get_db(), primary_id)
                 col1, col2 = st.columns([5, 1])
                 with col1:
                     st.write(f"├─ **{group_info['name']}** ({primary_show_count} shows) - Primary")
@@ -287,24 +158,15 @@ def manage_band_groups_dialog():
                 st.divider()
 
                 # Add alias to existing group
-                col1, col2 = st.columns([3, 1])
-                with col1:
-                    standalone_bands = get_standalone_bands()
-                    if standalone_bands:
-                        band_options = {band['name']: band['id'] for band in standalone_bands}
-                        selected_alias = st.selectbox(
-                            "Add alias",
-                            options=list(band_options.keys()),
-                            index=None,
-                            placeholder="Select a band...",
-                            key=f"add_alias_{primary_id}"
-                        )
-                with col2:
-                    st.write("")  # Spacing
-                    st.write("")  # Spacing
-                    if standalone_bands and selected_alias and st.button("Add", key=f"add_button_{primary_id}"):
-                        add_alias_to_group(primary_id, band_options[selected_alias])
-                        st.rerun()
+                standalone = standalone_band_index(get_db())
+                if len(standalone):
+                    type_ahead(
+                        "Add alias",
+                        standalone,
+                        f"add_alias_{primary_id}",
+                        lambda band_id, _name, primary_id=primary_id: add_alias_to_group(primary_id, band_id),
+                        placeholder="Type a band name...",
+                    )
 
                 # Disband group
                 if st.button(f"Disband Group", key=f"disband_{primary_id}", type="secondary"):
@@ -314,43 +176,52 @@ def manage_band_groups_dialog():
     st.divider()
     st.subheader("Create New Group")
 
-    standalone_bands = get_standalone_bands()
-    if len(standalone_bands) < 2:
+    standalone = standalone_band_index(get_db())
+    if len(standalone) < 2:
         st.warning("Need at least 2 standalone bands to create a group")
     else:
-        band_options = {band['name']: band['id'] for band in standalone_bands}
-
-        primary_band = st.selectbox(
-            "Select Primary Band",
-            options=list(band_options.keys()),
-            index=None,
-            placeholder="Select a band...",
-            key="new_primary"
-        )
+        primary = st.session_state.get("new_primary")
+        aliases = st.session_state.setdefault("new_aliases", [])
 
-        # Filter out the primary band from alias options
-        if primary_band:
-            alias_options = {name: id for name, id in band_options.items()
-                            if id != band_options[primary_band]}
-
-            if alias_options:
-                alias_bands = st.multiselect(
-                    "Select Alias Bands",
-                    options=list(alias_options.keys()),
-                    placeholder="Select one or more bands...",
-                    key="new_aliases"
-                )
-
-                if st.button("Create Group", type="primary"):
-                    if not alias_bands:
-                        st.error("Please select at least one alias band")
-                    else:
-                        alias_ids = [alias_options[name] for name in alias_bands]
-                        create_band_group(band_options[primary_band], alias_ids)
-                        st.success(f"Created group for {primary_band}")
-                        st.rerun()
-        else:
+        def pick_primary(band_id, name):
+            st.session_state["new_primary"] = (band_id, name)
+            st.session_state["new_aliases"] = []
+
+        def add_alias(band_id, name):
+            if band_id != primary[0] and (band_id, name) not in aliases:
+                aliases.append((band_id, name))
+
+        if primary is None:
+            type_ahead("Select Primary Band", standalone, "new_primary_search", pick_primary,
+                       placeholder="Type a band name...")
             st.info("Select a primary band to continue")
+        else:
+            col1, col2 = st.columns([5, 1])
+            with col1:
+                st.write(f"Primary: **{primary[1]}**")
+            with col2:
+                st.button("Change", key="change_new_primary",
+                          on_click=lambda: st.session_state.pop("new_primary", None))
+
+            for i, (_band_id, name) in enumerate(aliases):
+                col1, col2 = st.columns([5, 1])
+                with col1:
+                    st.write(f"├─ {name}")
+                with col2:
+                    st.button("✕", key=f"remove_new_alias_{i}", on_click=aliases.pop, args=(i,))
+
+            type_ahead("Add alias band", standalone, "new_alias_search", add_alias,
+                       placeholder="Type a band name...")
+
+            if st.button("Create Group", type="primary"):
+                if not aliases:
+                    st.error("Please select at least one alias band")
+                else:
+                    create_band_group(primary[0], [band_id for band_id, _name in aliases])
+                    st.success(f"Created group for {primary[1]}")
+                    st.session_state.pop("new_primary", None)
+                    st.session_state.pop("new_aliases", None)
+                    st.rerun()
 
 st.title("🎸 Bands")
 
@@ -369,7 +240,8 @@ with col1:
 with col2:
     min_shows = st.selectbox("Min shows", [1, 5, 10, 20], index=0)
 with col3:
-    sort_by = st.selectbox("Sort by", ["Count", "Name"], index=0)
+    sort_options = ["Relevance", "Count", "Name"] if search else ["Count", "Name"]
+    sort_by = st.selectbox("Sort by", sort_options, index=0)
 
 # Clear lazy-load state when filters change
 filter_key = f"{search}_{min_shows}_{sort_by}"
@@ -380,7 +252,7 @@ if st.session_state.get("_bands_filter_key") != filter_key:
             del st.session_state[key]
 
 # Load bands
-bands = load_bands(search, min_shows, sort_by.lower())
+bands = load_bands(get_db(), search, min_shows, sort_by.lower())
 
 if not bands:
     st.info("No bands found")
@@ -427,7 +299,7 @@ else:
                         st.rerun()
 
                 if st.session_state.get(show_key):
-                    shows = load_band_shows(band['id'])
+                    shows = load_band_shows(get_db(), band['id'])
 
                     if shows:
                         for show in shows:
@@ -6,6 +6,9 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 from db import get_db
+from queries import count_missing_locations, load_venue_shows, load_venues
+from backfill import backfill
+from geocode import TokenBucket, geocoder_settings, settings_fetch
 from auth import check_password, show_logout_button
 from utils import format_date, inject_sidebar_css
 
@@ -20,80 +23,23 @@ show_logout_button()
 
 inject_sidebar_css()
 
-def load_venues(search="", min_shows=1, sort_by="count"):
-    """Load venue statistics"""
-    conn = get_db()
-    cursor = conn.cursor()
-
-    query = """
-        SELECT
-            v.id,
-            v.name,
-            v.location,
-            v.closed,
-            COUNT(s.id) as show_count,
-            MIN(s.date) as first_show,
-            MAX(s.date) as last_show
-        FROM venues v
-        LEFT JOIN shows s ON v.id = s.venue_id
-        WHERE 1=1
-    """
-
-    params = []
-
-    if search:
-        query += " AND v.name LIKE ?"
-        params.append(f"%{search}%")
+def update_venue(venue_id, name, location, closed):
+    """Update a venue's name, location, and closed status
 
-    query += """
-        GROUP BY v.id
-        HAVING show_count >= ?
+    Coordinates are cleared when the location changes, so the address
+    backfill looks the venue up again.
     """
-    params.append(min_shows)
-
-    # Add ORDER BY based on sort preference
-    if sort_by == "name":
-        query += " ORDER BY v.name"
-    else:  # count
-        query += " ORDER BY show_count DESC, v.name"
-
-    cursor.execute(query, params)
-    return cursor.fetchall()
-
-@st.cache_data(ttl=300)
-def load_venue_shows(venue_id):
-    """Load all shows at a venue"""
-    conn = get_db()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT
-            s.id,
-            s.date,
-            e.name as event,
-            (
-                SELECT GROUP_CONCAT(b2.name, ', ')
-                FROM show_bands sb2
-                JOIN bands b2 ON sb2.band_id = b2.id
-                WHERE sb2.show_id = s.id
-                ORDER BY sb2.band_order
-            ) as all_bands
-        FROM shows s
-        LEFT JOIN events e ON s.event_id = e.id
-        WHERE s.venue_id = ?
-        ORDER BY s.date DESC
-    """, (venue_id,))
-
-    return cursor.fetchall()
-
-def update_venue(venue_id, name, location, closed):
-    """Update a venue's name, location, and closed status"""
     conn = get_db()
     cursor = conn.cursor()
     try:
         cursor.execute(
-            "UPDATE venues SET name = ?, location = ?, closed = ? WHERE id = ?",
-            (name, location, closed, venue_id)
+            """
+            UPDATE venues SET name = ?, location = ?, closed = ?,
+                lat = CASE WHEN location IS ? THEN lat END,
+                lon = CASE WHEN location IS ? THEN lon END
+            WHERE id = ?
+            """,
+            (name, location, closed, location, location, venue_id)
         )
         conn.commit()
         return True
@@ -127,16 +73,45 @@ def edit_venue_dialog(venue_id, current_name, current_location, current_closed):
         if st.button("Cancel", use_container_width=True, key=f"cancel_venue_{venue_id}"):
             st.rerun()
 
+def fill_missing_addresses(limit):
+    """Run the geocoding backfill for up to ``limit`` venues, with a progress bar"""
+    settings = geocoder_settings()
+    bar = st.progress(0.0, text="Looking up addresses...")
+    counts = backfill(
+        get_db(),
+        fetch=settings_fetch(settings),
+        bucket=TokenBucket(rate=settings.get("rate", 1.0)),
+        limit=limit,
+        progress=lambda done, total: bar.progress(done / total if total else 1.0, text=f"{done}/{total} venues"),
+    )
+    bar.empty()
+    return counts
+
 st.title("📍 Venues")
 
+with st.sidebar:
+    with st.expander("Maintenance"):
+        missing_caption = st.empty()
+        if st.button("Fill missing addresses", use_container_width=True):
+            try:
+                # Lookups are rate limited, so fill a few at a time; each
+                # batch is saved and the next click carries on from there
+                counts = fill_missing_addresses(limit=25)
+                st.success(f"{counts['found']} found, {counts['not_found']} not found, {counts['failed']} failed")
+            except Exception as e:
+                st.error(f"Error looking up addresses: {e}")
+        missing = count_missing_locations(get_db())
+        missing_caption.caption(f"{missing} venue{'s' if missing != 1 else ''} missing an address or coordinates.")
+
 # Filters
 col1, col2, col3 = st.columns([3, 1, 1])
 with col1:
-    search = st.text_input("🔍 Search venues", placeholder="Type venue name...")
+    search = st.text_input("🔍 Search venues", placeholder="Venue name or location...")
 with col2:
     min_shows = st.selectbox("Min shows", [1, 5, 10, 20], index=0)
 with col3:
-    sort_by = st.selectbox("Sort by", ["Count", "Name"], index=0)
+    sort_options = ["Relevance", "Count", "Name"] if search else ["Count", "Name"]
+    sort_by = st.selectbox("Sort by", sort_options, index=0)
 
 # Clear lazy-load state when filters change
 filter_key = f"{search}_{min_shows}_{sort_by}"
@@ -147,7 +122,7 @@ if st.session_state.get("_venues_filter_key") != filter_key:
             del st.session_state[key]
 
 # Load venues
-venues = load_venues(search, min_shows, sort_by.lower())
+venues = load_venues(get_db(), search, min_shows, sort_by.lower())
 
 if not venues:
     st.info("No venues found")
@@ -202,7 +177,7 @@ else:
                         st.rerun()
 
                 if st.session_state.get(show_key):
-                    shows = load_venue_shows(venue['id'])
+                    shows = load_venue_shows(get_db(), venue['id'])
 
                     if shows:
                         for show in shows:
@@ -7,6 +7,7 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 from db import get_db
+from queries import load_upcoming_shows, upcoming_table_exists
 from auth import check_password, show_logout_button
 from utils import inject_sidebar_css
 from datetime import datetime
@@ -75,53 +76,6 @@ st.markdown("""
 st.title("🎟️ Upcoming Shows")
 
 
-@st.cache_resource
-def table_exists():
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT name FROM sqlite_master WHERE type='table' AND name='upcoming_shows'"
-    )
-    return cursor.fetchone() is not None
-
-
-def ensure_rsvp_column():
-    """Add rsvp column if it doesn't exist yet (runs once per session)."""
-    if st.session_state.get("_rsvp_column_checked"):
-        return
-    conn = get_db()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("ALTER TABLE upcoming_shows ADD COLUMN rsvp TEXT")
-        conn.commit()
-    except Exception:
-        pass  # Column already exists
-    st.session_state["_rsvp_column_checked"] = True
-
-
-def load_upcoming_shows(show_hidden=False):
-    conn = get_db()
-    cursor = conn.cursor()
-    today = datetime.now().strftime("%Y-%m-%d")
-    if show_hidden:
-        cursor.execute(
-            """SELECT id, event_name, date, venue, matched_artist, price, url, discovered_at, rsvp
-               FROM upcoming_shows
-               WHERE date >= ?
-               ORDER BY date ASC""",
-            [today],
-        )
-    else:
-        cursor.execute(
-            """SELECT id, event_name, date, venue, matched_artist, price, url, discovered_at, rsvp
-               FROM upcoming_shows
-               WHERE date >= ? AND (rsvp IS NULL OR rsvp != 'hidden')
-               ORDER BY date ASC""",
-            [today],
-        )
-    return cursor.fetchall()
-
-
 def update_rsvp(show_id, rsvp_value):
     conn = get_db()
     cursor = conn.cursor()
@@ -129,12 +83,11 @@ def update_rsvp(show_id, rsvp_value):
     conn.commit()
 
 
-if not table_exists():
-    st.info("No upcoming shows data yet. Run event_watch with --save-to-db to populate.")
+if not upcoming_table_exists(get_db()):
+    st.info("No upcoming shows data yet. Run event_watch with --save-to-db to populate "
+            "(if the app was already running, restart it to pick the table up).")
     st.stop()
 
-ensure_rsvp_column()
-
 # Sidebar filters
 with st.sidebar:
     st.header("Filters")
@@ -143,7 +96,7 @@ with st.sidebar:
     only_new = st.checkbox("Only new listings")
     show_hidden = st.checkbox("Show hidden")
 
-shows = load_upcoming_shows(show_hidden=show_hidden)
+shows = load_upcoming_shows(get_db(), show_hidden=show_hidden)
 
 # Apply RSVP filter
 if rsvp_filter != "All":
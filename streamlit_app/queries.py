@@ -0,0 +1,753 @@
+"""
+Data access shared by every page
+Plain functions over a db.Connection, with no Streamlit dependency, so the
+same queries back the sidebar, the pages, scripts and benchmarks. Functions
+decorated with @cached keep their results in one process-wide cache keyed
+on (function, arguments, data version), so a result computed on one page is
+a hit on every other page and session until the data changes. Cached
+results are shared: treat them as read-only.
+"""
+import functools
+import threading
+import weakref
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta
+
+from migrations import column_exists, table_exists
+from names import NameIndex
+from search import band_matches, venue_matches, event_matches
+
+# Cached results kept per connection, least recently used evicted first
+MAX_ENTRIES = 512
+
+_caches = weakref.WeakKeyDictionary()  # connection -> OrderedDict
+_versions = weakref.WeakKeyDictionary()  # connection -> (data_version, {tables: versions})
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0}
+
+
+def table_versions(conn, tables):
+    """Versions of ``tables`` from catalog_versions, read once per data version."""
+    data_version = conn.data_version
+    with _cache_lock:
+        seen, versions = _versions.get(conn, (None, {}))
+        if seen == data_version and tables in versions:
+            return versions[tables]
+    cursor = conn.cursor()
+    placeholders = ", ".join("?" * len(tables))
+    cursor.execute(
+        f"SELECT version FROM catalog_versions WHERE name IN ({placeholders}) ORDER BY name", tables
+    )
+    found = tuple(row['version'] for row in cursor.fetchall())
+    with _cache_lock:
+        seen, versions = _versions.get(conn, (None, {}))
+        if seen != data_version:
+            versions = {}
+            _versions[conn] = (data_version, versions)
+        versions[tables] = found
+    return found
+
+
+def cached(func=None, *, tables=None):
+    """Cache ``func(conn, *args)`` until ``conn.data_version`` moves.
+
+    With ``tables`` (some of migrations.CATALOG_TABLES), the result is kept
+    until one of those tables changes instead, for results that read
+    nothing else and are slow to rebuild, like the name indexes.
+    ``func.uncached`` runs the query without the cache (for benchmarks).
+    """
+    if func is None:
+        return functools.partial(cached, tables=tables)
+
+    @functools.wraps(func)
+    def wrapper(conn, *args, **kwargs):
+        version = table_versions(conn, tables) if tables else conn.data_version
+        key = (func.__name__, version, args, tuple(sorted(kwargs.items())))
+        with _cache_lock:
+            cache = _caches.setdefault(conn, OrderedDict())
+            if key in cache:
+                cache.move_to_end(key)
+                _cache_stats["hits"] += 1
+                return cache[key]
+            _cache_stats["misses"] += 1
+        result = func(conn, *args, **kwargs)
+        with _cache_lock:
+            cache[key] = result
+            while len(cache) > MAX_ENTRIES:
+                cache.popitem(last=False)
+        return result
+
+    wrapper.uncached = func
+    return wrapper
+
+
+def clear_cache():
+    with _cache_lock:
+        _caches.clear()
+        _versions.clear()
+        _cache_stats.update(hits=0, misses=0)
+
+
+def cache_stats():
+    """Hit and miss counts, and entries held, across every connection."""
+    with _cache_lock:
+        entries = sum(len(cache) for cache in _caches.values())
+        return dict(_cache_stats, entries=entries)
+
+
+# ---------------------------------------------------------------------------
+# Shows
+# ---------------------------------------------------------------------------
+
+def year_range(year):
+    """[start, end) date strings covering ``year``"""
+    year = int(year)
+    return f"{year:04d}-01-01", f"{year + 1:04d}-01-01"
+
+
+def show_filters(search="", year=None):
+    """WHERE clause and params on show_summary s, shared by the show list and its count"""
+    where_conditions = ["1=1"]
+    params = []
+
+    if search:
+        bands_sql, band_params = band_matches(search, group=False)
+        venues_sql, venue_params = venue_matches(search)
+        events_sql, event_params = event_matches(search)
+        where_conditions.append(f"""(
+            s.show_id IN (
+                SELECT sb2.show_id FROM show_bands sb2
+                WHERE sb2.band_id IN (SELECT id FROM ({bands_sql}))
+            )
+            OR s.venue_id IN (SELECT id FROM ({venues_sql}))
+            OR s.event_id IN (SELECT id FROM ({events_sql}))
+        )""")
+        params.extend(band_params + venue_params + event_params)
+
+    if year and year != "All Years":
+        # A range on date (not strftime) so the date index applies
+        where_conditions.append("s.date >= ? AND s.date < ?")
+        params.extend(year_range(year))
+
+    return " AND ".join(where_conditions), params
+
+
+@cached
+def load_shows(conn, search="", year=None, limit=None, before=None):
+    """Load shows with filters, newest first
+
+    With ``limit``, returns one page; pass the (date, id) of the last show
+    on the previous page as ``before`` to get the next one (keyset paging).
+    """
+    cursor = conn.cursor()
+
+    where_clause, params = show_filters(search, year)
+
+    if before:
+        where_clause += " AND (s.date, s.show_id) < (?, ?)"
+        params.extend(before)
+
+    query = f"""
+        SELECT
+            s.show_id as id,
+            s.date,
+            s.venue_name,
+            s.venue_location,
+            s.event_name as event,
+            s.lineup as all_bands
+        FROM show_summary s
+        WHERE {where_clause}
+        ORDER BY s.date DESC, s.show_id DESC
+    """
+
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit)
+
+    cursor.execute(query, params)
+    return cursor.fetchall()
+
+
+@cached
+def count_shows(conn, search="", year=None):
+    """Count shows matching the filters (without loading them)"""
+    cursor = conn.cursor()
+    where_clause, params = show_filters(search, year)
+    cursor.execute(f"SELECT COUNT(*) FROM show_summary s WHERE {where_clause}", params)
+    return cursor.fetchone()[0]
+
+
+@cached
+def load_years(conn):
+    """Load available years, newest first
+
+    Walks idx_shows_year_month with one seek per year (a loose index scan)
+    instead of reading every show.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        WITH RECURSIVE years(year) AS (
+            SELECT MAX(year) FROM shows
+            UNION ALL
+            SELECT (SELECT MAX(year) FROM shows WHERE year < years.year)
+            FROM years WHERE years.year IS NOT NULL
+        )
+        SELECT year FROM years WHERE year IS NOT NULL
+    """)
+    return tuple(str(row['year']) for row in cursor)
+
+
+@cached
+def load_show(conn, show_id):
+    """One show's date, venue and event, for the edit dialog"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT s.date, s.venue_id, v.name as venue_name, s.event_id, e.name as event_name
+        FROM shows s
+        JOIN venues v ON s.venue_id = v.id
+        LEFT JOIN events e ON s.event_id = e.id
+        WHERE s.id = ?
+    """, (show_id,))
+    return cursor.fetchone()
+
+
+@cached
+def load_lineup(conn, show_id):
+    """Band names of a show in billing order"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT b.name FROM show_bands sb
+        JOIN bands b ON sb.band_id = b.id
+        WHERE sb.show_id = ?
+        ORDER BY sb.band_order
+    """, (show_id,))
+    return tuple(row['name'] for row in cursor)
+
+
+Overview = namedtuple("Overview", "shows bands venues events")
+
+
+@cached
+def overview(conn):
+    """Total shows, bands (groups counted once), venues and events"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT COALESCE(SUM(show_count), 0) FROM year_stats")
+    total_shows = cursor.fetchone()[0]
+    cursor.execute("SELECT COUNT(*) FROM bands WHERE primary_band_id IS NULL")
+    total_bands = cursor.fetchone()[0]
+    cursor.execute("SELECT COUNT(*) FROM venues")
+    total_venues = cursor.fetchone()[0]
+    cursor.execute("SELECT COUNT(*) FROM events")
+    total_events = cursor.fetchone()[0]
+    return Overview(total_shows, total_bands, total_venues, total_events)
+
+
+# ---------------------------------------------------------------------------
+# Name catalogs (for the pickers and import matching)
+# ---------------------------------------------------------------------------
+
+@cached(tables=("bands",))
+def band_index(conn):
+    """NameIndex of band names (with ids) for the band picker, import matching and badges"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, name FROM bands ORDER BY name")
+    return NameIndex((row['id'], row['name']) for row in cursor)
+
+
+@cached(tables=("venues",))
+def venue_index(conn):
+    """NameIndex of venue names (with ids) for the venue picker and import matching"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, name FROM venues ORDER BY name")
+    return NameIndex((row['id'], row['name']) for row in cursor)
+
+
+@cached(tables=("venues",))
+def load_venue_location(conn, venue_id):
+    """Stored location of a venue, or None"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT location FROM venues WHERE id = ?", (venue_id,))
+    row = cursor.fetchone()
+    return row['location'] if row else None
+
+
+@cached(tables=("events",))
+def event_index(conn):
+    """NameIndex of event names (with ids) for the event picker"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, name FROM events ORDER BY name")
+    return NameIndex((row['id'], row['name']) for row in cursor)
+
+
+@cached(tables=("bands",))
+def standalone_band_index(conn):
+    """NameIndex of bands that are not part of any group (for the pickers)"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT id, name
+        FROM bands
+        WHERE primary_band_id IS NULL
+        ORDER BY name
+    """)
+    return NameIndex((row['id'], row['name']) for row in cursor)
+
+
+# ---------------------------------------------------------------------------
+# Bands
+# ---------------------------------------------------------------------------
+
+@cached
+def load_bands(conn, search="", min_shows=1, sort_by="count"):
+    """Load band statistics with grouping support"""
+    cursor = conn.cursor()
+
+    params = []
+    relevance = "0"
+    match_join = ""
+
+    if search:
+        # Matches on any of the band's names, aliases included
+        matches_sql, params = band_matches(search)
+        relevance = "m.relevance"
+        match_join = f"JOIN ({matches_sql}) m ON m.id = b.id"
+
+    # Per-group totals come precomputed from band_stats (see aggregates.py),
+    # keyed on the group's primary band
+    query = f"""
+        SELECT
+            b.id,
+            b.name,
+            t.show_count as times_seen,
+            t.first_show,
+            t.last_show,
+            {relevance} as relevance
+        FROM band_stats t
+        JOIN bands b ON b.id = t.band_id
+        {match_join}
+        WHERE t.show_count >= ?
+    """
+    params.append(min_shows)
+
+    # Add ORDER BY based on sort preference
+    if sort_by == "name":
+        query += " ORDER BY b.name"
+    elif sort_by == "relevance":
+        query += " ORDER BY relevance, t.show_count DESC"
+    else:  # count
+        query += " ORDER BY t.show_count DESC, b.name"
+
+    cursor.execute(query, params)
+    return cursor.fetchall()
+
+
+@cached
+def load_band_shows(conn, band_id):
+    """Load all shows for a band and its aliases"""
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        SELECT
+            s.show_id as id,
+            s.date,
+            s.venue_name,
+            s.venue_location,
+            s.event_name as event,
+            b_actual.name as actual_band_name,
+            s.lineup as all_bands
+        FROM show_summary s
+        JOIN show_bands sb ON sb.show_id = s.show_id
+        JOIN bands b_actual ON sb.band_id = b_actual.id
+        WHERE b_actual.canonical_band_id = ?
+        ORDER BY s.date DESC
+    """, (band_id,))
+
+    return cursor.fetchall()
+
+
+@cached
+def load_band_groups(conn):
+    """Load all band groupings for display"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT
+            b_primary.id as primary_id,
+            b_primary.name as primary_name,
+            b_alias.id as alias_id,
+            b_alias.name as alias_name,
+            COUNT(DISTINCT sb.show_id) as alias_show_count
+        FROM bands b_primary
+        LEFT JOIN bands b_alias ON b_alias.primary_band_id = b_primary.id
+        LEFT JOIN show_bands sb ON sb.band_id = b_alias.id
+        WHERE b_alias.id IS NOT NULL
+        GROUP BY b_primary.id, b_alias.id
+        ORDER BY b_primary.name, b_alias.name
+    """)
+    return cursor.fetchall()
+
+
+@cached
+def get_primary_band_show_count(conn, primary_band_id):
+    """Get total show count for a primary band including all aliases"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT COUNT(DISTINCT sb.show_id) as total_shows
+        FROM show_bands sb
+        WHERE sb.band_id IN (
+            SELECT id FROM bands WHERE canonical_band_id = ?
+        )
+    """, (primary_band_id,))
+    result = cursor.fetchone()
+    return result['total_shows'] if result else 0
+
+
+@cached
+def get_band_show_count(conn, band_id):
+    """Get show count for a specific band (not including aliases)"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT COUNT(DISTINCT sb.show_id) as show_count
+        FROM show_bands sb
+        WHERE sb.band_id = ?
+    """, (band_id,))
+    result = cursor.fetchone()
+    return result['show_count'] if result else 0
+
+
+# ---------------------------------------------------------------------------
+# Venues
+# ---------------------------------------------------------------------------
+
+@cached
+def load_venues(conn, search="", min_shows=1, sort_by="count"):
+    """Load venue statistics"""
+    cursor = conn.cursor()
+
+    params = []
+    relevance = "0"
+    match_join = ""
+
+    if search:
+        # Matches on venue name or location
+        matches_sql, params = venue_matches(search)
+        relevance = "m.relevance"
+        match_join = f"JOIN ({matches_sql}) m ON m.id = v.id"
+
+    query = f"""
+        SELECT
+            v.id,
+            v.name,
+            v.location,
+            v.closed,
+            t.show_count,
+            t.first_show,
+            t.last_show,
+            {relevance} as relevance
+        FROM venue_stats t
+        JOIN venues v ON v.id = t.venue_id
+        {match_join}
+        WHERE t.show_count >= ?
+    """
+    params.append(min_shows)
+
+    # Add ORDER BY based on sort preference
+    if sort_by == "name":
+        query += " ORDER BY v.name"
+    elif sort_by == "relevance":
+        query += " ORDER BY relevance, t.show_count DESC"
+    else:  # count
+        query += " ORDER BY t.show_count DESC, v.name"
+
+    cursor.execute(query, params)
+    return cursor.fetchall()
+
+
+@cached
+def load_venue_shows(conn, venue_id):
+    """Load all shows at a venue"""
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        SELECT
+            s.show_id as id,
+            s.date,
+            s.event_name as event,
+            s.lineup as all_bands
+        FROM show_summary s
+        WHERE s.venue_id = ?
+        ORDER BY s.date DESC
+    """, (venue_id,))
+
+    return cursor.fetchall()
+
+
+@cached
+def count_missing_locations(conn):
+    """Venues still missing a location or coordinates (what backfill.py fills)"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM venues WHERE location IS NULL OR lat IS NULL")
+    return cursor.fetchone()[0]
+
+
+# ---------------------------------------------------------------------------
+# Stats
+# ---------------------------------------------------------------------------
+
+@cached
+def get_shows_by_year(conn):
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT CAST(year AS TEXT) as year, show_count
+        FROM year_stats ORDER BY year_stats.year DESC
+    """)
+    return cursor.fetchall()
+
+
+@cached
+def get_top_bands(conn):
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT b.name, t.show_count as times_seen
+        FROM band_stats t JOIN bands b ON b.id = t.band_id
+        ORDER BY t.show_count DESC
+        LIMIT 20
+    """)
+    return cursor.fetchall()
+
+
+@cached
+def get_top_venues(conn):
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT v.name, v.location, t.show_count
+        FROM venue_stats t JOIN venues v ON v.id = t.venue_id
+        ORDER BY t.show_count DESC LIMIT 20
+    """)
+    return cursor.fetchall()
+
+
+@cached
+def get_events_stats(conn):
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT e.name, t.show_count
+        FROM event_stats t JOIN events e ON e.id = t.event_id
+        ORDER BY t.show_count DESC
+    """)
+    return cursor.fetchall()
+
+
+# ---------------------------------------------------------------------------
+# Upcoming shows (the table is owned by event_watch and may not exist)
+# ---------------------------------------------------------------------------
+
+@cached
+def upcoming_table_exists(conn):
+    """True once event_watch has created upcoming_shows and it has its rsvp
+    column.
+
+    The column is added by the migrations get_db() runs at startup, so a
+    table created while the app is running is used after the next restart;
+    until then the queries below aren't run against it.
+    """
+    cursor = conn.cursor()
+    return table_exists(cursor, "upcoming_shows") and column_exists(cursor, "upcoming_shows", "rsvp")
+
+
+def get_recent_upcoming_shows(conn, today=None):
+    """Get upcoming_shows from the past week that haven't been added to shows yet.
+
+    Returns rows with id, event_name, date, venue, matched_artist, price, url.
+    Excludes shows where a show already exists on the same date at a venue with a matching name.
+    """
+    today = today or datetime.now().strftime("%Y-%m-%d")
+    return _recent_upcoming_shows(conn, today)
+
+
+@cached
+def _recent_upcoming_shows(conn, today):
+    if not upcoming_table_exists(conn):
+        return []
+
+    week_ago = (datetime.strptime(today, "%Y-%m-%d") - timedelta(days=7)).strftime("%Y-%m-%d")
+
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT u.id, u.event_name, u.date, u.venue, u.matched_artist, u.price, u.url
+           FROM upcoming_shows u
+           WHERE u.date >= ? AND u.date <= ?
+             AND (u.rsvp IS NULL OR u.rsvp NOT IN ('no', 'hidden'))
+             AND NOT EXISTS (
+               SELECT 1 FROM shows s
+               JOIN venues v ON s.venue_id = v.id
+               WHERE s.date = u.date AND LOWER(v.name) = LOWER(u.venue)
+             )
+           ORDER BY u.date DESC""",
+        [week_ago, today],
+    )
+    return cursor.fetchall()
+
+
+def load_upcoming_shows(conn, show_hidden=False, today=None):
+    """Upcoming shows from ``today`` on, soonest first"""
+    today = today or datetime.now().strftime("%Y-%m-%d")
+    return _upcoming_shows(conn, show_hidden, today)
+
+
+@cached
+def _upcoming_shows(conn, show_hidden, today):
+    cursor = conn.cursor()
+    if show_hidden:
+        cursor.execute(
+            """SELECT id, event_name, date, venue, matched_artist, price, url, discovered_at, rsvp
+               FROM upcoming_shows
+               WHERE date >= ?
+               ORDER BY date ASC""",
+            [today],
+        )
+    else:
+        cursor.execute(
+            """SELECT id, event_name, date, venue, matched_artist, price, url, discovered_at, rsvp
+               FROM upcoming_shows
+               WHERE date >= ? AND (rsvp IS NULL OR rsvp != 'hidden')
+               ORDER BY date ASC""",
+            [today],
+        )
+    return cursor.fetchall()
+
+
+# ---------------------------------------------------------------------------
+# Write helpers: run on the caller's cursor, inside the caller's transaction
+# ---------------------------------------------------------------------------
+
+# Orphan checks, one indexed probe per row. A band that is the primary of
+# a group is kept while it has aliases.
+ORPHAN_CHECKS = {
+    "bands": """NOT EXISTS (SELECT 1 FROM show_bands WHERE band_id = bands.id)
+        AND NOT EXISTS (SELECT 1 FROM bands alias WHERE alias.primary_band_id = bands.id)""",
+    "venues": "NOT EXISTS (SELECT 1 FROM shows WHERE venue_id = venues.id)",
+    "events": "NOT EXISTS (SELECT 1 FROM shows WHERE event_id = events.id)",
+}
+
+
+def delete_orphans(cursor, band_ids=(), venue_ids=(), event_ids=()):
+    """Delete the given bands, venues and events if no show uses them any more
+
+    Only the candidates are checked, so the cost follows the size of the
+    change rather than the size of the tables.
+    """
+    candidates = {"bands": band_ids, "venues": venue_ids, "events": event_ids}
+    for table, ids in candidates.items():
+        ids = sorted({id_ for id_ in ids if id_ is not None})
+        if not ids:
+            continue
+        placeholders = ", ".join("?" * len(ids))
+        cursor.execute(
+            f"DELETE FROM {table} WHERE id IN ({placeholders}) AND {ORPHAN_CHECKS[table]}",
+            ids,
+        )
+
+
+def get_or_create_venue(cursor, name, location=None):
+    """Get existing venue ID or create a new one."""
+    cursor.execute("SELECT id FROM venues WHERE name = ?", (name,))
+    row = cursor.fetchone()
+    if row:
+        return row['id']
+    cursor.execute("INSERT INTO venues (name, location) VALUES (?, ?)", (name, location))
+    return cursor.lastrowid
+
+
+def get_or_create_names(cursor, table, names):
+    """Map each of ``names`` to its id in ``table`` (bands, venues or events).
+
+    Existing names are found with one IN lookup and the rest are created
+    with one multi-row INSERT ... RETURNING.
+    """
+    names = list(dict.fromkeys(names))
+    if not names:
+        return {}
+    placeholders = ", ".join("?" * len(names))
+    cursor.execute(f"SELECT id, name FROM {table} WHERE name IN ({placeholders})", names)
+    ids = {row['name']: row['id'] for row in cursor.fetchall()}
+
+    missing = [name for name in names if name not in ids]
+    if missing:
+        values = ", ".join(["(?)"] * len(missing))
+        cursor.execute(f"INSERT INTO {table} (name) VALUES {values} RETURNING id, name", missing)
+        ids.update((row['name'], row['id']) for row in cursor.fetchall())
+    return ids
+
+
+def get_or_create_event(cursor, name):
+    """Get existing event ID or create a new one."""
+    return get_or_create_names(cursor, "events", [name])[name]
+
+
+def insert_lineup(cursor, show_id, band_names, start=1):
+    """Add bands to a show in billing order, creating any new bands.
+
+    One lookup, at most one insert into bands, and one batched insert into
+    show_bands, whatever the lineup size.
+    """
+    band_ids = get_or_create_names(cursor, "bands", band_names)
+    cursor.executemany(
+        "INSERT INTO show_bands (show_id, band_id, band_order) VALUES (?, ?, ?)",
+        [(show_id, band_ids[name], order) for order, name in enumerate(band_names, start)],
+    )
+
+
+def update_lineup(cursor, show_id, band_names):
+    """Make a show's lineup match ``band_names`` with the fewest writes.
+
+    Bands already on the bill keep their show_bands row (only band_order is
+    updated if they moved); only added bands are inserted and only dropped
+    ones deleted. Returns the ids of the dropped bands.
+    """
+    cursor.execute(
+        "SELECT id, band_id, band_order FROM show_bands WHERE show_id = ? ORDER BY band_order",
+        (show_id,),
+    )
+    current = {}
+    for row in cursor.fetchall():
+        current.setdefault(row['band_id'], []).append((row['id'], row['band_order']))
+
+    band_ids = get_or_create_names(cursor, "bands", band_names)
+    inserts, moves = [], []
+    for order, name in enumerate(band_names, 1):
+        rows = current.get(band_ids[name])
+        if rows:
+            row_id, old_order = rows.pop(0)
+            if old_order != order:
+                moves.append((order, row_id))
+        else:
+            inserts.append((show_id, band_ids[name], order))
+    deletes = [row_id for rows in current.values() for row_id, _order in rows]
+
+    if deletes:
+        placeholders = ", ".join("?" * len(deletes))
+        cursor.execute(f"DELETE FROM show_bands WHERE id IN ({placeholders})", deletes)
+    if moves:
+        cursor.executemany("UPDATE show_bands SET band_order = ? WHERE id = ?", moves)
+    if inserts:
+        cursor.executemany(
+            "INSERT INTO show_bands (show_id, band_id, band_order) VALUES (?, ?, ?)", inserts
+        )
+    return [band_id for band_id, rows in current.items() if rows]
+
+
+def delete_show(cursor, show_id):
+    """Delete a show and its lineup, then any band, venue or event only it used"""
+    cursor.execute("SELECT venue_id, event_id FROM shows WHERE id = ?", (show_id,))
+    show = cursor.fetchone()
+    cursor.execute("SELECT band_id FROM show_bands WHERE show_id = ?", (show_id,))
+    band_ids = [row['band_id'] for row in cursor.fetchall()]
+
+    cursor.execute("DELETE FROM show_bands WHERE show_id = ?", (show_id,))
+    cursor.execute("DELETE FROM shows WHERE id = ?", (show_id,))
+
+    delete_orphans(
+        cursor,
+        band_ids=band_ids,
+        venue_ids=[show['venue_id']] if show else [],
+        event_ids=[show['event_id']] if show else [],
+    )
@@ -0,0 +1,112 @@
+"""
+Full-text search over bands, venues and events
+Backed by the search_index FTS5 table (trigram tokenizer, so any substring
+of three or more characters matches). Migration 5 creates it and triggers on
+bands, venues and events keep it in sync.
+
+Each row's rowid packs the source id and kind, ``id << 2 | kind``, so the
+triggers can update a row by rowid and queries get the id back with
+``rowid >> 2``. Only the columns for the row's kind are filled in.
+"""
+
+BAND, VENUE, EVENT = 1, 2, 3
+
+# Columns searched for each kind (FTS5 column filter syntax)
+COLUMNS = {
+    BAND: "{band}",
+    VENUE: "{venue location}",
+    EVENT: "{event}",
+}
+
+# Trigrams need at least three characters; shorter terms fall back to LIKE
+MIN_LENGTH = 3
+
+
+def match_expression(text, kind):
+    """FTS5 MATCH string for ``text`` as a substring, or None if too short."""
+    text = text.strip()
+    if len(text) < MIN_LENGTH:
+        return None
+    phrase = text.replace('"', '""')
+    return f'{COLUMNS[kind]} : "{phrase}"'
+
+
+def band_matches(text, group=True):
+    """Subquery (and params) selecting ``id, relevance`` of matching bands.
+
+    With ``group``, a match on an alias returns its primary band, so the
+    Bands page finds a band by any of its names. Lower relevance is better.
+    """
+    band_id = "b.canonical_band_id" if group else "b.id"
+    expression = match_expression(text, BAND)
+    if expression is None:
+        return f"""
+            SELECT {band_id} AS id, 0 AS relevance
+            FROM bands b WHERE b.name LIKE ?
+            GROUP BY 1
+        """, [f"%{text.strip()}%"]
+    return f"""
+        SELECT {band_id} AS id, MIN(search_index.rank) AS relevance
+        FROM search_index JOIN bands b ON b.id = search_index.rowid >> 2
+        WHERE search_index MATCH ?
+        GROUP BY 1
+    """, [expression]
+
+
+def venue_matches(text):
+    """Subquery (and params) selecting ``id, relevance`` of venues matching on
+    name or location."""
+    expression = match_expression(text, VENUE)
+    if expression is None:
+        pattern = f"%{text.strip()}%"
+        return """
+            SELECT id, 0 AS relevance FROM venues
+            WHERE name LIKE ? OR location LIKE ?
+        """, [pattern, pattern]
+    return """
+        SELECT rowid >> 2 AS id, rank AS relevance
+        FROM search_index WHERE search_index MATCH ?
+    """, [expression]
+
+
+def event_matches(text):
+    """Subquery (and params) selecting ``id, relevance`` of matching events."""
+    expression = match_expression(text, EVENT)
+    if expression is None:
+        return """
+            SELECT id, 0 AS relevance FROM events WHERE name LIKE ?
+        """, [f"%{text.strip()}%"]
+    return """
+        SELECT rowid >> 2 AS id, rank AS relevance
+        FROM search_index WHERE search_index MATCH ?
+    """, [expression]
+
+
+def rebuild(conn):
+    """Repopulate search_index from the source tables."""
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM search_index")
+    fill(cursor)
+    conn.commit()
+
+
+def fill(cursor):
+    cursor.execute(
+        f"INSERT INTO search_index (rowid, band)"
+        f" SELECT id << 2 | {BAND}, name FROM bands"
+    )
+    cursor.execute(
+        f"INSERT INTO search_index (rowid, venue, location)"
+        f" SELECT id << 2 | {VENUE}, name, location FROM venues"
+    )
+    cursor.execute(
+        f"INSERT INTO search_index (rowid, event)"
+        f" SELECT id << 2 | {EVENT}, name FROM events"
+    )
+
+
+if __name__ == "__main__":
+    from db import get_db
+
+    rebuild(get_db())
+    print("search_index rebuilt")
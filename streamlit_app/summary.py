@@ -0,0 +1,61 @@
+"""
+Denormalized show_summary table
+One row per show with its date, venue, event and ordered lineup string, so
+the show lists don't run a GROUP_CONCAT subquery per row. Migration 6
+creates it; triggers on shows, show_bands, bands, venues and events keep it
+current inside the same transaction as the write. Run directly to rebuild:
+
+    python summary.py
+"""
+
+
+def lineup_sql(show_id):
+    """Expression for the ordered ", "-joined lineup of ``show_id``."""
+    return f"""(
+        SELECT GROUP_CONCAT(name, ', ') FROM (
+            SELECT b.name FROM show_bands sb JOIN bands b ON b.id = sb.band_id
+            WHERE sb.show_id = {show_id}
+            ORDER BY sb.band_order
+        )
+    )"""
+
+
+def select_sql(show):
+    """SELECT producing the show_summary row(s) for the shows alias ``show``."""
+    return f"""
+        SELECT
+            {show}.id,
+            {show}.date,
+            CAST(substr({show}.date, 1, 4) AS INTEGER),
+            {show}.venue_id,
+            (SELECT name FROM venues WHERE id = {show}.venue_id),
+            (SELECT location FROM venues WHERE id = {show}.venue_id),
+            {show}.event_id,
+            (SELECT name FROM events WHERE id = {show}.event_id),
+            {lineup_sql(f"{show}.id")}
+    """
+
+
+COLUMNS = (
+    "show_id, date, year, venue_id, venue_name, venue_location,"
+    " event_id, event_name, lineup"
+)
+
+
+def fill(cursor):
+    cursor.execute(f"INSERT INTO show_summary ({COLUMNS}) {select_sql('s')} FROM shows s")
+
+
+def rebuild(conn):
+    """Repopulate show_summary from the source tables."""
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM show_summary")
+    fill(cursor)
+    conn.commit()
+
+
+if __name__ == "__main__":
+    from db import get_db
+
+    rebuild(get_db())
+    print("show_summary rebuilt")
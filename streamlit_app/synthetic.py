@@ -0,0 +1,341 @@
+"""
+Synthetic show history for local testing and benchmarks
+Seeds an empty local database with a made-up history at a given scale:
+band and venue popularity follow a Zipf-like long tail, a few percent of
+bands have alias groups that some shows were logged under, festivals recur
+yearly as events, and event_watch's upcoming_shows table gets listings
+around today. The same seed always produces the same data.
+
+Rows are bulk-loaded with the derived-data triggers dropped, then
+show_summary, the stats tables and search_index are filled in one pass
+each and the triggers restored, so a million shows loads in minutes rather
+than hours. Run from streamlit_app/:
+
+    python synthetic.py shows-synthetic.db --scale 50k [--seed 0] [--force]
+"""
+import argparse
+import itertools
+import os
+import random
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import aggregates
+import search
+import summary
+from migrations import migrate, touch_catalog_versions
+
+SCALES = {"1k": 1_000, "50k": 50_000, "1m": 1_000_000}
+
+FIRST_YEAR = 1995
+CHUNK = 20_000  # shows generated and inserted per executemany
+
+# Bands per lineup: mostly a headliner and one or two openers
+LINEUP_SIZES = [1, 2, 3, 4, 5]
+LINEUP_WEIGHTS = [30, 35, 20, 10, 5]
+
+ALIAS_SHARE = 0.02  # bands that are the primary of an alias group
+ALIAS_PLAYS = 0.3  # shows of a grouped band logged under an alias
+EVENT_SHARE = 0.12  # shows that are part of a festival
+
+ADJECTIVES = [
+    "Black", "Electric", "Silver", "Broken", "Velvet", "Hollow", "Golden", "Wild",
+    "Quiet", "Burning", "Neon", "Crystal", "Savage", "Lonely", "Frozen", "Crimson",
+    "Static", "Holy", "Midnight", "Bitter", "Paper", "Iron", "Sunken", "Lucky",
+    "Pale", "Restless", "Sonic", "Violet", "Empty", "Atomic", "Gentle", "Rusty",
+]
+NOUNS = [
+    "Wolf", "Owl", "Ghost", "River", "Mountain", "Engine", "Garden", "Horse",
+    "Mirror", "Temple", "Harbor", "Comet", "Lantern", "Shadow", "Falcon", "Anchor",
+    "Tiger", "Canyon", "Signal", "Machine", "Prophet", "Saint", "Desert", "Ocean",
+    "Forest", "Thunder", "Crown", "Serpent", "Orchard", "Bridge", "Circus", "Wave",
+]
+KINDS = ["Band", "Collective", "Orchestra", "Trio", "Club", "Society", "Brigade", "Choir"]
+FIRST_NAMES = [
+    "Ada", "Ben", "Cleo", "Dev", "Elena", "Finn", "Grace", "Hugo", "Iris", "Jonah",
+    "Kira", "Leo", "Maya", "Nico", "Olive", "Pablo", "Quinn", "Rosa", "Sam", "Tess",
+]
+LAST_NAMES = [
+    "Adler", "Brooks", "Castillo", "Dunn", "Ellis", "Fox", "Garza", "Hale", "Ito",
+    "Jensen", "Kim", "Lowe", "Moreno", "Nash", "Okafor", "Price", "Reyes", "Stone",
+]
+SYLLABLES = [
+    "ka", "ro", "vel", "mar", "zen", "tho", "lu", "dra", "syn", "or", "bex", "qui",
+    "al", "mor", "ta", "nix", "vo", "sar", "el", "kyr", "da", "fen", "ix", "um",
+]
+VENUE_KINDS = [
+    "Ballroom", "Theatre", "Hall", "Club", "Lounge", "Tavern", "Room", "Pavilion",
+    "Amphitheater", "Arena", "Social Club", "Music Hall", "Bar", "Warehouse",
+]
+CITIES = [
+    "San Diego, CA", "Los Angeles, CA", "San Francisco, CA", "Oakland, CA",
+    "Portland, OR", "Seattle, WA", "Denver, CO", "Austin, TX", "Chicago, IL",
+    "Minneapolis, MN", "Nashville, TN", "Atlanta, GA", "Brooklyn, NY",
+    "New York, NY", "Philadelphia, PA", "Boston, MA", "Cambridge, MA",
+    "Washington, DC", "Phoenix, AZ", "Las Vegas, NV",
+]
+FESTIVAL_WORDS = ["Fest", "Festival", "Weekend", "Fest", "Days", "Jam"]
+RSVPS = [None, "yes", "maybe", "no", "hidden"]
+RSVP_WEIGHTS = [70, 10, 8, 7, 5]
+
+
+def scale_counts(shows):
+    """Catalog sizes for ``shows`` shows; they grow slower than the show
+    count because the same bands and venues come back."""
+    return {
+        "bands": int(2 * shows ** 0.85) + 20,
+        "venues": int(2 * shows ** 0.6) + 5,
+        "festivals": max(3, int(shows ** 0.5 / 3)),
+        "upcoming": min(5_000, max(100, shows // 50)),
+    }
+
+
+def zipf_weights(n, exponent):
+    """Cumulative weights of ranks 1..n under a Zipf distribution."""
+    return list(itertools.accumulate(1 / rank ** exponent for rank in range(1, n + 1)))
+
+
+def pseudo_word(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+
+
+def band_name(rng):
+    pattern = rng.randrange(7)
+    if pattern == 0:
+        return f"The {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}s"
+    if pattern == 1:
+        return f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}"
+    if pattern == 2:
+        return f"{rng.choice(NOUNS)} of {rng.choice(NOUNS)}s"
+    if pattern == 3:
+        return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    if pattern == 4:
+        return f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {rng.choice(KINDS)}"
+    if pattern == 5:
+        return f"The {pseudo_word(rng)}s"
+    return f"{pseudo_word(rng)} {rng.choice(NOUNS)}"
+
+
+def venue_name(rng):
+    if rng.random() < 0.3:
+        return f"The {pseudo_word(rng)}"
+    return f"{rng.choice([pseudo_word(rng), rng.choice(ADJECTIVES)])} {rng.choice(VENUE_KINDS)}"
+
+
+def unique_names(rng, count, make):
+    """``count`` distinct names from ``make(rng)``, numbering repeats."""
+    seen = set()
+    names = []
+    while len(names) < count:
+        name = make(rng)
+        if name.casefold() in seen:
+            name = f"{name} {len(names)}"
+            if name.casefold() in seen:
+                continue
+        seen.add(name.casefold())
+        names.append(name)
+    return names
+
+
+def alias_name(name, rng):
+    """Another spelling of a band name, as it might appear on a flyer."""
+    if name.startswith("The "):
+        return name[4:]
+    return rng.choice([f"The {name}", f"{name} (US)", f"{name} Band", name.upper()])
+
+
+@contextmanager
+def suspended_triggers(conn):
+    """Drop every trigger for a bulk load and recreate it afterwards."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'")
+    triggers = [(row['name'], row['sql']) for row in cursor.fetchall()]
+    for name, _sql in triggers:
+        cursor.execute(f"DROP TRIGGER {name}")
+    conn.commit()
+    try:
+        yield
+    finally:
+        for _name, sql in triggers:
+            cursor.execute(sql)
+        conn.commit()
+
+
+def create_upcoming_table(cursor):
+    """event_watch's upcoming_shows table (event_watch creates it in production)."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS upcoming_shows (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_name TEXT, date TEXT, venue TEXT, matched_artist TEXT,
+            price TEXT, url TEXT, event_key TEXT UNIQUE, discovered_at TEXT, rsvp TEXT
+        )
+    """)
+
+
+def generate(conn, shows, seed=0, today=None, progress=None):
+    """Fill an empty database with ``shows`` synthetic shows and their
+    bands, venues, events and upcoming listings.
+
+    ``progress(done, total)`` is called after each chunk of shows. Returns
+    the number of rows inserted per table.
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+    counts = scale_counts(shows)
+
+    cursor = conn.cursor()
+    create_upcoming_table(cursor)
+    conn.commit()
+    migrate(conn)
+    cursor.execute("SELECT COUNT(*) FROM shows")
+    if cursor.fetchone()[0]:
+        raise ValueError("database already has shows; generate into an empty one")
+
+    # Bands, in popularity order (id 1 is the most seen), then aliases
+    names = unique_names(rng, counts["bands"], band_name)
+    bands = [(band_id, name, None) for band_id, name in enumerate(names, 1)]
+    aliases = {}  # primary id -> alias ids
+    taken = {name.casefold() for name in names}
+    for primary_id in rng.sample(range(1, len(names) + 1), int(len(names) * ALIAS_SHARE)):
+        for _ in range(rng.choice([1, 1, 2])):
+            alias = alias_name(names[primary_id - 1], rng)
+            if alias.casefold() in taken:
+                continue
+            taken.add(alias.casefold())
+            bands.append((len(bands) + 1, alias, primary_id))
+            aliases.setdefault(primary_id, []).append(len(bands))
+
+    venues = []
+    for venue_id, name in enumerate(unique_names(rng, counts["venues"], venue_name), 1):
+        location = None if rng.random() < 0.05 else rng.choice(CITIES)
+        venues.append((venue_id, name, location, int(rng.random() < 0.1)))
+    festivals = unique_names(
+        rng, counts["festivals"],
+        lambda rng: f"{rng.choice([pseudo_word(rng), rng.choice(NOUNS)])} {rng.choice(FESTIVAL_WORDS)}",
+    )
+
+    # More shows in recent years, headliners more popular than openers
+    first_day = date(FIRST_YEAR, 1, 1)
+    span = (today - first_day).days
+    days = sorted(int(rng.triangular(0, span, span)) for _ in range(shows))
+    headliners = zipf_weights(len(names), 0.8)
+    openers = zipf_weights(len(names), 0.6)
+    venue_weights = zipf_weights(len(venues), 1.0)
+    band_ids = range(1, len(names) + 1)
+    venue_ids = range(1, len(venues) + 1)
+    events = {}  # name -> id
+    lineup_rows = 0
+
+    with suspended_triggers(conn):
+        cursor.executemany("INSERT INTO bands (id, name, primary_band_id) VALUES (?, ?, ?)", bands)
+        cursor.executemany(
+            "INSERT INTO venues (id, name, location, closed) VALUES (?, ?, ?, ?)", venues
+        )
+        for start in range(0, shows, CHUNK):
+            show_rows, lineups = [], []
+            for show_id in range(start + 1, min(start + CHUNK, shows) + 1):
+                day = first_day + timedelta(days=days[show_id - 1])
+                event_id = None
+                if rng.random() < EVENT_SHARE:
+                    event = f"{rng.choice(festivals)} {day.year}"
+                    event_id = events.setdefault(event, len(events) + 1)
+                venue_id = rng.choices(venue_ids, cum_weights=venue_weights)[0]
+                show_rows.append((show_id, day.isoformat(), venue_id, event_id))
+
+                size = rng.choices(LINEUP_SIZES, LINEUP_WEIGHTS)[0]
+                lineup = rng.choices(band_ids, cum_weights=headliners)
+                lineup += rng.choices(band_ids, cum_weights=openers, k=size - 1)
+                order = 0
+                for band_id in dict.fromkeys(lineup):
+                    if band_id in aliases and rng.random() < ALIAS_PLAYS:
+                        band_id = rng.choice(aliases[band_id])
+                    order += 1
+                    lineups.append((show_id, band_id, order))
+            cursor.executemany(
+                "INSERT INTO shows (id, date, venue_id, event_id) VALUES (?, ?, ?, ?)", show_rows
+            )
+            cursor.executemany(
+                "INSERT INTO show_bands (show_id, band_id, band_order) VALUES (?, ?, ?)", lineups
+            )
+            lineup_rows += len(lineups)
+            conn.commit()
+            if progress:
+                progress(start + len(show_rows), shows)
+
+        cursor.executemany(
+            "INSERT INTO events (id, name) VALUES (?, ?)",
+            [(event_id, name) for name, event_id in events.items()],
+        )
+        summary.fill(cursor)
+        aggregates.fill(cursor)
+        search.fill(cursor)
+        touch_catalog_versions(cursor)
+        conn.commit()
+
+    upcoming = generate_upcoming(rng, counts["upcoming"], names, venues, headliners, today)
+    cursor.executemany(
+        "INSERT INTO upcoming_shows (event_name, date, venue, matched_artist, price, url,"
+        " event_key, discovered_at, rsvp) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        upcoming,
+    )
+    conn.commit()
+    return {
+        "bands": len(bands), "venues": len(venues), "events": len(events),
+        "shows": shows, "show_bands": lineup_rows, "upcoming_shows": len(upcoming),
+    }
+
+
+def generate_upcoming(rng, count, names, venues, headliners, today):
+    """Listings from two weeks ago to six months out, mostly at known venues."""
+    band_ids = range(len(names))
+    rows = []
+    for i in range(count):
+        day = today + timedelta(days=rng.randint(-14, 180))
+        picks = rng.choices(band_ids, cum_weights=headliners, k=rng.randint(1, 3))
+        lineup = [names[band] for band in dict.fromkeys(picks)]
+        if rng.random() < 0.8:
+            venue = rng.choice(venues)[1]
+        else:
+            venue = venue_name(rng)
+        discovered = day - timedelta(days=rng.randint(1, 60))
+        rows.append((
+            ", ".join(lineup),
+            day.isoformat(),
+            venue,
+            lineup[0],
+            f"${rng.randint(10, 80)}" if rng.random() < 0.7 else None,
+            f"https://tickets.example.com/e/{i}",
+            f"synthetic-{i}",
+            discovered.isoformat(),
+            rng.choices(RSVPS, RSVP_WEIGHTS)[0],
+        ))
+    return rows
+
+
+if __name__ == "__main__":
+    from db import connect
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help="SQLite file to create")
+    parser.add_argument("--scale", choices=SCALES, default="1k")
+    parser.add_argument("--shows", type=int, help="number of shows (overrides --scale)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--force", action="store_true", help="replace an existing file")
+    args = parser.parse_args()
+
+    if os.path.exists(args.path):
+        if not args.force:
+            parser.error(f"{args.path} exists (use --force to replace it)")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.path + suffix):
+                os.remove(args.path + suffix)
+
+    conn = connect("sqlite", path=args.path)
+    inserted = generate(
+        conn,
+        args.shows or SCALES[args.scale],
+        seed=args.seed,
+        progress=lambda done, total: print(f"\r{done}/{total} shows", end="", flush=True),
+    )
+    print()
+    print(", ".join(f"{count} {table}" for table, count in inserted.items()))
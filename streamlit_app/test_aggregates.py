@@ -0,0 +1,98 @@
+"""
+Tests for the precomputed stats tables
+Run against the in-memory backend, so no Turso credentials are needed
+"""
+import pytest
+
+
+@pytest.fixture
+def conn(conn):
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO venues (name) VALUES ('Casbah'), ('Belly Up')")
+    cursor.execute("INSERT INTO events (name) VALUES ('Desert Daze')")
+    cursor.execute("INSERT INTO bands (name) VALUES ('Tool'), ('TOOL (live)'), ('Mastodon')")
+    shows = [
+        ("2019-10-05", 1, 1, [1, 3]),
+        ("2019-12-01", 2, None, [2]),
+        ("2021-03-14", 1, None, [3]),
+    ]
+    for date, venue_id, event_id, lineup in shows:
+        cursor.execute(
+            "INSERT INTO shows (date, venue_id, event_id) VALUES (?, ?, ?)",
+            (date, venue_id, event_id),
+        )
+        show_id = cursor.lastrowid
+        for order, band_id in enumerate(lineup):
+            cursor.execute(
+                "INSERT INTO show_bands (show_id, band_id, band_order) VALUES (?, ?, ?)",
+                (show_id, band_id, order),
+            )
+    conn.commit()
+    return conn
+
+
+def stats(conn, table):
+    cursor = conn.cursor().execute(f"SELECT * FROM {table} ORDER BY 1")
+    return [tuple(row) for row in cursor.fetchall()]
+
+
+class TestStatsTables:
+    """Test that triggers keep the stats tables equal to a full recomputation"""
+
+    def test_inserts(self, conn):
+        from aggregates import verify
+        assert verify(conn) == {}
+        assert stats(conn, "venue_stats") == [
+            (1, 2, "2019-10-05", "2021-03-14"),
+            (2, 1, "2019-12-01", "2019-12-01"),
+        ]
+        assert stats(conn, "year_stats") == [
+            (2019, 2, "2019-10-05", "2019-12-01"),
+            (2021, 1, "2021-03-14", "2021-03-14"),
+        ]
+        assert stats(conn, "event_stats") == [(1, 1, "2019-10-05", "2019-10-05")]
+
+    def test_edit_and_delete_show(self, conn):
+        from aggregates import verify
+        cursor = conn.cursor()
+        cursor.execute("UPDATE shows SET date = '2022-01-01', venue_id = 2, event_id = 1 WHERE id = 3")
+        cursor.execute("DELETE FROM shows WHERE id = 1")
+        cursor.execute("DELETE FROM show_bands WHERE show_id = 1")
+        conn.commit()
+
+        assert verify(conn) == {}
+        assert stats(conn, "venue_stats") == [(2, 2, "2019-12-01", "2022-01-01")]
+        assert [row[0] for row in stats(conn, "year_stats")] == [2019, 2022]
+
+    def test_grouping_moves_band_counts(self, conn):
+        from aggregates import verify
+        cursor = conn.cursor()
+        cursor.execute("UPDATE bands SET primary_band_id = 1 WHERE id = 2")
+        conn.commit()
+        assert verify(conn) == {}
+        assert stats(conn, "band_stats")[0] == (1, 2, "2019-10-05", "2019-12-01")
+
+        cursor.execute("UPDATE bands SET primary_band_id = NULL WHERE id = 2")
+        conn.commit()
+        assert verify(conn) == {}
+        assert stats(conn, "band_stats")[0] == (1, 1, "2019-10-05", "2019-10-05")
+
+    def test_verify_reports_drift_and_rebuild_fixes_it(self, conn):
+        import aggregates
+        cursor = conn.cursor()
+        cursor.execute("UPDATE venue_stats SET show_count = 99 WHERE venue_id = 1")
+        cursor.execute("DELETE FROM year_stats WHERE year = 2021")
+        conn.commit()
+
+        problems = aggregates.verify(conn)
+        assert set(problems) == {"venue_stats", "year_stats"}
+        missing, stale = problems["venue_stats"]
+        assert missing == [(1, 2, "2019-10-05", "2021-03-14")]
+        assert stale == [(1, 99, "2019-10-05", "2021-03-14")]
+
+        aggregates.rebuild(conn)
+        assert aggregates.verify(conn) == {}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -460,6 +460,227 @@ class TestBandNameParsing:
         from app import match_band_name
         assert match_band_name("Control Defect", ["Control", "Tool"]) == "Control Defect"
 
+    def test_match_band_normalized(self):
+        from app import match_band_name
+        assert match_band_name("Sigur Ros", ["Sigur Rós"]) == "Sigur Rós"
+        assert match_band_name("National", ["The National"]) == "The National"
+
+    def test_match_venue_index(self):
+        from app import match_venue_name
+        from names import NameIndex
+        index = NameIndex.from_names(["Casbah", "The Sinclair"])
+        assert match_venue_name("sinclair", index) == (1, "The Sinclair")
+        assert match_venue_name("Soma", index) == (None, "Soma")
+
+
+class TestShowPagination:
+    """Test keyset paging of the show list (in-memory backend)"""
+
+    @pytest.fixture
+    def shows(self):
+        from db import get_db
+        conn = get_db()
+        cursor = conn.cursor()
+        cursor.execute("INSERT OR IGNORE INTO venues (name) VALUES ('Paging Test Hall')")
+        cursor.execute("SELECT id FROM venues WHERE name = 'Paging Test Hall'")
+        venue_id = cursor.fetchone()[0]
+        # Several shows share a date so paging has to break ties on id
+        for date in ["2031-01-01"] * 3 + ["2031-02-01", "2031-03-01"] * 2:
+            cursor.execute("INSERT INTO shows (date, venue_id) VALUES (?, ?)", (date, venue_id))
+        conn.commit()
+        yield
+        cursor.execute("DELETE FROM shows WHERE venue_id = ?", (venue_id,))
+        cursor.execute("DELETE FROM venues WHERE id = ?", (venue_id,))
+        conn.commit()
+
+    def test_pages_cover_every_show_once(self, shows):
+        from db import get_db
+        from queries import load_shows
+        conn = get_db()
+        expected = [row['id'] for row in load_shows(conn, year=2031)]
+        assert len(expected) == 7
+
+        seen, before = [], None
+        while True:
+            page = load_shows(conn, year=2031, limit=3, before=before)
+            if not page:
+                break
+            assert len(page) <= 3
+            seen.extend(row['id'] for row in page)
+            before = (page[-1]['date'], page[-1]['id'])
+        assert seen == expected
+
+    def test_count_matches_filters(self, shows):
+        from db import get_db
+        from queries import count_shows
+        assert count_shows(get_db(), year=2031) == 7
+        assert count_shows(get_db(), year=2032) == 0
+
+    def test_years_listed_newest_first(self, shows):
+        from db import get_db
+        from queries import load_years
+        years = list(load_years(get_db()))
+        assert "2031" in years
+        assert years == sorted(set(years), reverse=True)
+
+    def test_year_range(self):
+        from queries import year_range
+        assert year_range("2019") == ("2019-01-01", "2020-01-01")
+
+
+class TestOrphanCleanup:
+    """Test delete_show() orphan cleanup and vacuum_orphans() (in-memory backend)"""
+
+    @pytest.fixture
+    def cursor(self):
+        from db import get_db
+        conn = get_db()
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO venues (name) VALUES ('Orphan Hall'), ('Orphan Arena')")
+        cursor.execute("INSERT INTO events (name) VALUES ('Orphan Fest')")
+        cursor.execute("INSERT INTO bands (name) VALUES ('Orphan Solo'), ('Orphan Shared')")
+        conn.commit()
+        yield cursor
+        cursor.execute(
+            "DELETE FROM shows WHERE venue_id IN (SELECT id FROM venues WHERE name LIKE 'Orphan %')"
+        )
+        cursor.execute("UPDATE bands SET primary_band_id = NULL WHERE name LIKE 'Orphan %'")
+        conn.commit()
+        from app import vacuum_orphans
+        vacuum_orphans()
+
+    def add_show(self, cursor, venue, event, bands):
+        cursor.execute(
+            "INSERT INTO shows (date, venue_id, event_id) VALUES ('2030-01-01',"
+            " (SELECT id FROM venues WHERE name = ?), (SELECT id FROM events WHERE name = ?))",
+            (venue, event),
+        )
+        show_id = cursor.lastrowid
+        for order, band in enumerate(bands, 1):
+            cursor.execute(
+                "INSERT INTO show_bands (show_id, band_id, band_order)"
+                " VALUES (?, (SELECT id FROM bands WHERE name = ?), ?)",
+                (show_id, band, order),
+            )
+        return show_id
+
+    def names(self, cursor, table):
+        cursor.execute(f"SELECT name FROM {table} WHERE name LIKE 'Orphan %'")
+        return {row['name'] for row in cursor.fetchall()}
+
+    def test_delete_show_removes_only_its_orphans(self, cursor):
+        from app import delete_show
+        from db import get_db
+        show_id = self.add_show(cursor, "Orphan Hall", "Orphan Fest", ["Orphan Solo", "Orphan Shared"])
+        self.add_show(cursor, "Orphan Arena", None, ["Orphan Shared"])
+        get_db().commit()
+
+        assert delete_show(show_id)
+        assert self.names(cursor, "bands") == {"Orphan Shared"}
+        assert self.names(cursor, "venues") == {"Orphan Arena"}
+        assert self.names(cursor, "events") == set()
+
+    def test_vacuum_keeps_group_primaries(self, cursor):
+        from app import vacuum_orphans
+        from db import get_db
+        self.add_show(cursor, "Orphan Arena", None, ["Orphan Shared"])
+        cursor.execute("INSERT INTO bands (name) VALUES ('Orphan Primary')")
+        cursor.execute(
+            "UPDATE bands SET primary_band_id = (SELECT id FROM bands WHERE name = 'Orphan Primary')"
+            " WHERE name = 'Orphan Shared'"
+        )
+        get_db().commit()
+
+        deleted = vacuum_orphans()
+        assert deleted["bands"] >= 1
+        assert self.names(cursor, "bands") == {"Orphan Shared", "Orphan Primary"}
+        assert self.names(cursor, "venues") == {"Orphan Arena"}
+
+
+class TestBulkGetOrCreate:
+    """Test set-based name resolution and lineup inserts (in-memory backend)"""
+
+    @pytest.fixture
+    def conn(self, conn):
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO bands (name) VALUES ('Tool'), ('Mastodon')")
+        cursor.execute("INSERT INTO venues (name) VALUES ('Casbah')")
+        conn.commit()
+        return conn
+
+    def test_resolves_existing_and_creates_missing(self, conn):
+        from queries import get_or_create_names
+        cursor = conn.cursor()
+        ids = get_or_create_names(cursor, "bands", ["Pelican", "Tool", "Pelican", "Baroness"])
+        conn.commit()
+
+        assert ids["Tool"] == 1
+        assert set(ids) == {"Pelican", "Tool", "Baroness"}
+        cursor.execute("SELECT name, id FROM bands")
+        assert {row['name']: row['id'] for row in cursor.fetchall()} == {**ids, "Mastodon": 2}
+
+    def test_empty_names(self, conn):
+        from queries import get_or_create_names
+        assert get_or_create_names(conn.cursor(), "events", []) == {}
+
+    def test_insert_lineup_keeps_billing_order(self, conn):
+        from queries import insert_lineup
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO shows (date, venue_id) VALUES ('2019-10-05', 1)")
+        show_id = cursor.lastrowid
+        insert_lineup(cursor, show_id, ["Mastodon", "Pelican", "Tool"])
+        conn.commit()
+
+        cursor.execute("SELECT lineup FROM show_summary WHERE show_id = ?", (show_id,))
+        assert cursor.fetchone()['lineup'] == "Mastodon, Pelican, Tool"
+
+
+class TestUpdateLineup:
+    """Test diff-based lineup edits (in-memory backend)"""
+
+    @pytest.fixture
+    def conn(self, conn):
+        from queries import insert_lineup
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO venues (name) VALUES ('Casbah')")
+        cursor.execute("INSERT INTO shows (date, venue_id) VALUES ('2019-10-05', 1)")
+        insert_lineup(cursor, 1, ["Tool", "Mastodon", "Pelican"])
+        conn.commit()
+        return conn
+
+    def lineup(self, conn):
+        cursor = conn.cursor().execute("""
+            SELECT sb.id, b.name FROM show_bands sb JOIN bands b ON b.id = sb.band_id
+            WHERE sb.show_id = 1 ORDER BY sb.band_order
+        """)
+        return [(row['id'], row['name']) for row in cursor.fetchall()]
+
+    def test_reorder_keeps_rows(self, conn):
+        from queries import update_lineup
+        before = dict((name, row_id) for row_id, name in self.lineup(conn))
+        assert update_lineup(conn.cursor(), 1, ["Pelican", "Tool", "Mastodon"]) == []
+        conn.commit()
+        after = self.lineup(conn)
+        assert [name for _id, name in after] == ["Pelican", "Tool", "Mastodon"]
+        assert all(before[name] == row_id for row_id, name in after)
+
+    def test_add_and_drop(self, conn):
+        from queries import update_lineup
+        cursor = conn.cursor()
+        removed = update_lineup(cursor, 1, ["Tool", "Baroness", "Pelican"])
+        conn.commit()
+        cursor.execute("SELECT id FROM bands WHERE name = 'Mastodon'")
+        assert removed == [cursor.fetchone()['id']]
+        assert [name for _id, name in self.lineup(conn)] == ["Tool", "Baroness", "Pelican"]
+
+    def test_unchanged_lineup_writes_nothing(self, conn):
+        from queries import update_lineup
+        before = self.lineup(conn)
+        checkouts = conn.stats()["writer_checkouts"]
+        assert update_lineup(conn.cursor(), 1, ["Tool", "Mastodon", "Pelican"]) == []
+        assert conn.stats()["writer_checkouts"] == checkouts
+        assert self.lineup(conn) == before
+
 
 if __name__ == "__main__":
     # Run tests with pytest
@@ -0,0 +1,166 @@
+"""
+Tests for the venue geocoding backfill
+"""
+import threading
+
+import pytest
+
+PLACES = {
+    "the sinclair": ("The Sinclair, Cambridge, MA", 42.37, -71.12),
+    "paradise rock club": ("Paradise Rock Club, Boston, MA", 42.35, -71.12),
+    "paradise rock club, boston, ma": ("967 Commonwealth Ave, Boston, MA", 42.35, -71.12),
+}
+
+
+class FakeGeocoder:
+    """fetch() stand-in that records queries and can fail on demand"""
+
+    def __init__(self, failures=None):
+        self.queries = []
+        self.failures = dict(failures or {})
+        self.lock = threading.Lock()
+
+    def __call__(self, query):
+        key = query.casefold()
+        with self.lock:
+            self.queries.append(key)
+            if self.failures.get(key):
+                self.failures[key] -= 1
+                raise OSError("timed out")
+        return PLACES.get(key)
+
+
+@pytest.fixture
+def conn(conn):
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT INTO venues (name, location) VALUES (?, ?)",
+        [("The Sinclair", None), ("Paradise Rock Club", "Boston, MA"), ("Nowhere Hall", None)],
+    )
+    conn.commit()
+    return conn
+
+
+def run(conn, fetch, **kwargs):
+    from backfill import backfill
+    from geocode import TokenBucket
+
+    kwargs.setdefault("backoff", 0)
+    return backfill(conn, fetch=fetch, bucket=TokenBucket(rate=1000, capacity=10), **kwargs)
+
+
+def venues(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT name, location, lat, lon FROM venues ORDER BY id")
+    return [tuple(row) for row in cursor.fetchall()]
+
+
+class TestBackfill:
+    """Test filling in venue addresses and coordinates"""
+
+    def test_fills_missing_location_and_coordinates(self, conn):
+        counts = run(conn, FakeGeocoder(), batch_size=1)
+        assert (counts["found"], counts["not_found"]) == (2, 1)
+        assert venues(conn) == [
+            ("The Sinclair", "The Sinclair, Cambridge, MA", 42.37, -71.12),
+            # The location on file is kept; only coordinates are added
+            ("Paradise Rock Club", "Boston, MA", 42.35, -71.12),
+            ("Nowhere Hall", None, None, None),
+        ]
+
+    def test_rerun_only_looks_up_what_is_left(self, conn):
+        run(conn, FakeGeocoder())
+        fetch = FakeGeocoder()
+        counts = run(conn, fetch)
+        # Nowhere Hall's miss is cached
+        assert fetch.queries == []
+        assert counts["skipped"] == 1
+
+        counts = run(conn, fetch, retry_misses=True)
+        assert fetch.queries == ["nowhere hall"]
+
+    def test_limited_runs_pass_cached_misses(self, conn, monkeypatch):
+        monkeypatch.setitem(PLACES, "the middle east", ("The Middle East, Cambridge, MA", 42.36, -71.10))
+        cursor = conn.cursor()
+        cursor.executemany("INSERT INTO venues (name) VALUES (?)", [(f"Nowhere Hall {i}",) for i in range(4)])
+        cursor.execute("INSERT INTO venues (name) VALUES ('The Middle East')")
+        conn.commit()
+
+        # More misses than the limit: each run starts after the cached ones
+        fetch = FakeGeocoder()
+        assert run(conn, fetch, limit=3)["not_found"] == 1
+        counts = run(conn, fetch, limit=3)
+        assert (counts["skipped"], counts["not_found"]) == (1, 3)
+        counts = run(conn, fetch, limit=3)
+        assert (counts["skipped"], counts["not_found"], counts["found"]) == (4, 1, 1)
+        assert fetch.queries[-1] == "the middle east"
+        assert venues(conn)[-1][2] == 42.36
+
+    def test_failures_are_retried(self, conn):
+        fetch = FakeGeocoder(failures={"the sinclair": 1})
+        counts = run(conn, fetch, retries=1)
+        assert counts["failed"] == 0
+        assert fetch.queries.count("the sinclair") == 2
+
+    def test_persistent_failure_is_not_cached(self, conn):
+        fetch = FakeGeocoder(failures={"the sinclair": 5})
+        counts = run(conn, fetch, retries=1)
+        assert counts["failed"] == 1
+        assert venues(conn)[0] == ("The Sinclair", None, None, None)
+
+        # The next run picks it up again
+        fetch = FakeGeocoder()
+        run(conn, fetch)
+        assert fetch.queries == ["the sinclair"]
+        assert venues(conn)[0][2] == 42.37
+
+    def test_reuses_dialog_lookup_by_name(self, conn):
+        from geocode import GeocodeResult, store
+
+        cursor = conn.cursor()
+        cursor.execute("UPDATE venues SET location = 'The Sinclair, Cambridge, MA' WHERE name = 'The Sinclair'")
+        store(cursor, GeocodeResult("the sinclair", "The Sinclair, Cambridge, MA", 42.37, -71.12, None))
+        conn.commit()
+
+        fetch = FakeGeocoder()
+        run(conn, fetch)
+        assert "the sinclair, the sinclair, cambridge, ma" not in fetch.queries
+        assert venues(conn)[0][2:] == (42.37, -71.12)
+
+    def test_interrupted_run_keeps_finished_batches(self, conn):
+        class Interrupt(Exception):
+            pass
+
+        def progress(done, total):
+            if done == 2:
+                raise Interrupt
+
+        with pytest.raises(Interrupt):
+            run(conn, FakeGeocoder(), workers=1, batch_size=10, progress=progress)
+
+        from queries import count_missing_locations
+        # Resolved before the interruption, written on the way out
+        assert count_missing_locations(conn) == 1
+        fetch = FakeGeocoder()
+        run(conn, fetch)
+        assert fetch.queries == ["nowhere hall"]
+
+    def test_location_edit_clears_coordinates(self, conn):
+        run(conn, FakeGeocoder())
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            UPDATE venues SET location = ?,
+                lat = CASE WHEN location IS ? THEN lat END,
+                lon = CASE WHEN location IS ? THEN lon END
+            WHERE name = 'Paradise Rock Club'
+            """,
+            ("Allston, MA", "Allston, MA", "Allston, MA"),
+        )
+        conn.commit()
+        from backfill import missing_venues
+        assert [name for _id, name, _loc in missing_venues(cursor)] == ["Paradise Rock Club", "Nowhere Hall"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,696 @@
+"""
+Tests for the db.py connection layer
+Uses fake libsql connections so no Turso credentials are needed
+"""
+import pytest
+import sqlite3
+import threading
+import time
+
+
+class FakeLibsqlConnection:
+    """Minimal stand-in for a libsql_experimental connection."""
+
+    def __init__(self, fail_syncs=0, sync_delay=0):
+        self.fail_syncs = fail_syncs
+        self.sync_delay = sync_delay
+        self.sync_calls = 0
+        self.commits = 0
+        self.synced = threading.Event()
+
+    def sync(self):
+        self.sync_calls += 1
+        time.sleep(self.sync_delay)
+        if self.fail_syncs:
+            self.fail_syncs -= 1
+            raise RuntimeError("remote unavailable")
+        self.synced.set()
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+class TestRow:
+    """Test the tuple-backed Row and shared RowSchema"""
+
+    @pytest.fixture
+    def cursor(self):
+        from db import Cursor
+
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE bands (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.executemany("INSERT INTO bands (name) VALUES (?)", [("Radiohead",), ("Tool",)])
+        return Cursor(conn.cursor())
+
+    def test_access_by_name_and_index(self, cursor):
+        row = cursor.execute("SELECT id, name FROM bands ORDER BY id").fetchone()
+        assert row["name"] == "Radiohead"
+        assert row[0] == 1
+        assert row[-1] == "Radiohead"
+        assert row.keys() == ["id", "name"]
+        assert dict(zip(row.keys(), row)) == {"id": 1, "name": "Radiohead"}
+
+    def test_unknown_column_raises_key_error(self, cursor):
+        row = cursor.execute("SELECT name FROM bands").fetchone()
+        with pytest.raises(KeyError):
+            row["missing"]
+
+    def test_rows_share_one_schema(self, cursor):
+        rows = cursor.execute("SELECT id, name FROM bands").fetchall()
+        assert rows[0]._schema is rows[1]._schema
+
+    def test_schema_rebuilt_per_execute(self, cursor):
+        cursor.execute("SELECT name FROM bands").fetchall()
+        row = cursor.execute("SELECT id AS band_id FROM bands").fetchone()
+        assert row.keys() == ["band_id"]
+
+    def test_rows_survive_pickle(self, cursor):
+        """st.cache_data pickles cached query results"""
+        import pickle
+
+        rows = cursor.execute("SELECT id, name FROM bands").fetchall()
+        restored = pickle.loads(pickle.dumps(rows))
+        assert restored == rows
+        assert restored[1]["name"] == "Tool"
+        assert restored[0]._schema is restored[1]._schema
+
+
+class TestCursorStreaming:
+    """Test fetchmany, iteration and stream() batching"""
+
+    @pytest.fixture
+    def cursor(self):
+        from db import Cursor
+
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE shows (id INTEGER PRIMARY KEY, date TEXT)")
+        conn.executemany(
+            "INSERT INTO shows (date) VALUES (?)",
+            [(f"2020-01-{d:02d}",) for d in range(1, 26)],
+        )
+        return Cursor(conn.cursor())
+
+    def test_fetchmany_batches(self, cursor):
+        cursor.execute("SELECT id, date FROM shows ORDER BY id")
+        assert [r["id"] for r in cursor.fetchmany(10)] == list(range(1, 11))
+        assert len(cursor.fetchmany(10)) == 10
+        assert len(cursor.fetchmany(10)) == 5
+        assert cursor.fetchmany(10) == []
+
+    def test_fetchmany_defaults_to_arraysize(self, cursor):
+        cursor.arraysize = 7
+        cursor.execute("SELECT id FROM shows")
+        assert len(cursor.fetchmany()) == 7
+
+    def test_iteration_yields_all_rows(self, cursor):
+        cursor.arraysize = 4
+        cursor.execute("SELECT id FROM shows ORDER BY id")
+        assert [row["id"] for row in cursor] == list(range(1, 26))
+
+    def test_stream_yields_batches_sharing_schema(self, cursor):
+        cursor.execute("SELECT id, date FROM shows")
+        batches = list(cursor.stream(batch_size=10))
+        assert [len(b) for b in batches] == [10, 10, 5]
+        schemas = {id(row._schema) for batch in batches for row in batch}
+        assert len(schemas) == 1
+
+    def test_stream_continues_after_fetchone(self, cursor):
+        cursor.execute("SELECT id FROM shows ORDER BY id")
+        assert cursor.fetchone()["id"] == 1
+        assert sum(len(b) for b in cursor.stream(batch_size=8)) == 24
+
+    def test_empty_result(self, cursor):
+        cursor.execute("SELECT id FROM shows WHERE id < 0")
+        assert list(cursor) == []
+        assert list(cursor.stream()) == []
+
+
+class TestFetchColumns:
+    """Test column-oriented fetches for analytics"""
+
+    @pytest.fixture
+    def cursor(self):
+        from db import Cursor
+
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE stats (year TEXT, show_count INTEGER, avg_price REAL, note TEXT)")
+        conn.executemany(
+            "INSERT INTO stats VALUES (?, ?, ?, ?)",
+            [("2024", 12, 25.5, None), ("2023", 9, 20, "x")],
+        )
+        return Cursor(conn.cursor())
+
+    def test_columns_by_type(self, cursor):
+        from array import array
+
+        cols = cursor.execute("SELECT * FROM stats ORDER BY year DESC").fetch_columns()
+        assert cols.names == ("year", "show_count", "avg_price", "note")
+        assert len(cols) == 2
+        assert cols["year"] == ["2024", "2023"]
+        assert cols["show_count"] == array("q", [12, 9])
+        assert cols["avg_price"] == array("d", [25.5, 20.0])
+        assert cols["note"] == [None, "x"]
+
+    def test_column_falls_back_on_first_misfit(self, cursor):
+        from array import array
+
+        cols = cursor.execute(
+            "SELECT column1 AS n, column2 AS v FROM (VALUES (1, 1), (2, 'x'), (2.5, 3))"
+        ).fetch_columns()
+        assert cols["n"] == array("d", [1.0, 2.0, 2.5])
+        assert cols["v"] == [1, "x", 3]
+
+    def test_numpy_columns(self, cursor):
+        np = pytest.importorskip("numpy")
+
+        cols = cursor.execute("SELECT show_count, year FROM stats").fetch_columns(numpy=True)
+        assert isinstance(cols["show_count"], np.ndarray)
+        assert cols["show_count"].sum() == 21
+        assert cols["year"] == ["2024", "2023"]
+
+    def test_empty_result_keeps_names(self, cursor):
+        cols = cursor.execute("SELECT year, show_count FROM stats WHERE 0").fetch_columns()
+        assert cols.names == ("year", "show_count")
+        assert len(cols) == 0
+        assert not cols
+        assert cols["year"] == []
+
+    def test_chart_dict_from_columns(self, cursor):
+        cols = cursor.execute("SELECT year, show_count FROM stats ORDER BY year").fetch_columns()
+        assert dict(zip(cols["year"], cols["show_count"])) == {"2023": 9, "2024": 12}
+
+
+class TestReplicaSyncer:
+    """Test the background replica syncer"""
+
+    def test_successful_sync_records_metrics(self):
+        from db import ReplicaSyncer
+
+        syncer = ReplicaSyncer(FakeLibsqlConnection(sync_delay=0.01))
+        assert syncer.sync_age is None
+
+        assert syncer.sync() is True
+        assert syncer.sync_age is not None and syncer.sync_age < 1
+        assert syncer.last_sync_duration >= 0.01
+        assert syncer.consecutive_failures == 0
+        assert syncer.last_error is None
+
+    def test_failed_sync_records_error(self):
+        from db import ReplicaSyncer
+
+        syncer = ReplicaSyncer(FakeLibsqlConnection(fail_syncs=2))
+        assert syncer.sync() is False
+        assert syncer.sync() is False
+        assert syncer.consecutive_failures == 2
+        assert isinstance(syncer.last_error, RuntimeError)
+
+        assert syncer.sync() is True
+        assert syncer.consecutive_failures == 0
+        assert syncer.total_failures == 2
+        assert syncer.last_error is None
+
+    def test_backoff_doubles_and_caps(self):
+        from db import ReplicaSyncer
+
+        syncer = ReplicaSyncer(FakeLibsqlConnection(fail_syncs=10), interval=10, jitter=0, max_backoff=60)
+        assert syncer.next_delay() == 10
+        syncer.sync()
+        assert syncer.next_delay() == 20
+        syncer.sync()
+        assert syncer.next_delay() == 40
+        syncer.sync()
+        assert syncer.next_delay() == 60
+
+    def test_jitter_stays_in_range(self):
+        from db import ReplicaSyncer
+
+        syncer = ReplicaSyncer(FakeLibsqlConnection(), interval=10, jitter=5)
+        delays = [syncer.next_delay() for _ in range(100)]
+        assert all(10 <= d <= 15 for d in delays)
+
+    def test_background_thread_syncs(self):
+        from db import ReplicaSyncer
+
+        raw = FakeLibsqlConnection()
+        syncer = ReplicaSyncer(raw, interval=0.01, jitter=0).start()
+        try:
+            assert raw.synced.wait(2)
+        finally:
+            syncer.stop()
+        assert syncer.last_sync is not None
+
+    def test_request_sync_wakes_worker(self):
+        from db import ReplicaSyncer
+
+        raw = FakeLibsqlConnection()
+        syncer = ReplicaSyncer(raw, interval=3600, jitter=0).start()
+        try:
+            syncer.request_sync()
+            assert raw.synced.wait(2)
+        finally:
+            syncer.stop()
+
+
+class TestConnectionSync:
+    """Test that Connection reads never block on sync"""
+
+    def test_cursor_does_not_sync(self):
+        from db import Connection, ReplicaSyncer
+
+        class RawWithCursor(FakeLibsqlConnection):
+            def cursor(self):
+                return object()
+
+        raw = RawWithCursor()
+        conn = Connection(raw, syncer=ReplicaSyncer(raw))
+        conn.cursor()
+        assert raw.sync_calls == 0
+
+    def test_commit_syncs_and_updates_age(self):
+        from db import Connection, ReplicaSyncer
+
+        raw = FakeLibsqlConnection()
+        conn = Connection(raw, syncer=ReplicaSyncer(raw))
+        conn.commit()
+        assert raw.commits == 1
+        assert raw.sync_calls == 1
+        assert conn.sync_age is not None
+        assert conn.sync_failures == 0
+
+    def test_sync_failure_exposed_on_connection(self):
+        from db import Connection, ReplicaSyncer
+
+        raw = FakeLibsqlConnection(fail_syncs=1)
+        conn = Connection(raw, syncer=ReplicaSyncer(raw))
+        assert conn.sync() is False
+        assert conn.sync_failures == 1
+        assert isinstance(conn.last_sync_error, RuntimeError)
+
+
+class TestWriteBehind:
+    """Test write-behind commits with group sync"""
+
+    def test_commit_does_not_sync_inline(self):
+        from db import Connection, ReplicaSyncer
+
+        raw = FakeLibsqlConnection()
+        conn = Connection(raw, syncer=ReplicaSyncer(raw), write_behind=True)
+        conn.commit()
+        conn.commit()
+        assert raw.commits == 2
+        assert raw.sync_calls == 0
+        assert conn.pending_commits == 2
+
+    def test_flush_syncs_pending_commits(self):
+        from db import Connection, ReplicaSyncer
+
+        raw = FakeLibsqlConnection()
+        conn = Connection(raw, syncer=ReplicaSyncer(raw), write_behind=True)
+        conn.commit()
+        assert conn.flush() is True
+        assert conn.pending_commits == 0
+        assert raw.sync_calls == 1
+
+        # Nothing pending: flush is free
+        assert conn.flush() is True
+        assert raw.sync_calls == 1
+
+    def test_failed_flush_keeps_commits_pending(self):
+        from db import Connection, ReplicaSyncer
+
+        raw = FakeLibsqlConnection(fail_syncs=1)
+        conn = Connection(raw, syncer=ReplicaSyncer(raw), write_behind=True)
+        conn.commit()
+        assert conn.flush() is False
+        assert conn.pending_commits == 1
+        assert conn.flush() is True
+        assert conn.pending_commits == 0
+
+    def test_worker_coalesces_commit_burst(self):
+        from db import Connection, ReplicaSyncer
+
+        raw = FakeLibsqlConnection()
+        syncer = ReplicaSyncer(raw, interval=3600, jitter=0, commit_delay=0.2)
+        conn = Connection(raw, syncer=syncer.start(), write_behind=True)
+        try:
+            for _ in range(10):
+                conn.commit()
+            assert raw.synced.wait(2)
+            deadline = time.time() + 2
+            while conn.pending_commits and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            syncer.stop()
+        assert conn.pending_commits == 0
+        assert raw.sync_calls == 1
+
+    def test_write_behind_requires_syncer(self):
+        from db import Connection
+
+        raw = FakeLibsqlConnection()
+        conn = Connection(raw, write_behind=True)
+        conn.commit()
+        assert raw.sync_calls == 1
+        assert conn.pending_commits == 0
+
+
+
+class TestConnectionPool:
+    """Test the read/write split connection pool"""
+
+    @pytest.fixture
+    def pool(self, tmp_path):
+        from db import ConnectionPool, LocalConnection
+
+        path = tmp_path / "pool.db"
+
+        def connect():
+            return sqlite3.connect(path, check_same_thread=False, factory=LocalConnection)
+
+        writer = connect()
+        writer.execute("CREATE TABLE bands (id INTEGER PRIMARY KEY, name TEXT UNIQUE)")
+        writer.execute("INSERT INTO bands (name) VALUES ('Radiohead')")
+        writer.commit()
+        return ConnectionPool(writer, connect, size=2, timeout=0.2)
+
+    def run_in_thread(self, fn):
+        result = {}
+
+        def target():
+            try:
+                result["value"] = fn()
+            except Exception as e:
+                result["error"] = e
+
+        t = threading.Thread(target=target)
+        t.start()
+        t.join()
+        return result
+
+    def test_reads_use_reader_and_release_on_close(self, pool):
+        cursor = pool.cursor()
+        cursor.execute("SELECT name FROM bands")
+        assert cursor.fetchone()["name"] == "Radiohead"
+        assert pool.stats()["readers_in_use"] == 1
+        cursor.close()
+        assert pool.stats()["readers_in_use"] == 0
+
+    def test_cte_write_goes_to_writer(self, pool):
+        from db import is_read_only
+        assert is_read_only("WITH t AS (SELECT 1) SELECT * FROM t")
+        assert not is_read_only("WITH t(n) AS (SELECT 'Blur') INSERT INTO bands (name) SELECT n FROM t")
+        cursor = pool.cursor()
+        cursor.execute("WITH t(n) AS (SELECT 'Blur') INSERT INTO bands (name) SELECT n FROM t")
+        assert pool.holds_writer()
+        pool.commit()
+        assert pool.cursor().execute("SELECT COUNT(*) FROM bands").fetchone()[0] == 2
+
+    def test_reader_released_when_cursor_collected(self, pool):
+        def read():
+            cursor = pool.cursor()
+            cursor.execute("SELECT COUNT(*) FROM bands")
+            return cursor.fetchone()[0]
+
+        assert read() == 1
+        assert pool.stats()["readers_in_use"] == 0
+
+    def test_same_thread_reuses_reader(self, pool):
+        c1 = pool.cursor().execute("SELECT 1")
+        c2 = pool.cursor().execute("SELECT 2")
+        c3 = pool.cursor().execute("SELECT 3")
+        stats = pool.stats()
+        assert stats["readers_open"] == 1
+        assert stats["reader_checkouts"] == 1
+        for c in (c1, c2, c3):
+            c.close()
+
+    def test_reader_checkout_times_out(self, pool):
+        from db import PoolTimeout
+
+        held = []
+        release = threading.Event()
+        started = threading.Barrier(3)
+
+        def hold():
+            cursor = pool.cursor().execute("SELECT 1")
+            held.append(cursor)
+            started.wait()
+            release.wait(2)
+            cursor.close()
+
+        threads = [threading.Thread(target=hold) for _ in range(2)]
+        for t in threads:
+            t.start()
+        started.wait()
+        result = self.run_in_thread(lambda: pool.cursor().execute("SELECT 1"))
+        release.set()
+        for t in threads:
+            t.join()
+
+        assert isinstance(result["error"], PoolTimeout)
+        assert pool.stats()["reader_timeouts"] == 1
+
+    def test_dead_thread_reader_is_reclaimed(self, pool):
+        leaked = []
+        for _ in range(2):
+            self.run_in_thread(lambda: leaked.append(pool.cursor().execute("SELECT 1")))
+        assert pool.stats()["reader_checkouts"] == 2
+
+        cursor = pool.cursor().execute("SELECT COUNT(*) FROM bands")
+        assert cursor.fetchone()[0] == 1
+
+    def test_reused_thread_ident_does_not_inherit_lease(self, pool):
+        import threading
+
+        dead = threading.Thread(target=lambda: None)
+        dead.start()
+        dead.join()
+        stale = pool.acquire_reader()
+        # Pretend the lease was taken by a dead thread with our ident
+        pool._reader_leases[threading.get_ident()][0] = dead
+
+        cursor = pool.cursor().execute("SELECT COUNT(*) FROM bands")
+        assert cursor.fetchone()[0] == 1
+        assert pool._reader_leases[threading.get_ident()][0] is threading.current_thread()
+        cursor.close()
+        assert stale in pool._idle
+
+    def test_executemany_runs_on_writer(self, pool):
+        cursor = pool.cursor()
+        cursor.executemany("INSERT INTO bands (name) VALUES (?)", [("Tool",), ("Low",)])
+        assert pool.stats()["writer_busy"]
+        pool.commit()
+        cursor = pool.cursor().execute("SELECT COUNT(*) FROM bands")
+        assert cursor.fetchone()[0] == 3
+
+    def test_writes_see_own_uncommitted_rows(self, pool):
+        cursor = pool.cursor()
+        cursor.execute("INSERT INTO bands (name) VALUES ('Tool')")
+        cursor.execute("SELECT COUNT(*) FROM bands")
+        assert cursor.fetchone()[0] == 2
+        pool.commit()
+        assert not pool.stats()["writer_busy"]
+
+    def test_writer_is_serialized(self, pool):
+        from db import PoolTimeout
+
+        pool.cursor().execute("INSERT INTO bands (name) VALUES ('Tool')")
+        result = self.run_in_thread(
+            lambda: pool.cursor().execute("INSERT INTO bands (name) VALUES ('Low')")
+        )
+        assert isinstance(result["error"], PoolTimeout)
+        pool.rollback()
+
+        result = self.run_in_thread(
+            lambda: (pool.cursor().execute("INSERT INTO bands (name) VALUES ('Low')"), pool.commit())
+        )
+        assert "error" not in result
+        assert pool.stats()["writer_checkouts"] == 2
+
+    def test_failed_first_write_releases_writer(self, pool):
+        with pytest.raises(sqlite3.IntegrityError):
+            pool.cursor().execute("INSERT INTO bands (name) VALUES ('Radiohead')")
+        assert not pool.stats()["writer_busy"]
+
+    def test_dead_thread_writer_is_reclaimed(self, pool):
+        self.run_in_thread(lambda: pool.cursor().execute("INSERT INTO bands (name) VALUES ('Ghost')"))
+        assert pool.stats()["writer_busy"]
+
+        pool.cursor().execute("INSERT INTO bands (name) VALUES ('Tool')")
+        pool.commit()
+        cursor = pool.cursor().execute("SELECT name FROM bands ORDER BY name")
+        assert [row["name"] for row in cursor.fetchall()] == ["Radiohead", "Tool"]
+
+    def test_readers_see_committed_writes(self, pool):
+        pool.cursor().execute("INSERT INTO bands (name) VALUES ('Tool')")
+        pool.commit()
+        result = self.run_in_thread(
+            lambda: pool.cursor().execute("SELECT COUNT(*) FROM bands").fetchone()[0]
+        )
+        assert result["value"] == 2
+
+
+
+class TestBackends:
+    """Test the local sqlite and in-memory backends behind get_db()"""
+
+    @pytest.fixture(params=["sqlite", "memory"])
+    def conn(self, request, tmp_path):
+        from db import connect
+
+        return connect(request.param, path=str(tmp_path / "local.db"), pool_size=2, pool_timeout=1)
+
+    def test_same_interface_as_libsql(self, conn):
+        cursor = conn.cursor()
+        cursor.execute("CREATE TABLE venues (id INTEGER PRIMARY KEY, name TEXT, location TEXT)")
+        cursor.execute("INSERT INTO venues (name, location) VALUES (?, ?)", ["Casbah", "San Diego"])
+        venue_id = cursor.lastrowid
+        conn.commit()
+
+        row = conn.cursor().execute("SELECT * FROM venues WHERE id = ?", (venue_id,)).fetchone()
+        assert row["name"] == "Casbah"
+        assert row.keys() == ["id", "name", "location"]
+
+    def test_sync_is_noop(self, conn):
+        assert conn.sync() is True
+        assert conn.flush() is True
+        assert conn.sync_age is None
+        assert conn.pending_commits == 0
+
+    def test_rollback_discards_writes(self, conn):
+        conn.cursor().execute("CREATE TABLE events (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.commit()
+        conn.cursor().execute("INSERT INTO events (name) VALUES ('Riot Fest')")
+        conn.rollback()
+        assert conn.cursor().execute("SELECT COUNT(*) FROM events").fetchone()[0] == 0
+
+    def test_reads_from_other_threads(self, conn):
+        conn.cursor().execute("CREATE TABLE bands (name TEXT)")
+        conn.cursor().execute("INSERT INTO bands VALUES ('Tool')")
+        conn.commit()
+
+        counts = []
+
+        def read():
+            counts.append(conn.cursor().execute("SELECT COUNT(*) FROM bands").fetchone()[0])
+
+        threads = [threading.Thread(target=read) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert counts == [1, 1, 1, 1]
+
+    def test_memory_databases_are_isolated(self):
+        from db import connect
+
+        first = connect("memory")
+        first.cursor().execute("CREATE TABLE shows (id INTEGER)")
+        first.commit()
+        second = connect("memory")
+        cursor = second.cursor().execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name='shows'"
+        )
+        assert cursor.fetchone() is None
+
+    def test_sqlite_file_persists(self, tmp_path):
+        from db import connect
+
+        path = str(tmp_path / "persist.db")
+        conn = connect("sqlite", path=path)
+        conn.cursor().execute("CREATE TABLE shows (date TEXT)")
+        conn.cursor().execute("INSERT INTO shows VALUES ('2024-05-01')")
+        conn.commit()
+
+        reopened = connect("sqlite", path=path)
+        assert reopened.cursor().execute("SELECT date FROM shows").fetchone()[0] == "2024-05-01"
+
+    def test_unknown_backend(self):
+        from db import connect
+
+        with pytest.raises(ValueError):
+            connect("postgres")
+
+    def test_settings_from_environment(self, monkeypatch):
+        from db import db_settings
+
+        monkeypatch.setenv("SHOWS_DB_BACKEND", "sqlite")
+        monkeypatch.setenv("SHOWS_DB_PATH", "/tmp/bench.db")
+        settings = db_settings()
+        assert settings["backend"] == "sqlite"
+        assert settings["path"] == "/tmp/bench.db"
+
+
+
+class TestDataVersion:
+    """Test data-version driven cache invalidation"""
+
+    def test_commit_bumps_version(self):
+        from db import connect
+
+        conn = connect("memory")
+        version = conn.data_version
+        assert conn.data_version == version
+
+        conn.cursor().execute("CREATE TABLE shows (date TEXT)")
+        conn.commit()
+        assert conn.data_version > version
+
+    def test_read_only_rollback_keeps_version(self):
+        from db import connect
+
+        conn = connect("memory")
+        version = conn.data_version
+        conn.cursor().execute("SELECT 1")
+        conn.rollback()
+        assert conn.data_version == version
+
+    def test_rolled_back_write_bumps_version(self):
+        """Memory readers see uncommitted rows, so results cached while a
+        write was open must not outlive its rollback"""
+        from db import connect
+
+        conn = connect("memory")
+        conn.cursor().execute("CREATE TABLE shows (date TEXT)")
+        conn.commit()
+        conn.cursor().execute("INSERT INTO shows VALUES ('2024-01-01')")
+        version = conn.data_version
+        conn.rollback()
+        assert conn.data_version > version
+
+    def test_external_write_detected(self, tmp_path):
+        """Changes that arrive without a local commit (sync, other processes)"""
+        from db import connect
+
+        path = str(tmp_path / "shared.db")
+        conn = connect("sqlite", path=path)
+        conn.cursor().execute("CREATE TABLE shows (date TEXT)")
+        conn.commit()
+        version = conn.data_version
+
+        other = sqlite3.connect(path)
+        other.execute("INSERT INTO shows VALUES ('2024-01-01')")
+        other.commit()
+        other.close()
+        assert conn.data_version > version
+
+    def test_commit_without_invalidating(self, tmp_path):
+        """Writes no cached query reads (the geocode cache) keep the version,
+        including the pool's PRAGMA data_version probe"""
+        from db import connect
+
+        for conn in (connect("memory"), connect("sqlite", path=str(tmp_path / "shows.db"))):
+            conn.cursor().execute("CREATE TABLE shows (date TEXT)")
+            conn.commit()
+            version = conn.data_version
+            conn.cursor().execute("INSERT INTO shows VALUES ('2024-01-01')")
+            conn.commit(invalidate=False)
+            assert conn.data_version == version
+            assert conn.cursor().execute("SELECT COUNT(*) FROM shows").fetchone()[0] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,163 @@
+"""
+Tests for the background geocoder
+Lookups go to a local stub server standing in for Nominatim
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+PLACES = {
+    "the sinclair": {"display_name": "The Sinclair, 52 Church St, Cambridge, MA", "lat": "42.3735", "lon": "-71.1206"},
+}
+
+
+class StubNominatim(BaseHTTPRequestHandler):
+    queries = []
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)["q"][0]
+        self.queries.append(query)
+        if query == "broken":
+            self.send_response(500)
+            self.end_headers()
+            return
+        place = PLACES.get(query.casefold())
+        body = json.dumps([place] if place else []).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def endpoint():
+    StubNominatim.queries = []
+    server = HTTPServer(("127.0.0.1", 0), StubNominatim)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/search"
+    server.shutdown()
+
+
+@pytest.fixture
+def make_geocoder(conn, endpoint):
+    from geocode import Geocoder, TokenBucket, fetch
+
+    geocoders = []
+
+    def make():
+        geocoder = Geocoder(
+            conn,
+            fetch=lambda query: fetch(query, endpoint=endpoint, timeout=2),
+            bucket=TokenBucket(rate=50, capacity=5),
+            debounce=0.05,
+        )
+        geocoders.append(geocoder)
+        return geocoder
+
+    yield make
+    for geocoder in geocoders:
+        geocoder.stop()
+
+
+class TestHelpers:
+    """Test query normalization, rate limiting and the HTTP call"""
+
+    def test_normalize_query(self):
+        from geocode import normalize_query
+        assert normalize_query("  The   Sinclair ") == "the sinclair"
+
+    def test_token_bucket_limits_rate(self):
+        from geocode import TokenBucket
+        bucket = TokenBucket(rate=20, capacity=1)
+        start = time.monotonic()
+        for _ in range(3):
+            bucket.acquire()
+        assert time.monotonic() - start >= 0.09
+
+    def test_fetch(self, endpoint):
+        from geocode import fetch
+        address, lat, lon = fetch("The Sinclair", endpoint=endpoint)
+        assert address.startswith("The Sinclair")
+        assert (lat, lon) == (42.3735, -71.1206)
+        assert fetch("Nowhere Hall", endpoint=endpoint) is None
+
+
+class TestGeocoder:
+    """Test the background worker, debouncing and the persistent cache"""
+
+    def test_lookup_is_cached_across_instances(self, make_geocoder):
+        result = make_geocoder().lookup("The Sinclair", timeout=5)
+        assert result.address.startswith("The Sinclair")
+
+        again = make_geocoder()
+        assert again.result("the  sinclair").lat == 42.3735
+        again.request("THE SINCLAIR")
+        assert StubNominatim.queries == ["The Sinclair"]
+
+    def test_lookups_keep_cached_queries(self, conn, make_geocoder):
+        from queries import cache_stats, count_shows
+        version = conn.data_version
+        count_shows(conn)
+        make_geocoder().lookup("The Sinclair", timeout=5)
+        assert conn.data_version == version
+        count_shows(conn)
+        assert cache_stats()["hits"] == 1
+
+    def test_load_happens_outside_the_lock(self, make_geocoder, monkeypatch):
+        geocoder = make_geocoder()
+        free = []
+        load = geocoder._load
+
+        def checked_load(query):
+            # Another thread (the worker) can take the lock meanwhile
+            def probe():
+                if geocoder._cond.acquire(timeout=1):
+                    free.append(query)
+                    geocoder._cond.release()
+            thread = threading.Thread(target=probe)
+            thread.start()
+            thread.join()
+            return load(query)
+
+        monkeypatch.setattr(geocoder, "_load", checked_load)
+        geocoder.request("The Sinclair")
+        assert free == ["the sinclair"]
+
+    def test_misses_are_remembered(self, make_geocoder):
+        geocoder = make_geocoder()
+        assert geocoder.lookup("Nowhere Hall", timeout=5).address is None
+        geocoder.request("Nowhere Hall")
+        assert geocoder.result("Nowhere Hall").error is None
+        assert StubNominatim.queries == ["Nowhere Hall"]
+
+    def test_typing_is_debounced(self, make_geocoder):
+        geocoder = make_geocoder()
+        for partial in ("The Sin", "The Sincl", "The Sinclair"):
+            geocoder.request(partial, key="add_venue")
+        assert geocoder.result("The Sinclair") is None
+        assert geocoder.lookup("The Sinclair", timeout=5).address
+        assert StubNominatim.queries == ["The Sinclair"]
+
+    def test_errors_are_retried_on_refresh(self, make_geocoder):
+        geocoder = make_geocoder()
+        result = geocoder.lookup("broken", timeout=5)
+        assert result.error and result.address is None
+
+        geocoder.request("broken")
+        assert len(StubNominatim.queries) == 1
+        geocoder.request("broken", refresh=True)
+        assert geocoder.result("broken") is None
+        geocoder.lookup("broken", timeout=5)
+        assert len(StubNominatim.queries) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,157 @@
+"""
+Tests for versioned schema migrations
+Run against the in-memory backend, so no Turso credentials are needed
+"""
+import pytest
+
+
+@pytest.fixture
+def conn():
+    from db import connect
+
+    return connect("memory")
+
+
+def create_upcoming_shows(conn, with_rsvp=False):
+    """The table event_watch creates (rsvp was added later)."""
+    rsvp = ", rsvp TEXT" if with_rsvp else ""
+    conn.cursor().execute(f"""
+        CREATE TABLE upcoming_shows (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_name TEXT, date TEXT, venue TEXT, matched_artist TEXT,
+            price TEXT, url TEXT, event_key TEXT UNIQUE, discovered_at TEXT{rsvp}
+        )
+    """)
+    conn.commit()
+
+
+class TestMigrate:
+    """Test the migration runner"""
+
+    def test_fresh_database_gets_schema(self, conn):
+        from migrations import migrate, table_exists
+
+        migrate(conn)
+        cursor = conn.cursor()
+        for table in ("shows", "bands", "venues", "events", "show_bands", "schema_version"):
+            assert table_exists(cursor, table)
+
+    def test_versions_recorded_once(self, conn):
+        from migrations import migrate
+
+        first = migrate(conn)
+        assert 1 in first and 2 in first
+        assert migrate(conn) == []
+
+        cursor = conn.cursor().execute("SELECT version FROM schema_version ORDER BY version")
+        versions = [row['version'] for row in cursor.fetchall()]
+        assert versions == sorted(set(versions))
+
+    def test_upcoming_migration_waits_for_table(self, conn):
+        from migrations import migrate, column_exists
+
+        assert 3 not in migrate(conn)
+
+        create_upcoming_shows(conn)
+        assert migrate(conn) == [3]
+        assert column_exists(conn.cursor(), "upcoming_shows", "rsvp")
+
+    def test_existing_rsvp_column_is_kept(self, conn):
+        from migrations import migrate
+
+        create_upcoming_shows(conn, with_rsvp=True)
+        conn.cursor().execute(
+            "INSERT INTO upcoming_shows (event_name, date, venue, rsvp) VALUES ('X', '2026-01-01', 'Casbah', 'yes')"
+        )
+        conn.commit()
+
+        assert 3 in migrate(conn)
+        row = conn.cursor().execute("SELECT rsvp FROM upcoming_shows").fetchone()
+        assert row['rsvp'] == "yes"
+
+    def test_failed_migration_is_not_recorded(self, conn, monkeypatch):
+        import migrations
+
+        def broken(cursor):
+            cursor.execute("CREATE INDEX idx_broken ON no_such_table (x)")
+
+        monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS + [(99, "broken", broken)])
+        with pytest.raises(Exception):
+            migrations.migrate(conn)
+
+        cursor = conn.cursor().execute("SELECT COUNT(*) FROM schema_version WHERE version = 99")
+        assert cursor.fetchone()[0] == 0
+        # Earlier migrations stay applied
+        cursor = conn.cursor().execute("SELECT COUNT(*) FROM schema_version WHERE version = 2")
+        assert cursor.fetchone()[0] == 1
+
+    def test_generated_year_and_month(self, conn):
+        from migrations import migrate
+
+        migrate(conn)
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO venues (name) VALUES ('Casbah')")
+        cursor.execute("INSERT INTO shows (date, venue_id) VALUES ('2019-10-05', 1)")
+        row = cursor.execute("SELECT year, month FROM shows").fetchone()
+        assert (row['year'], row['month']) == (2019, 10)
+
+    def test_canonical_band_id_follows_grouping(self, conn):
+        from migrations import migrate
+
+        migrate(conn)
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO bands (name) VALUES ('Tool'), ('TOOL (live)')")
+        cursor.execute("UPDATE bands SET primary_band_id = 1 WHERE id = 2")
+        cursor.execute("SELECT id, canonical_band_id FROM bands ORDER BY id")
+        assert [tuple(row) for row in cursor.fetchall()] == [(1, 1), (2, 1)]
+
+        cursor.execute("UPDATE bands SET primary_band_id = NULL WHERE id = 2")
+        cursor.execute("SELECT canonical_band_id FROM bands WHERE id = 2")
+        assert cursor.fetchone()[0] == 2
+
+
+    def test_catalog_versions_follow_name_tables(self, conn):
+        from migrations import migrate
+        migrate(conn)
+        cursor = conn.cursor()
+
+        def versions():
+            cursor.execute("SELECT name, version FROM catalog_versions")
+            return {row['name']: row['version'] for row in cursor.fetchall()}
+
+        before = versions()
+        assert set(before) == {"bands", "venues", "events"}
+        cursor.execute("INSERT INTO venues (name) VALUES ('Casbah')")
+        cursor.execute("INSERT INTO shows (date, venue_id) VALUES ('2024-05-01', 1)")
+        conn.commit()
+        after = versions()
+        assert after["venues"] != before["venues"]
+        assert (after["bands"], after["events"]) == (before["bands"], before["events"])
+
+
+class TestQueryPlans:
+    """Verify the hot queries use the migration's indexes"""
+
+    def test_all_hot_queries_use_indexes(self, conn):
+        from migrations import migrate, check_query_plans, PLAN_CHECKS
+
+        create_upcoming_shows(conn)
+        migrate(conn)
+        results = check_query_plans(conn)
+        assert len(results) == len(PLAN_CHECKS)
+        misses = [(name, plan) for name, _index, used, plan in results if not used]
+        assert misses == []
+
+    def test_missing_tables_are_reported_as_skipped(self, conn):
+        from migrations import migrate, check_query_plans
+
+        migrate(conn)
+        results = {name: (used, plan) for name, _index, used, plan in check_query_plans(conn)}
+        used, plan = results["upcoming by date"]
+        assert used is None
+        assert "upcoming_shows" in plan
+        assert results["lineup subquery"][0] is True
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
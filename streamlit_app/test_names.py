@@ -0,0 +1,118 @@
+"""
+Tests for normalized name matching
+"""
+import pytest
+
+from names import NameIndex, name_key, similarity, trigrams
+
+
+class TestNameKey:
+    """Test the normalized matching key"""
+
+    def test_case_and_whitespace(self):
+        assert name_key("  Bad   RELIGION ") == "bad religion"
+
+    def test_accents_and_width(self):
+        assert name_key("Sigur Rós") == name_key("Sigur Ros")
+        assert name_key("Ｍｏｔｏｒｈｅａｄ") == "motorhead"
+
+    def test_the_prefix(self):
+        assert name_key("The Sinclair") == "sinclair"
+        assert name_key("Beatles, The") == "beatles"
+
+    def test_the_alone_is_kept(self):
+        assert name_key("The") == "the"
+        assert name_key("Theatre of Hate") == "theatre of hate"
+
+
+class TestNameIndex:
+    """Test lookups in the name index"""
+
+    def test_returns_value_and_stored_name(self):
+        index = NameIndex([(7, "The National"), (9, "Tool")])
+        assert index.get("national") == (7, "The National")
+        assert index.get("TOOL") == (9, "Tool")
+        assert index.get("Tools") is None
+        assert index.get("   ") is None
+
+    def test_exact_match_wins(self):
+        index = NameIndex([(1, "Band"), (2, "The Band")])
+        assert index.get("the band") == (2, "The Band")
+        assert index.get("band") == (1, "Band")
+
+    def test_contains_and_len(self):
+        index = NameIndex.from_names(["Casbah", "SOMA"])
+        assert "soma" in index
+        assert "Belly Up" not in index
+        assert len(index) == 2
+
+
+class TestSuggestions:
+    """Test trigram similarity and ranked suggestions"""
+
+    def test_trigrams_pad_words(self):
+        assert trigrams("Tool") == {"  t", " to", "too", "ool", "ol "}
+        assert trigrams("The") == {"  t", " th", "the", "he "}
+        assert trigrams("!!!") == set()
+
+    def test_similarity(self):
+        assert similarity("Pussy Riot", "Pussy Riot") == 1.0
+        assert similarity("Pussy Riot", "Pussy Riot (RU)") > 0.8
+        assert similarity("The Sinclair", "Sinclair Cambridge") > 0.4
+        assert similarity("Tool", "Radiohead") == 0.0
+
+    def test_suggest_ranks_by_score(self):
+        index = NameIndex([(1, "Pussy Riot"), (2, "Riot Grrrl"), (3, "Tool"), (4, "Pussy Galore")])
+        suggestions = index.suggest("Pussy Riot (RU)")
+        # Riot Grrrl shares only "riot" and falls under the threshold
+        assert [s.value for s in suggestions] == [1, 4]
+        assert suggestions[0].name == "Pussy Riot"
+        assert suggestions[0].score > suggestions[1].score
+
+    def test_suggest_threshold_and_limit(self):
+        index = NameIndex.from_names(["The Sinclair", "Sinclair Hall", "Casbah"])
+        assert [s.name for s in index.suggest("Sinclair Cambridge")] == ["The Sinclair", "Sinclair Hall"]
+        assert len(index.suggest("Sinclair Cambridge", limit=1)) == 1
+        assert index.suggest("Sinclair Cambridge", threshold=0.9) == []
+        assert index.suggest("") == []
+
+    def test_suggest_matches_full_scan(self):
+        """Prefix filtering finds every name a full scan would"""
+        names = [f"{a} {b}" for a in ("Red", "Blue", "Green", "Black") for b in ("Sky", "Skies", "Flag", "Sea")]
+        index = NameIndex.from_names(names)
+        for threshold in (0.3, 0.5):
+            for query in ("Red Skys", "Blak Flag", "Green Seas", "Sky"):
+                expected = sorted((n for n in names if similarity(query, n) >= threshold),
+                                  key=lambda n: (-similarity(query, n), n))
+                found = index.suggest(query, limit=len(names), threshold=threshold)
+                assert [s.name for s in found] == expected
+
+
+class TestComplete:
+    """Test prefix completion for the type-ahead pickers"""
+
+    @pytest.fixture
+    def index(self):
+        return NameIndex([
+            (1, "The National"), (2, "Nation of Ulysses"), (3, "Pussy Riot"),
+            (4, "Sigur Rós"), (5, "national park"),
+        ])
+
+    def test_name_starts_before_word_starts(self, index):
+        assert index.complete("nat") == [
+            (2, "Nation of Ulysses"), (5, "national park"), (1, "The National"),
+        ]
+
+    def test_folded_prefix(self, index):
+        assert index.complete("THE  n") == [(1, "The National")]
+        assert index.complete("ros") == [(4, "Sigur Rós")]
+        assert index.complete("riot") == [(3, "Pussy Riot")]
+
+    def test_limit_and_empty(self, index):
+        assert len(index.complete("n", limit=2)) == 2
+        assert index.complete("zz") == []
+        assert index.complete("  ") == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,154 @@
+"""
+Tests for the shared query module and its cache
+"""
+import pytest
+
+
+@pytest.fixture
+def conn(conn):
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO venues (name, location) VALUES ('Casbah', 'San Diego, CA')")
+    cursor.execute("INSERT INTO events (name) VALUES ('Fest')")
+    cursor.execute("INSERT INTO shows (date, venue_id, event_id) VALUES ('2024-05-01', 1, 1)")
+    cursor.execute("INSERT INTO bands (name) VALUES ('Tool'), ('Mastodon'), ('The Tool')")
+    cursor.execute("UPDATE bands SET primary_band_id = 1 WHERE name = 'The Tool'")
+    cursor.execute(
+        "INSERT INTO show_bands (show_id, band_id, band_order) VALUES (1, 2, 1), (1, 1, 2)"
+    )
+    conn.commit()
+    return conn
+
+
+class TestCache:
+    """Test that cached queries are shared until the data changes"""
+
+    def test_repeat_call_is_a_hit(self, conn):
+        from queries import cache_stats, load_shows
+        first = load_shows(conn)
+        assert load_shows(conn) is first
+        assert cache_stats()["hits"] == 1
+        assert cache_stats()["misses"] == 1
+
+    def test_arguments_are_part_of_the_key(self, conn):
+        from queries import count_shows
+        assert count_shows(conn, year=2024) == 1
+        assert count_shows(conn, year=2023) == 0
+
+    def test_recomputes_after_commit(self, conn):
+        from queries import count_shows
+        assert count_shows(conn) == 1
+        conn.cursor().execute("INSERT INTO shows (date, venue_id) VALUES ('2024-06-01', 1)")
+        conn.commit()
+        assert count_shows(conn) == 2
+
+    def test_connections_are_cached_separately(self, conn):
+        from db import connect
+        from migrations import migrate
+        from queries import count_shows
+        other = connect("memory")
+        migrate(other)
+        assert count_shows(conn) == 1
+        assert count_shows(other) == 0
+
+    def test_least_recently_used_evicted(self, conn, monkeypatch):
+        import queries
+        monkeypatch.setattr(queries, "MAX_ENTRIES", 2)
+        queries.load_lineup(conn, 1)
+        queries.load_show(conn, 1)
+        queries.load_lineup(conn, 1)
+        queries.overview(conn)
+        assert queries.cache_stats()["entries"] == 2
+        queries.load_lineup(conn, 1)
+        queries.load_show(conn, 1)
+        assert queries.cache_stats()["hits"] == 2
+
+    def test_name_index_outlives_unrelated_commits(self, conn):
+        from queries import band_index, venue_index
+        bands, venues = band_index(conn), venue_index(conn)
+        conn.cursor().execute("INSERT INTO shows (date, venue_id) VALUES ('2024-06-01', 1)")
+        conn.commit()
+        assert band_index(conn) is bands
+        assert venue_index(conn) is venues
+
+        conn.cursor().execute("INSERT INTO bands (name) VALUES ('Pelican')")
+        conn.commit()
+        assert "pelican" in band_index(conn)
+        assert venue_index(conn) is venues
+
+    def test_name_index_after_rollback(self, conn):
+        """The memory backend reads uncommitted rows; a rolled-back band must
+        not come back once another change lands"""
+        from queries import band_index
+        conn.cursor().execute("INSERT INTO bands (name) VALUES ('Pelican')")
+        assert "pelican" in band_index(conn)
+        conn.rollback()
+        conn.cursor().execute("INSERT INTO bands (name) VALUES ('Isis')")
+        conn.commit()
+        assert "pelican" not in band_index(conn)
+        assert "isis" in band_index(conn)
+
+    def test_uncached_bypasses_cache(self, conn):
+        from queries import cache_stats, load_years
+        assert load_years.uncached(conn) == ("2024",)
+        assert cache_stats()["entries"] == 0
+
+
+class TestQueries:
+    """Test the queries shared by the sidebar and pages"""
+
+    def test_overview_counts_groups_once(self, conn):
+        from queries import overview
+        assert overview(conn) == (1, 2, 1, 1)
+
+    def test_show_and_lineup(self, conn):
+        from queries import load_lineup, load_show
+        show = load_show(conn, 1)
+        assert (show['venue_name'], show['event_name']) == ("Casbah", "Fest")
+        assert load_lineup(conn, 1) == ("Mastodon", "Tool")
+
+    def test_indexes_match_names(self, conn):
+        from queries import band_index, event_index, load_venue_location, venue_index
+        assert band_index(conn).get("tool")[1] == "Tool"
+        assert venue_index(conn).get("the casbah") == (1, "Casbah")
+        assert load_venue_location(conn, 1) == "San Diego, CA"
+        assert "fest" in event_index(conn)
+
+    def test_delete_show_removes_its_orphans(self, conn):
+        from queries import delete_show, overview
+        assert overview(conn) == (1, 2, 1, 1)
+        delete_show(conn.cursor(), 1)
+        conn.commit()
+        # Tool stays as the primary of The Tool
+        assert overview(conn) == (0, 1, 0, 0)
+
+
+class TestUpcoming:
+    """Test that the upcoming queries follow event_watch creating its table"""
+
+    def test_table_created_while_running_waits_for_migration(self, conn):
+        from migrations import migrate
+        from queries import get_recent_upcoming_shows, load_upcoming_shows, upcoming_table_exists
+        assert not upcoming_table_exists(conn)
+        assert get_recent_upcoming_shows(conn, today="2026-03-01") == []
+
+        # As event_watch creates it: without the rsvp column
+        conn.cursor().execute("""
+            CREATE TABLE upcoming_shows (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                event_name TEXT, date TEXT, venue TEXT, matched_artist TEXT,
+                price TEXT, url TEXT, event_key TEXT UNIQUE, discovered_at TEXT
+            )
+        """)
+        conn.cursor().execute(
+            "INSERT INTO upcoming_shows (event_name, date, venue) VALUES ('Tool', '2026-02-27', 'Casbah')"
+        )
+        conn.commit()
+        # Not migrated yet: no rsvp column, so nothing runs against it
+        assert not upcoming_table_exists(conn)
+        assert get_recent_upcoming_shows(conn, today="2026-03-01") == []
+
+        # As get_db() does on the next start
+        migrate(conn)
+        assert upcoming_table_exists(conn)
+        assert len(get_recent_upcoming_shows(conn, today="2026-03-01")) == 1
+        assert load_upcoming_shows(conn, today="2026-02-01")[0]['rsvp'] is None
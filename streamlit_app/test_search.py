@@ -0,0 +1,86 @@
+"""
+Tests for the FTS5 search index
+Run against the in-memory backend, so no Turso credentials are needed
+"""
+import pytest
+
+
+@pytest.fixture
+def conn(conn):
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO bands (name) VALUES ('Tool'), ('Toolbox Terror'), ('Mastodon')")
+    cursor.execute("INSERT INTO bands (name, primary_band_id) VALUES ('Maynard & Friends', 1)")
+    cursor.execute("INSERT INTO venues (name, location) VALUES ('Casbah', 'San Diego, CA')")
+    cursor.execute("INSERT INTO events (name) VALUES ('Desert Daze')")
+    conn.commit()
+    return conn
+
+
+def ids(conn, matches):
+    sql, params = matches
+    cursor = conn.cursor().execute(f"SELECT id FROM ({sql}) ORDER BY relevance, id", params)
+    return [row['id'] for row in cursor.fetchall()]
+
+
+class TestMatchExpression:
+    """Test building FTS5 queries from search box text"""
+
+    def test_substring_phrase(self):
+        from search import match_expression, BAND
+        assert match_expression(" tool ", BAND) == '{band} : "tool"'
+
+    def test_quotes_are_escaped(self):
+        from search import match_expression, EVENT
+        assert match_expression('say "hi"', EVENT) == '{event} : "say ""hi"""'
+
+    def test_short_text_has_no_expression(self):
+        from search import match_expression, VENUE
+        assert match_expression("ab", VENUE) is None
+
+
+class TestSearchIndex:
+    """Test search results and trigger maintenance"""
+
+    def test_band_substring_match(self, conn):
+        from search import band_matches
+        assert ids(conn, band_matches("TOOL")) == [1, 2]
+        assert ids(conn, band_matches("odo")) == [3]
+
+    def test_alias_finds_primary_band(self, conn):
+        from search import band_matches
+        assert ids(conn, band_matches("maynard")) == [1]
+        assert ids(conn, band_matches("maynard", group=False)) == [4]
+
+    def test_venue_location_and_event(self, conn):
+        from search import venue_matches, event_matches
+        assert ids(conn, venue_matches("diego")) == [1]
+        assert ids(conn, event_matches("daze")) == [1]
+        assert ids(conn, event_matches("casbah")) == []
+
+    def test_short_terms_fall_back_to_like(self, conn):
+        from search import band_matches
+        assert ids(conn, band_matches("ma")) == [1, 3]
+
+    def test_triggers_follow_writes(self, conn):
+        from search import band_matches
+        cursor = conn.cursor()
+        cursor.execute("UPDATE bands SET name = 'Baroness' WHERE id = 3")
+        cursor.execute("DELETE FROM bands WHERE id = 2")
+        cursor.execute("INSERT INTO bands (name) VALUES ('Pelican')")
+        conn.commit()
+        assert ids(conn, band_matches("mastodon")) == []
+        assert ids(conn, band_matches("baroness")) == [3]
+        assert ids(conn, band_matches("toolbox")) == []
+        assert ids(conn, band_matches("pelican")) == [5]
+
+    def test_rebuild(self, conn):
+        import search
+        conn.cursor().execute("DELETE FROM search_index")
+        conn.commit()
+        assert ids(conn, search.band_matches("tool")) == []
+        search.rebuild(conn)
+        assert ids(conn, search.band_matches("tool")) == [1, 2]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,87 @@
+"""
+Tests for the show_summary table and its triggers
+Run against the in-memory backend, so no Turso credentials are needed
+"""
+import pytest
+
+
+@pytest.fixture
+def conn(conn):
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO venues (name, location) VALUES ('Casbah', 'San Diego, CA')")
+    cursor.execute("INSERT INTO venues (name, location) VALUES ('Belly Up', 'Solana Beach, CA')")
+    cursor.execute("INSERT INTO events (name) VALUES ('Desert Daze')")
+    cursor.execute("INSERT INTO bands (name) VALUES ('Tool'), ('Mastodon'), ('Pelican')")
+    cursor.execute("INSERT INTO shows (date, venue_id, event_id) VALUES ('2019-10-05', 1, 1)")
+    # Inserted out of billing order on purpose
+    for band_id, order in [(3, 2), (1, 0), (2, 1)]:
+        cursor.execute(
+            "INSERT INTO show_bands (show_id, band_id, band_order) VALUES (1, ?, ?)",
+            (band_id, order),
+        )
+    conn.commit()
+    return conn
+
+
+def summary_row(conn, show_id=1):
+    cursor = conn.cursor().execute("SELECT * FROM show_summary WHERE show_id = ?", (show_id,))
+    return cursor.fetchone()
+
+
+class TestShowSummary:
+    """Test that writes to the source tables keep show_summary current"""
+
+    def test_new_show_is_summarized(self, conn):
+        row = summary_row(conn)
+        assert row['date'] == "2019-10-05"
+        assert row['year'] == 2019
+        assert row['venue_name'] == "Casbah"
+        assert row['venue_location'] == "San Diego, CA"
+        assert row['event_name'] == "Desert Daze"
+        assert row['lineup'] == "Tool, Mastodon, Pelican"
+
+    def test_edit_show_and_lineup(self, conn):
+        cursor = conn.cursor()
+        cursor.execute("UPDATE shows SET date = '2020-01-02', venue_id = 2, event_id = NULL WHERE id = 1")
+        cursor.execute("DELETE FROM show_bands WHERE show_id = 1")
+        cursor.execute("INSERT INTO show_bands (show_id, band_id, band_order) VALUES (1, 2, 0)")
+        conn.commit()
+
+        row = summary_row(conn)
+        assert (row['date'], row['year']) == ("2020-01-02", 2020)
+        assert row['venue_name'] == "Belly Up"
+        assert row['event_name'] is None
+        assert row['lineup'] == "Mastodon"
+
+    def test_renames_propagate(self, conn):
+        cursor = conn.cursor()
+        cursor.execute("UPDATE bands SET name = 'TOOL' WHERE id = 1")
+        cursor.execute("UPDATE venues SET name = 'The Casbah', location = 'SD' WHERE id = 1")
+        cursor.execute("UPDATE events SET name = 'Desert Daze 2019' WHERE id = 1")
+        conn.commit()
+
+        row = summary_row(conn)
+        assert row['lineup'] == "TOOL, Mastodon, Pelican"
+        assert (row['venue_name'], row['venue_location']) == ("The Casbah", "SD")
+        assert row['event_name'] == "Desert Daze 2019"
+
+    def test_delete_show(self, conn):
+        conn.cursor().execute("DELETE FROM shows WHERE id = 1")
+        conn.commit()
+        assert summary_row(conn) is None
+
+    def test_rolled_back_write_leaves_summary(self, conn):
+        conn.cursor().execute("UPDATE venues SET name = 'Gone' WHERE id = 1")
+        conn.rollback()
+        assert summary_row(conn)['venue_name'] == "Casbah"
+
+    def test_rebuild_matches_triggers(self, conn):
+        import summary
+        before = [tuple(row) for row in conn.cursor().execute("SELECT * FROM show_summary").fetchall()]
+        summary.rebuild(conn)
+        after = [tuple(row) for row in conn.cursor().execute("SELECT * FROM show_summary").fetchall()]
+        assert after == before
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,98 @@
+"""
+Tests for the synthetic history generator
+"""
+from datetime import date
+
+import pytest
+
+TODAY = date(2026, 3, 1)
+
+
+def make(shows=300, seed=0):
+    from db import connect
+    from synthetic import generate
+
+    conn = connect("memory")
+    inserted = generate(conn, shows, seed=seed, today=TODAY)
+    return conn, inserted
+
+
+@pytest.fixture(scope="module")
+def generated():
+    return make()
+
+
+def rows(conn, query):
+    cursor = conn.cursor()
+    cursor.execute(query)
+    return [tuple(row) for row in cursor.fetchall()]
+
+
+class TestGenerate:
+    """Test the generated data and the tables derived from it"""
+
+    def test_counts(self, generated):
+        conn, inserted = generated
+        assert inserted["shows"] == 300
+        for table in ("bands", "venues", "show_bands", "upcoming_shows"):
+            assert rows(conn, f"SELECT COUNT(*) FROM {table}") == [(inserted[table],)]
+
+    def test_same_seed_same_data(self, generated):
+        conn, _inserted = generated
+        again, _ = make()
+        query = "SELECT * FROM show_summary ORDER BY show_id"
+        assert rows(again, query) == rows(conn, query)
+
+    def test_derived_tables_match_source(self, generated):
+        from aggregates import verify
+        conn, _inserted = generated
+        assert verify(conn) == {}
+        assert rows(conn, "SELECT COUNT(*) FROM show_summary") == [(300,)]
+        assert rows(conn, "SELECT COUNT(*) FROM search_index") == rows(
+            conn, "SELECT (SELECT COUNT(*) FROM bands) + (SELECT COUNT(*) FROM venues)"
+                  " + (SELECT COUNT(*) FROM events)"
+        )
+
+    def test_lineups_are_ordered_without_repeats(self, generated):
+        conn, _inserted = generated
+        assert rows(conn, """
+            SELECT show_id FROM show_bands GROUP BY show_id
+            HAVING COUNT(DISTINCT band_id) != COUNT(*) OR MAX(band_order) != COUNT(*)
+        """) == []
+
+    def test_aliases_point_at_primaries(self, generated):
+        conn, _inserted = generated
+        assert rows(conn, "SELECT COUNT(*) FROM bands WHERE primary_band_id IS NOT NULL")[0][0] > 0
+        assert rows(conn, """
+            SELECT a.id FROM bands a JOIN bands p ON p.id = a.primary_band_id
+            WHERE p.primary_band_id IS NOT NULL
+        """) == []
+
+    def test_shows_before_today(self, generated):
+        conn, _inserted = generated
+        [(first, last)] = rows(conn, "SELECT MIN(date), MAX(date) FROM shows")
+        assert "1995-01-01" <= first <= last <= TODAY.isoformat()
+
+    def test_triggers_restored(self, generated):
+        conn, _inserted = generated
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO shows (date, venue_id) VALUES ('2026-02-01', 1)")
+        show_id = cursor.lastrowid
+        cursor.execute("INSERT INTO show_bands (show_id, band_id, band_order) VALUES (?, 1, 1)", (show_id,))
+        conn.commit()
+        assert rows(conn, f"SELECT lineup FROM show_summary WHERE show_id = {show_id}") == rows(
+            conn, "SELECT name FROM bands WHERE id = 1"
+        )
+
+    def test_upcoming_shows_around_today(self, generated):
+        from queries import get_recent_upcoming_shows, load_upcoming_shows
+        conn, _inserted = generated
+        assert load_upcoming_shows(conn, today=TODAY.isoformat())
+        for row in get_recent_upcoming_shows(conn, today=TODAY.isoformat()):
+            assert row['date'] <= TODAY.isoformat()
+
+    def test_refuses_a_database_with_shows(self, generated):
+        from synthetic import generate
+        conn, _inserted = generated
+        with pytest.raises(ValueError):
+            generate(conn, 10)
@@ -28,3 +28,32 @@ def inject_sidebar_css():
         }
         </style>
     """, unsafe_allow_html=True)
+
+
+def type_ahead(label, index, key, on_pick, limit=8, placeholder=None, allow_new=False):
+    """Search-as-you-type picker over a names.NameIndex
+
+    Instead of a selectbox holding the whole catalog, each pause in typing
+    reruns with the top ``limit`` prefix matches (NameIndex.complete) shown
+    as buttons, so the page stays the same size however many names exist.
+    Clicking one calls ``on_pick(value, name)`` and clears the box. With
+    ``allow_new``, text that matches no stored name can be picked as a new
+    name, with value None.
+    """
+    query_key = f"{key}_query"
+
+    def pick(value, name):
+        st.session_state[query_key] = ""
+        on_pick(value, name)
+
+    text = st.text_input(label, key=query_key, placeholder=placeholder, live=True).strip()
+    if not text:
+        return
+    matches = index.complete(text, limit)
+    with st.container(horizontal=True):
+        for i, (value, name) in enumerate(matches):
+            st.button(name, key=f"{key}_match_{i}", on_click=pick, args=(value, name))
+        if allow_new and index.get(text) is None:
+            st.button(f"➕ {text}", key=f"{key}_new", on_click=pick, args=(None, text), help="Add as new")
+    if not matches and not allow_new:
+        st.caption("No matches")